@@ -1,22 +1,72 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Response, UploadFile, File
+from typing import List, Dict, Any, Optional
 
 from app.models.car.schemas import CarCreateSchema, CarResponseSchema
 from app.models.car.crud import car_crud
+from app.db.dynamodb import VehicleAlreadyExistsError
+from app.services.car_import import car_import_service
+
+# Расширения файлов импорта -> формат
+IMPORT_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
 
 # Сохраняем prefix="/cars"
 router = APIRouter(prefix="/cars", tags=["cars"])
 
 @router.post("/", response_model=CarResponseSchema)
 async def create_car(car_data: CarCreateSchema):
-    created = await car_crud.create_car(car_data)
+    try:
+        created = await car_crud.create_car(car_data)
+    except VehicleAlreadyExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not created:
         raise HTTPException(status_code=500, detail="Failed to create Car")
     return created
 
 @router.get("/", response_model=List[CarResponseSchema])
-async def list_cars():
-    return await car_crud.list_cars()
+async def list_cars(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    """
+    Страница списка автомобилей. Курсор следующей страницы
+    возвращается в заголовке X-Next-Cursor (нет заголовка — страница последняя).
+    """
+    try:
+        cars, next_cursor = await car_crud.list_cars_page(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return cars
+
+@router.post("/import")
+async def import_cars(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, regex="^(csv|ndjson)$")
+):
+    """
+    Пакетный импорт автомобилей (например, лоты аукционов) из CSV или NDJSON.
+    Строки проверяются по CarCreateSchema и пишутся пачками по 25 (BatchWriteItem).
+    Возвращает число записанных строк и ошибки по номерам строк.
+
+    - **file**: CSV (с заголовком) или NDJSON
+    - **format**: csv / ndjson; по умолчанию определяется по расширению файла
+    """
+    file_format = format
+    if file_format is None:
+        filename = (file.filename or "").lower()
+        file_format = next(
+            (fmt for ext, fmt in IMPORT_EXTENSIONS.items() if filename.endswith(ext)),
+            None
+        )
+    if file_format is None:
+        raise HTTPException(status_code=400, detail="Cannot detect import format, pass ?format=csv|ndjson")
+
+    try:
+        return await car_import_service.import_upload(file.read, file_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{car_id}", response_model=CarResponseSchema)
 async def get_car(car_id: str):
@@ -0,0 +1,64 @@
+import json
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional, Any, Dict, AsyncIterator
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from app.db.dynamodb import db
+from app.models.enums import VehicleType
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+
+def _json_default(value: Any):
+    """Decimal (из DynamoDB) и datetime -> JSON"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _to_line(doc: Dict[str, Any]) -> bytes:
+    """Документ -> строка NDJSON (с id вместо _id)"""
+    if "_id" in doc:
+        doc["id"] = doc.pop("_id")
+    return (json.dumps(doc, default=_json_default, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def _stream_vehicles(vehicle_type: Optional[str], page_size: int) -> AsyncIterator[bytes]:
+    count = 0
+    try:
+        async for doc in db.iter_vehicles(vehicle_type=vehicle_type, page_size=page_size):
+            count += 1
+            yield _to_line(doc)
+    except Exception as e:
+        # Заголовки уже отправлены — можем только оборвать поток
+        logger.error(f"Ошибка экспорта vehicles после {count} записей: {str(e)}")
+        raise
+    logger.info(f"Экспорт vehicles завершен: {count} записей")
+
+
+@router.get("/vehicles")
+async def export_vehicles(
+    type: Optional[VehicleType] = None,
+    page_size: int = Query(500, ge=1, le=1000)
+):
+    """
+    Потоковая выгрузка каталога ТС в формате NDJSON (одна запись на строку).
+    Записи отдаются по мере чтения страниц из DynamoDB, память не растет
+    с размером таблицы.
+
+    - **type**: Тип ТС (car / truck / trailer), без фильтра — все
+    - **page_size**: Размер страницы чтения из DynamoDB
+    """
+    vehicle_type = type.value if type else None
+    return StreamingResponse(
+        _stream_vehicles(vehicle_type, page_size),
+        media_type="application/x-ndjson"
+    )
@@ -1,14 +1,151 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+import json
+import asyncio
+import threading
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 
+from app.db.dynamodb import VehiclesUnavailableError
 from app.services.optimizer import LoadingOptimizer
-from app.services.height_calculator import HeightCalculationService
-from app.models.enums import VehicleCategory
+from app.services.fleet import FleetOptimizer
+from app.services.executor import (
+    ExecutorSaturatedError,
+    JobTimeoutError,
+    get_optimization_executor
+)
+from app.services.jobs import Job, JobQueueFullError, job_queue
+from app.services.truck_geometry import adjusted_platforms, geometry_cache_stats
+from app.services.constraints import constraint_metrics
+from app.services.history_buffer import history_buffer
+from app.models.enums import JobPriority, VehicleCategory
 from app.models.truck.crud import truck_crud
 from app.models.car.crud import car_crud
 
-# Создаем экземпляр оптимизатора
-optimizer = LoadingOptimizer()
+# Создаем экземпляр оптимизатора: поиск выполняется в пуле процессов,
+# event loop занят только вводом-выводом
+executor = get_optimization_executor()
+optimizer = LoadingOptimizer(executor=executor)
+fleet_optimizer = FleetOptimizer(optimizer, executor)
+
+
+class FleetOptimizationRequest(BaseModel):
+    truck_ids: List[str] = Field(..., min_items=1)
+    car_ids: List[str] = Field(..., min_items=1)
+    constraints: Optional[Dict[str, Any]] = None
+    time_budget_ms: Optional[float] = Field(None, gt=0)
+
+
+class OptimizationJobRequest(BaseModel):
+    """Задача оптимизации: один грузовик — optimize, несколько — пакетная (fleet)"""
+    truck_ids: List[str] = Field(..., min_items=1)
+    car_ids: List[str] = Field(..., min_items=1)
+    constraints: Optional[Dict[str, Any]] = None
+    time_budget_ms: Optional[float] = Field(None, gt=0)
+    priority: JobPriority = JobPriority.NORMAL
+
+# Пауза перед повторной отправкой задачи в занятый пул процессов (сек)
+JOB_EXECUTOR_RETRY_DELAY = 0.5
+
+def _unavailable(error: VehiclesUnavailableError) -> HTTPException:
+    """503: часть записей не прочитана — это не то же самое, что «не найдено»"""
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "1"})
+
+
+async def _load_truck_and_cars(truck_id: str, car_ids: List[str]):
+    """Грузовик и автомобили запроса оптимизации (404, если чего-то нет; 503, если база недоступна)"""
+    truck = await truck_crud.get_truck(truck_id)
+    if not truck:
+        raise HTTPException(status_code=404, detail=f"Truck with ID {truck_id} not found")
+
+    # Проверяем существование всех автомобилей (одним пакетным чтением)
+    try:
+        found_cars = await car_crud.get_car_records(car_ids)
+    except VehiclesUnavailableError as e:
+        raise _unavailable(e)
+    for car_id in car_ids:
+        if car_id not in found_cars:
+            raise HTTPException(
+                status_code=404, 
+                detail=f"Car with ID {car_id} not found"
+            )
+    return truck, [found_cars[car_id] for car_id in dict.fromkeys(car_ids)]
+
+
+async def _load_fleet(truck_ids: List[str], car_ids: List[str]):
+    """Грузовики и автомобили пакетной оптимизации (404 со списком недостающих)"""
+    truck_ids = list(dict.fromkeys(truck_ids))
+    car_ids = list(dict.fromkeys(car_ids))
+
+    try:
+        found_trucks = await truck_crud.get_trucks(truck_ids)
+        found_cars = await car_crud.get_car_records(car_ids)
+    except VehiclesUnavailableError as e:
+        raise _unavailable(e)
+
+    missing_trucks = [truck_id for truck_id in truck_ids if truck_id not in found_trucks]
+    if missing_trucks:
+        raise HTTPException(status_code=404, detail=f"Trucks not found: {', '.join(missing_trucks)}")
+
+    missing_cars = [car_id for car_id in car_ids if car_id not in found_cars]
+    if missing_cars:
+        raise HTTPException(status_code=404, detail=f"Cars not found: {', '.join(missing_cars)}")
+
+    return [found_trucks[truck_id] for truck_id in truck_ids], [found_cars[car_id] for car_id in car_ids]
+
+
+async def _search_when_free(call, wait_ms: Optional[float] = None):
+    """
+    Фоновая задача ждет свободного места в пуле процессов, а не падает с 429.
+    Ожидание ограничено wait_ms (по умолчанию — таймаут задачи пула); после
+    него ExecutorSaturatedError пробрасывается и задача завершается с ошибкой.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (wait_ms if wait_ms is not None else executor.job_timeout_ms) / 1000.0
+    while True:
+        try:
+            return await call()
+        except ExecutorSaturatedError:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise
+            await asyncio.sleep(min(JOB_EXECUTOR_RETRY_DELAY, remaining))
+
+
+async def _run_optimize_job(job: Job) -> Dict[str, Any]:
+    payload = job.payload
+    job.report("searching", 0.1)
+    result = await _search_when_free(lambda: optimizer.optimize_loading(
+        payload["truck"], payload["cars"], payload["constraints"], payload["time_budget_ms"]
+    ))
+    job.report("saving", 0.9)
+    if result.get("success"):
+        job.configuration_ids.append(await optimizer.save_configuration(result["configuration"]))
+    return result
+
+
+async def _run_fleet_job(job: Job) -> Dict[str, Any]:
+    payload = job.payload
+    job.report("searching", 0.1)
+    result = await _search_when_free(lambda: fleet_optimizer.optimize_fleet(
+        payload["trucks"], payload["cars"], payload["constraints"], payload["time_budget_ms"]
+    ))
+    job.report("saving", 0.9)
+    for truck_result in result["results"]:
+        if truck_result.get("success"):
+            job.configuration_ids.append(await optimizer.save_configuration(truck_result["configuration"]))
+    return result
+
+
+job_queue.register("optimize", _run_optimize_job)
+job_queue.register("fleet", _run_fleet_job)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Событие Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
 
 # Определяем роутер для API оптимизатора
 router = APIRouter(prefix="/optimizer", tags=["optimizer"])
@@ -20,11 +157,27 @@ async def health_check():
     """
     return await optimizer.health_check()
 
+@router.get("/metrics")
+async def optimizer_metrics():
+    """
+    Метрики оптимизатора: попадания в кэши геометрии и таблиц эффективных высот,
+    время проверки по типам ограничений, загрузка пула процессов,
+    буфер записи истории загрузок.
+    """
+    return {
+        "caches": geometry_cache_stats(),
+        "constraints": constraint_metrics.stats(),
+        "executor": executor.stats(),
+        "jobs": job_queue.stats(),
+        "history": history_buffer.stats()
+    }
+
 @router.post("/optimize/{truck_id}")
 async def optimize_loading(
     truck_id: str, 
     car_ids: List[str],
-    constraints: Optional[Dict[str, Any]] = None
+    constraints: Optional[Dict[str, Any]] = None,
+    time_budget_ms: Optional[float] = Query(None, gt=0)
 ):
     """
     Оптимизирует загрузку автомобилей на грузовик.
@@ -32,30 +185,99 @@ async def optimize_loading(
     - **truck_id**: ID грузовика
     - **car_ids**: Список ID автомобилей для загрузки
     - **constraints**: Дополнительные ограничения (опционально)
+    - **time_budget_ms**: Дедлайн поиска; возвращается лучшее размещение,
+      найденное к этому времени (опционально)
     """
-    # Проверяем существование грузовика
-    truck = await truck_crud.get_truck(truck_id)
-    if not truck:
-        raise HTTPException(status_code=404, detail=f"Truck with ID {truck_id} not found")
-
-    # Проверяем существование всех автомобилей
-    cars = []
-    for car_id in car_ids:
-        car = await car_crud.get_car(car_id)
-        if not car:
-            raise HTTPException(
-                status_code=404, 
-                detail=f"Car with ID {car_id} not found"
-            )
-        cars.append(car)
+    truck, cars = await _load_truck_and_cars(truck_id, car_ids)
 
     # Вызываем метод оптимизации загрузки
     try:
-        result = await optimizer.optimize_loading(truck, cars, constraints)
+        result = await optimizer.optimize_loading(truck, cars, constraints, time_budget_ms)
         return result
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except JobTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/optimize/{truck_id}/stream")
+async def stream_optimize_loading(
+    request: Request,
+    truck_id: str,
+    car_ids: List[str],
+    constraints: Optional[Dict[str, Any]] = None,
+    time_budget_ms: Optional[float] = Query(None, gt=0)
+):
+    """
+    Оптимизация с потоком промежуточных результатов (Server-Sent Events).
+
+    Событие `improvement` приходит для каждого улучшенного размещения
+    (score, peak_height, placement), событие `result` — итог как у
+    /optimize/{truck_id}. При отключении клиента поиск останавливается.
+    Поиск идет в общем пуле процессов: если пул занят, ответ 429
+    до начала потока.
+    """
+    truck, cars = await _load_truck_and_cars(truck_id, car_ids)
+    if executor.saturated:
+        raise HTTPException(
+            status_code=429, detail=str(ExecutorSaturatedError(executor.depth)), headers={"Retry-After": "1"}
+        )
+    cancel_event = threading.Event()
+
+    async def events():
+        stream = optimizer.stream_optimization(truck, cars, constraints, time_budget_ms, cancel_event)
+        try:
+            async for event, data in stream:
+                if await request.is_disconnected():
+                    break
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            cancel_event.set()
+            await stream.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@router.post("/jobs", status_code=202)
+async def create_optimization_job(request: OptimizationJobRequest):
+    """
+    Ставит оптимизацию в очередь фоновых задач и сразу возвращает задачу.
+    Результат сохраняется как конфигурация загрузки (configuration_ids).
+
+    - **truck_ids**: ID грузовика (или нескольких — пакетная оптимизация)
+    - **car_ids**: ID автомобилей
+    - **constraints**: Дополнительные ограничения (опционально)
+    - **time_budget_ms**: Бюджет времени поиска (опционально)
+    - **priority**: urgent, normal или batch
+    """
+    truck_ids = list(dict.fromkeys(request.truck_ids))
+    payload = {"constraints": request.constraints, "time_budget_ms": request.time_budget_ms}
+    if len(truck_ids) == 1:
+        kind = "optimize"
+        payload["truck"], payload["cars"] = await _load_truck_and_cars(truck_ids[0], request.car_ids)
+    else:
+        kind = "fleet"
+        payload["trucks"], payload["cars"] = await _load_fleet(truck_ids, request.car_ids)
+
+    try:
+        job = job_queue.submit(kind, payload, request.priority)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}")
+async def get_optimization_job(job_id: str):
+    """
+    Статус задачи оптимизации: этап, прогресс (0..1), результат
+    и ID сохраненных конфигураций.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+    return job.to_dict()
+
 @router.post("/{truck_id}/calculate-height")
 async def calculate_effective_height(
     truck_id: str, 
@@ -74,22 +296,8 @@ async def calculate_effective_height(
         raise HTTPException(status_code=404, detail=f"Truck with ID {truck_id} not found")
 
     # Применяем расчет высот с учетом цепей для всех платформ
-    adjusted_results = []
-
-    # Обрабатываем верхнюю и нижнюю палубы
-    for deck_name in ["upper_deck", "lower_deck"]:
-        deck_data = getattr(truck, deck_name, None)
-        if deck_data and deck_data.platforms:
-            for platform in deck_data.platforms:
-                # Преобразуем платформу в словарь
-                platform_dict = platform.dict() if hasattr(platform, "dict") else platform
-
-                # Вызываем сервис расчета высот
-                adjusted = await HeightCalculationService.calculate_adjusted_heights(
-                    platform_data=platform_dict,
-                    vehicle_category=vehicle_category
-                )
-                adjusted_results.append(adjusted)
+    # Таблица эффективных высот кэшируется по (грузовик, updated_at, категория)
+    adjusted_results = adjusted_platforms(truck, vehicle_category)
 
     return {"adjusted_heights": adjusted_results}
 
@@ -111,6 +319,8 @@ async def validate_configuration(
     try:
         result = await optimizer.validate_configuration(truck, configuration)
         return result
+    except VehiclesUnavailableError as e:
+        raise _unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -124,5 +334,45 @@ async def save_loading_configuration(configuration: Dict[str, Any]):
     try:
         config_id = await optimizer.save_configuration(configuration)
         return {"config_id": config_id}
+    except VehiclesUnavailableError as e:
+        raise _unavailable(e)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/configurations/by-hash/{configuration_hash}")
+async def get_configuration_by_hash(configuration_hash: str):
+    """
+    Возвращает сохраненную конфигурацию по ее хэшу (configuration_hash
+    из результата оптимизации), чтобы повторно использовать прежний результат.
+    """
+    configuration = await optimizer.get_configuration_by_hash(configuration_hash)
+    if not configuration:
+        raise HTTPException(status_code=404, detail=f"Configuration with hash {configuration_hash} not found")
+    return configuration
+
+@router.post("/optimize-fleet")
+async def optimize_fleet(request: FleetOptimizationRequest):
+    """
+    Пакетная оптимизация: распределяет пул автомобилей по набору грузовиков
+    и оптимизирует размещение на каждом грузовике (параллельно, в пуле процессов).
+
+    - **truck_ids**: ID грузовиков
+    - **car_ids**: ID автомобилей для распределения
+    - **constraints**: Дополнительные ограничения (опционально)
+    - **time_budget_ms**: Бюджет времени поиска на один грузовик (опционально)
+
+    Грузовик, не уложившийся в таймаут, отмечается в своем результате;
+    504 — только если таймаут у всех грузовиков.
+    """
+    trucks, cars = await _load_fleet(request.truck_ids, request.car_ids)
+
+    try:
+        return await fleet_optimizer.optimize_fleet(
+            trucks, cars, request.constraints, request.time_budget_ms
+        )
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except JobTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
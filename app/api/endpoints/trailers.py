@@ -1,5 +1,5 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Dict, Any, Optional
 
 from app.models.trailer.schemas import TrailerCreateSchema, TrailerResponseSchema
 from app.models.trailer.crud import trailer_crud
@@ -17,11 +17,22 @@ async def create_trailer(trailer_data: TrailerCreateSchema):
     return created
 
 @router.get("/", response_model=List[TrailerResponseSchema])
-async def list_trailers():
+async def list_trailers(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
     """
-    Список всех трейлеров.
+    Страница списка трейлеров. Курсор следующей страницы
+    возвращается в заголовке X-Next-Cursor (нет заголовка — страница последняя).
     """
-    return await trailer_crud.list_trailers()
+    try:
+        trailers, next_cursor = await trailer_crud.list_trailers_page(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return trailers
 
 @router.get("/{trailer_id}", response_model=TrailerResponseSchema)
 async def get_trailer(trailer_id: str):
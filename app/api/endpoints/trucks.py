@@ -1,21 +1,31 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Dict, Any, Optional
 
 from app.models.truck.schemas import TruckCreateSchema, TruckResponseSchema
 # ВАЖНО: VehicleCategory не в schemas, а в enums:
 from app.models.enums import VehicleCategory
 
 from app.models.truck.crud import truck_crud
-from app.services.height_calculator import HeightCalculationService
+from app.services.truck_geometry import adjusted_platforms
 
 router = APIRouter(prefix="/trucks", tags=["trucks"])
 
 @router.get("/", response_model=List[TruckResponseSchema])
-async def list_trucks():
+async def list_trucks(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
     """
-    Список всех грузовиков в базе.
+    Страница списка грузовиков. Курсор следующей страницы
+    возвращается в заголовке X-Next-Cursor (нет заголовка — страница последняя).
     """
-    trucks = await truck_crud.list_trucks()  # метод list_trucks() в truck/crud.py
+    try:
+        trucks, next_cursor = await truck_crud.list_trucks_page(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return trucks
 
 @router.post("/", response_model=TruckResponseSchema)
@@ -76,24 +86,7 @@ async def calculate_effective_height(truck_id: str, vehicle_category: VehicleCat
     if not truck:
         raise HTTPException(status_code=404, detail="Truck not found")
 
-    # Предположим, что truck содержит поля upper_deck, lower_deck и т.д.
-    adjusted_results = []
-
-    # Если у вас DeckSchema и PlatformSchema — truck.upper_deck.platforms и т.д.
-    # (зависит от того, как вы храните/возвращаете)
-
-    for deck_name in ["upper_deck", "lower_deck"]:
-        deck_data = getattr(truck, deck_name, None)
-        if deck_data and deck_data.platforms:
-            for platform in deck_data.platforms:
-                # platform.dict() — зависит от того, что возвращает truckCrud
-                # если truck возвращается как Pydantic-модель, можно просто platform.dict()
-                platform_dict = platform.dict()
-                # вызываем сервис
-                adjusted = await HeightCalculationService.calculate_adjusted_heights(
-                    platform_data=platform_dict,
-                    vehicle_category=vehicle_category
-                )
-                adjusted_results.append(adjusted)
+    # Таблица эффективных высот кэшируется по (грузовик, updated_at, категория)
+    adjusted_results = adjusted_platforms(truck, vehicle_category)
 
     return {"adjusted_heights": adjusted_results}
\ No newline at end of file
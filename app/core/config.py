@@ -19,6 +19,50 @@ class Settings:
         self.AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
         self.AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
 
+        # DynamoDB connection pool
+        self.DYNAMODB_POOL_SIZE = int(os.getenv('DYNAMODB_POOL_SIZE', '10'))
+        # Время жизни resource в пуле (сек), после — пересоздается; 0 — без ограничения
+        self.DYNAMODB_POOL_KEEPALIVE = float(os.getenv('DYNAMODB_POOL_KEEPALIVE', '300'))
+        # HTTP-соединений на один resource
+        self.DYNAMODB_MAX_CONNECTIONS = int(os.getenv('DYNAMODB_MAX_CONNECTIONS', '10'))
+
+        # Кэш разобранных грузовиков (в процессе)
+        self.TRUCK_CACHE_SIZE = int(os.getenv('TRUCK_CACHE_SIZE', '256'))
+        self.TRUCK_CACHE_TTL = float(os.getenv('TRUCK_CACHE_TTL', '300'))
+        # Таблицы эффективных высот (грузовик x категория ТС)
+        self.EFFECTIVE_HEIGHT_CACHE_SIZE = int(os.getenv('EFFECTIVE_HEIGHT_CACHE_SIZE', '1024'))
+
+        # Хранение геометрии грузовика: "map" — вложенные атрибуты DynamoDB,
+        # "blob" — один бинарный атрибут (см. app/db/geometry_blob.py)
+        self.TRUCK_GEOMETRY_STORAGE = os.getenv('TRUCK_GEOMETRY_STORAGE', 'map')
+        # Сжатие блока геометрии: none, zlib или zstd (если установлен zstandard)
+        self.TRUCK_GEOMETRY_COMPRESSION = os.getenv('TRUCK_GEOMETRY_COMPRESSION', 'zlib')
+
+        # Optimizer settings
+        self.OPTIMIZER_ENGINE = os.getenv('OPTIMIZER_ENGINE', 'branch_and_bound')
+        self.OPTIMIZER_TIME_BUDGET_MS = int(os.getenv('OPTIMIZER_TIME_BUDGET_MS', '2000'))
+        # 0 — по числу ядер
+        self.OPTIMIZER_WORKERS = int(os.getenv('OPTIMIZER_WORKERS', '0'))
+        # Задач сверх числа воркеров, ждущих в очереди; больше — ответ 429
+        self.OPTIMIZER_MAX_QUEUE = int(os.getenv('OPTIMIZER_MAX_QUEUE', '16'))
+        # Предельное время задачи в пуле (мс)
+        self.OPTIMIZER_JOB_TIMEOUT_MS = float(os.getenv('OPTIMIZER_JOB_TIMEOUT_MS', '10000'))
+
+        # Очередь фоновых задач оптимизации (/optimizer/jobs)
+        self.JOB_CONCURRENCY = int(os.getenv('JOB_CONCURRENCY', '2'))
+        self.JOB_MAX_PENDING = int(os.getenv('JOB_MAX_PENDING', '100'))
+        # Сколько задач (со статусом и результатом) хранить в памяти
+        self.JOB_HISTORY_SIZE = int(os.getenv('JOB_HISTORY_SIZE', '1000'))
+
+        # Буфер записи loading_history (write-behind)
+        # Записей в одной отправке и пауза между отправками (сек)
+        self.HISTORY_FLUSH_SIZE = int(os.getenv('HISTORY_FLUSH_SIZE', '25'))
+        self.HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', '2.0'))
+        # Больше записей в памяти не держим — старейшие уходят в файл
+        self.HISTORY_BUFFER_SIZE = int(os.getenv('HISTORY_BUFFER_SIZE', '1000'))
+        # Файл для записей, которые не удалось отправить в DynamoDB (JSON Lines)
+        self.HISTORY_SPILL_PATH = os.getenv('HISTORY_SPILL_PATH', 'data/loading_history.spill.jsonl')
+
 @lru_cache()
 def get_settings():
     return Settings()
\ No newline at end of file
@@ -0,0 +1,64 @@
+import os
+import time
+import threading
+
+# Алфавит Crockford base32 (без I, L, O, U) — как в ULID
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, 32)
+        chars.append(_ALPHABET[index])
+    return "".join(reversed(chars))
+
+
+class IdGenerator:
+    """
+    Генератор ULID-подобных идентификаторов: 48 бит времени в миллисекундах
+    + 80 бит случайности, 26 символов base32.
+
+    - Уникальность между процессами обеспечивают 80 случайных бит.
+    - Внутри процесса в пределах одной миллисекунды случайная часть
+      увеличивается на 1, поэтому id монотонны и не совпадают.
+    - Id упорядочены по времени создания (лексикографически).
+    """
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+        # После fork дочерний процесс не должен продолжать последовательность родителя
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def new_id(self) -> str:
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms <= self._last_ms:
+                # Та же миллисекунда (или часы ушли назад) — продолжаем последовательность
+                now_ms = self._last_ms
+                random_part = self._last_random + 1
+                if random_part > _RANDOM_MAX:
+                    now_ms += 1
+                    random_part = int.from_bytes(os.urandom(10), "big")
+            else:
+                random_part = int.from_bytes(os.urandom(10), "big")
+            self._last_ms = now_ms
+            self._last_random = random_part
+
+        return f"{self.prefix}{_encode(now_ms, 10)}{_encode(random_part, 16)}"
+
+
+# Генератор id автомобилей: "car" + 26 символов.
+# Старые id вида car{YYYYmmddHHMMSS} остаются валидными ключами.
+car_ids = IdGenerator(prefix="car")
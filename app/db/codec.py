@@ -0,0 +1,239 @@
+# app/db/codec.py
+
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from pydantic.fields import ModelField, SHAPE_SINGLETON, SHAPE_LIST, SHAPE_DICT, SHAPE_MAPPING
+
+from app.models.truck.schemas import TruckResponseSchema
+from app.models.car.schemas import CarResponseSchema
+from app.models.trailer.schemas import TrailerResponseSchema
+
+Converter = Callable[[Any], Any]
+# (преобразование при записи, при чтении); None — поле не преобразуется
+FieldCodec = Tuple[Optional[Converter], Optional[Converter]]
+
+_NO_CONVERSION: FieldCodec = (None, None)
+
+
+# -------------------- Скалярные преобразования --------------------
+
+def _encode_datetime(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _decode_datetime(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    try:
+        return datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    except ValueError:
+        return value  # Не дата/время, оставляем как есть
+
+
+def _encode_float(value: Any) -> Any:
+    # DynamoDB не принимает float: Decimal из кратчайшего представления числа
+    return Decimal(repr(value)) if isinstance(value, float) else value
+
+
+def _decode_float(value: Any) -> Any:
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _decode_int(value: Any) -> Any:
+    return int(value) if isinstance(value, Decimal) else value
+
+
+def _encode_scalar(value: Any) -> Any:
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _decode_scalar(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+# -------------------- Обход без схемы (итеративный) --------------------
+
+def _walk(value: Any, scalar: Converter) -> Any:
+    """
+    Копия вложенных dict/list с преобразованием скаляров. Обход стеком,
+    без рекурсии; исходный объект не изменяется.
+    """
+    if not isinstance(value, (dict, list, tuple)):
+        return scalar(value)
+    root = {} if isinstance(value, dict) else [None] * len(value)
+    stack = [(value, root)]
+    while stack:
+        source, target = stack.pop()
+        for key, item in (source.items() if isinstance(source, dict) else enumerate(source)):
+            if isinstance(item, dict):
+                child = {}
+            elif isinstance(item, (list, tuple)):
+                child = [None] * len(item)
+            else:
+                target[key] = scalar(item)
+                continue
+            target[key] = child
+            stack.append((item, child))
+    return root
+
+
+def encode_value(value: Any) -> Any:
+    """Значение произвольной структуры в формат DynamoDB"""
+    return _walk(value, _encode_scalar)
+
+
+def decode_value(value: Any) -> Any:
+    """Значение произвольной структуры из формата DynamoDB (Decimal -> int/float)"""
+    return _walk(value, _decode_scalar)
+
+
+_GENERIC: FieldCodec = (encode_value, decode_value)
+
+
+# -------------------- Кодек по схеме --------------------
+
+class ItemCodec:
+    """
+    Кодек записи DynamoDB, скомпилированный по схеме документа.
+
+    Для каждого поля заранее выбрано преобразование: datetime <-> ISO строка,
+    float <-> Decimal, Decimal -> int, вложенные модели — своим кодеком.
+    Поля без преобразования (строки, флаги, перечисления) копируются как есть,
+    строки не проверяются «на дату». Поля вне схемы обходятся без схемы.
+    На верхнем уровне _id -> id при записи и id -> _id при чтении.
+    Входной документ не изменяется.
+    """
+
+    __slots__ = ("name", "fields", "map_id")
+
+    def __init__(self, name: str, fields: Dict[str, FieldCodec], map_id: bool = False):
+        self.name = name
+        self.fields = fields
+        self.map_id = map_id
+
+    @classmethod
+    def for_model(cls, model: Type[BaseModel], map_id: bool = True) -> "ItemCodec":
+        return cls(model.__name__, _compile_model(model), map_id)
+
+    @classmethod
+    def generic(cls, name: str, datetime_fields: Iterable[str] = (), map_id: bool = True) -> "ItemCodec":
+        """Кодек документа без схемы: известны только поля с датами"""
+        fields = {key: (_encode_datetime, _decode_datetime) for key in datetime_fields}
+        return cls(name, fields, map_id)
+
+    @property
+    def converts(self) -> bool:
+        return any(codec != _NO_CONVERSION for codec in self.fields.values())
+
+    def encode(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Документ Python -> запись DynamoDB (новый dict)"""
+        result = self._convert(item, 0)
+        if self.map_id and "_id" in result and "id" not in result:
+            result["id"] = result.pop("_id")
+        return result
+
+    def decode(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Запись DynamoDB -> документ Python (новый dict)"""
+        result = self._convert(item, 1)
+        if self.map_id and "id" in result and "_id" not in result:
+            result["_id"] = result.pop("id")
+        return result
+
+    def _convert(self, item: Dict[str, Any], direction: int) -> Dict[str, Any]:
+        fields = self.fields
+        result = {}
+        for key, value in item.items():
+            codec = fields.get(key, _GENERIC)
+            convert = codec[direction]
+            result[key] = value if convert is None or value is None else convert(value)
+        return result
+
+
+def _compile_model(model: Type[BaseModel]) -> Dict[str, FieldCodec]:
+    fields: Dict[str, FieldCodec] = {}
+    for field in model.__fields__.values():
+        codec = _compile_field(field)
+        fields[field.name] = codec
+        if field.alias != field.name:
+            fields[field.alias] = codec
+    return fields
+
+
+def _compile_field(field: ModelField) -> FieldCodec:
+    scalar = _compile_type(field.type_)
+    if field.shape == SHAPE_SINGLETON or scalar == _NO_CONVERSION:
+        return scalar
+    if field.shape == SHAPE_LIST:
+        return tuple(_over_list(convert) for convert in scalar)
+    if field.shape in (SHAPE_DICT, SHAPE_MAPPING):
+        return tuple(_over_dict(convert) for convert in scalar)
+    return _GENERIC
+
+
+def _compile_type(type_: Any) -> FieldCodec:
+    if isinstance(type_, type):
+        if issubclass(type_, bool) or issubclass(type_, (str, Enum)):
+            return _NO_CONVERSION
+        if issubclass(type_, datetime):
+            return _encode_datetime, _decode_datetime
+        if issubclass(type_, int):
+            return None, _decode_int
+        if issubclass(type_, (float, Decimal)):
+            return _encode_float, _decode_float
+        if issubclass(type_, BaseModel):
+            nested = ItemCodec.for_model(type_, map_id=False)
+            if not nested.converts:
+                return _NO_CONVERSION
+            return _over_model(nested, 0), _over_model(nested, 1)
+    return _GENERIC
+
+
+def _over_model(codec: ItemCodec, direction: int) -> Converter:
+    def convert(value: Any) -> Any:
+        return codec._convert(value, direction) if isinstance(value, dict) else value
+    return convert
+
+
+def _over_list(convert: Optional[Converter]) -> Optional[Converter]:
+    if convert is None:
+        return None
+    return lambda value: [None if v is None else convert(v) for v in value] if isinstance(value, list) else value
+
+
+def _over_dict(convert: Optional[Converter]) -> Optional[Converter]:
+    if convert is None:
+        return None
+    return lambda value: (
+        {k: None if v is None else convert(v) for k, v in value.items()} if isinstance(value, dict) else value
+    )
+
+
+# -------------------- Кодеки документов --------------------
+
+TRUCK_CODEC = ItemCodec.for_model(TruckResponseSchema)
+CAR_CODEC = ItemCodec.for_model(CarResponseSchema)
+TRAILER_CODEC = ItemCodec.for_model(TrailerResponseSchema)
+CONFIGURATION_CODEC = ItemCodec.generic("configuration", ("created_at", "updated_at"))
+HISTORY_CODEC = ItemCodec.generic("loading_history", ("created_at", "updated_at"))
+GENERIC_CODEC = ItemCodec.generic("generic", ("created_at", "updated_at"))
+
+VEHICLE_CODECS = {
+    "truck": TRUCK_CODEC,
+    "car": CAR_CODEC,
+    "trailer": TRAILER_CODEC,
+}
+
+
+def vehicle_codec(item: Dict[str, Any]) -> ItemCodec:
+    """Кодек записи таблицы vehicles по полю type"""
+    return VEHICLE_CODECS.get(item.get("type"), GENERIC_CODEC)
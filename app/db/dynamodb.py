@@ -1,20 +1,72 @@
 import aioboto3
+import asyncio
+import base64
 import boto3
 import uuid
 import json
 import logging
+from botocore.exceptions import ClientError
 from ..core.config import get_settings
-from typing import Optional, List, Dict, Any, Union
+from .pool import DynamoResourcePool
+from .codec import (
+    ItemCodec,
+    CONFIGURATION_CODEC,
+    GENERIC_CODEC,
+    HISTORY_CODEC,
+    TRUCK_CODEC,
+    encode_value,
+    vehicle_codec
+)
+from .geometry_blob import (
+    GEOMETRY_BLOB_FIELD,
+    GEOMETRY_FIELDS,
+    STORAGE_BLOB,
+    pack_geometry,
+    pack_geometry_blob,
+    unpack_geometry
+)
+from typing import Optional, List, Dict, Any, Union, Tuple, AsyncIterator, Sequence
 from datetime import datetime
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Лимит ключей в одном запросе BatchGetItem
+BATCH_GET_CHUNK_SIZE = 100
+# Лимит запросов в одном BatchWriteItem
+BATCH_WRITE_CHUNK_SIZE = 25
+# Повторы для UnprocessedKeys/UnprocessedItems (с экспоненциальной задержкой)
+BATCH_MAX_RETRIES = 5
+BATCH_RETRY_BASE_DELAY = 0.05
+
+# Кодеки таблиц без поля type
+TABLE_CODECS = {
+    'loading_configurations': CONFIGURATION_CODEC,
+    'loading_history': HISTORY_CODEC,
+}
+
+class VehicleAlreadyExistsError(Exception):
+    """Запись с таким id уже есть — условная запись отклонена"""
+
+    def __init__(self, vehicle_id: str):
+        super().__init__(f"Vehicle with ID {vehicle_id} already exists")
+        self.vehicle_id = vehicle_id
+
+
+class VehiclesUnavailableError(Exception):
+    """Пакетное чтение не завершено: ошибка DynamoDB или ключи остались необработанными"""
+
+    def __init__(self, vehicle_ids: List[str]):
+        super().__init__(f"Vehicle store unavailable: {len(vehicle_ids)} vehicles could not be read")
+        self.vehicle_ids = vehicle_ids
+
+
 class DynamoDB:
     """Класс для работы с Amazon DynamoDB, заменяющий MongoDB."""
 
     session = None
     resource = None
+    pool: Optional[DynamoResourcePool] = None
     tables = {
         'vehicles': None,
         'loading_configurations': None,
@@ -57,6 +109,16 @@ class DynamoDB:
                 else:
                     logger.info(f"Таблица {table_name} существует.")
 
+            # Открываем пул долгоживущих resource/Table (переиспользуется всеми запросами)
+            self.pool = DynamoResourcePool(
+                self.session,
+                self.tables.keys(),
+                size=settings.DYNAMODB_POOL_SIZE,
+                keepalive=settings.DYNAMODB_POOL_KEEPALIVE,
+                max_connections=settings.DYNAMODB_MAX_CONNECTIONS
+            )
+            await self.pool.open()
+
             logger.info(f"Успешное подключение к DynamoDB")
             return True
 
@@ -64,6 +126,7 @@ class DynamoDB:
             logger.error(f"Ошибка подключения к базе данных: {str(e)}")
             self.session = None
             self.client = None
+            self.pool = None
             return False
 
     async def _create_table(self, table_name: str):
@@ -151,58 +214,60 @@ class DynamoDB:
 
     async def close_database_connection(self):
         """Закрывает соединение с базой данных"""
-        # Для boto3/aioboto3 не требуется явное закрытие соединения
+        # Закрываем пул resource (и их HTTP-соединения)
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
         logger.info("Соединение с DynamoDB закрыто")
 
+    def pool_stats(self) -> Dict[str, Any]:
+        """Статистика пула соединений DynamoDB"""
+        if self.pool is None:
+            return {"connected": False}
+        return {"connected": True, **self.pool.stats()}
+
     # -------------------- Вспомогательные методы --------------------
 
-    def _serialize_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
-        """Сериализует объект Python в формат DynamoDB"""
-        # Преобразование _id -> id для совместимости с MongoDB
-        if '_id' in item and 'id' not in item:
-            item['id'] = item.pop('_id')
-
-        # Преобразование datetime -> ISO строка
-        for key, value in item.items():
-            if isinstance(value, datetime):
-                item[key] = value.isoformat()
-            elif isinstance(value, dict):
-                item[key] = self._serialize_item(value)
-            elif isinstance(value, list):
-                item[key] = [
-                    self._serialize_item(i) if isinstance(i, dict) else i 
-                    for i in value
-                ]
-
-        return item
-
-    def _deserialize_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
-        """Десериализует объект DynamoDB в формат Python"""
-        # Преобразование id -> _id для совместимости с MongoDB
-        if 'id' in item and '_id' not in item:
-            item['_id'] = item.pop('id')
-
-        # Попытка преобразования ISO строк -> datetime
-        for key, value in item.items():
-            if isinstance(value, str) and 'T' in value and value.endswith('Z'):
-                try:
-                    item[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                except ValueError:
-                    pass  # Не дата/время, оставляем как есть
-            elif isinstance(value, dict):
-                item[key] = self._deserialize_item(value)
-            elif isinstance(value, list):
-                item[key] = [
-                    self._deserialize_item(i) if isinstance(i, dict) else i 
-                    for i in value
-                ]
-
-        return item
+    @staticmethod
+    def _codec(table_name: str, item: Dict[str, Any]) -> ItemCodec:
+        """Кодек записи: по схеме документа (для vehicles — по полю type)"""
+        if table_name == 'vehicles':
+            return vehicle_codec(item)
+        return TABLE_CODECS.get(table_name, GENERIC_CODEC)
+
+    def _serialize_item(
+        self,
+        item: Dict[str, Any],
+        table_name: str = 'vehicles',
+        geometry_storage: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Сериализует объект Python в формат DynamoDB (входной объект не изменяется).
+        Геометрия грузовика при хранении "blob" упаковывается в один бинарный атрибут.
+        """
+        codec = self._codec(table_name, item)
+        if codec is TRUCK_CODEC and (geometry_storage or settings.TRUCK_GEOMETRY_STORAGE) == STORAGE_BLOB:
+            item = pack_geometry(item, settings.TRUCK_GEOMETRY_COMPRESSION)
+        return codec.encode(item)
+
+    def _deserialize_item(self, item: Dict[str, Any], table_name: str = 'vehicles') -> Dict[str, Any]:
+        """
+        Десериализует объект DynamoDB в формат Python (входной объект не изменяется).
+        Геометрия грузовика читается из обоих форматов хранения.
+        """
+        doc = self._codec(table_name, item).decode(item)
+        if GEOMETRY_BLOB_FIELD in doc:
+            doc = unpack_geometry(doc)
+        return doc
 
     # -------------------- Методы для Vehicles (универсальные) --------------------
 
-    async def create_vehicle(self, vehicle_data: Dict[str, Any]) -> str:
-        """Создает новую запись транспортного средства"""
+    async def create_vehicle(self, vehicle_data: Dict[str, Any], overwrite: bool = False) -> str:
+        """
+        Создает новую запись транспортного средства.
+        По умолчанию запись условная: если id уже занят, поднимается
+        VehicleAlreadyExistsError вместо тихой перезаписи.
+        """
         try:
             # Создаем копию данных и добавляем ID если его нет
             data = vehicle_data.copy()
@@ -223,36 +288,237 @@ class DynamoDB:
             # Сериализуем объект для DynamoDB
             dynamo_item = self._serialize_item(data)
 
+            put_kwargs: Dict[str, Any] = {'Item': dynamo_item}
+            if not overwrite:
+                put_kwargs['ConditionExpression'] = 'attribute_not_exists(id)'
+
             # Добавляем запись в таблицу
-            async with self.session.resource('dynamodb') as resource:
-                table = await resource.Table('vehicles')
-                await table.put_item(Item=dynamo_item)
+            async with self.pool.table('vehicles') as table:
+                await table.put_item(**put_kwargs)
 
             return vehicle_id
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                logger.error(f"Vehicle {data['id']} уже существует, запись отклонена")
+                raise VehicleAlreadyExistsError(data['id'])
+            logger.error(f"Ошибка создания vehicle: {str(e)}")
+            raise e
         except Exception as e:
             logger.error(f"Ошибка создания vehicle: {str(e)}")
             raise e
 
     async def list_vehicles(self) -> List[Dict[str, Any]]:
-        """Возвращает список всех транспортных средств"""
+        """Возвращает список всех транспортных средств (полный scan по страницам)"""
         try:
-            async with self.session.resource('dynamodb') as resource:
-                table = await resource.Table('vehicles')
-                response = await table.scan()
-
-                items = response.get('Items', [])
-                # Десериализуем объекты из DynamoDB
-                return [self._deserialize_item(item) for item in items]
+            items = []
+            scan_kwargs: Dict[str, Any] = {}
+            async with self.pool.table('vehicles') as table:
+                while True:
+                    response = await table.scan(**scan_kwargs)
+                    items.extend(response.get('Items', []))
+                    # scan отдает не более 1 МБ за раз — продолжаем с LastEvaluatedKey
+                    last_key = response.get('LastEvaluatedKey')
+                    if not last_key:
+                        break
+                    scan_kwargs['ExclusiveStartKey'] = last_key
+
+            # Десериализуем объекты из DynamoDB
+            return [self._deserialize_item(item) for item in items]
         except Exception as e:
             logger.error(f"Ошибка получения списка vehicles: {str(e)}")
             return []
 
-    async def get_vehicle(self, vehicle_id: str) -> Optional[Dict[str, Any]]:
-        """Получает транспортное средство по ID"""
+    async def list_vehicles_page(
+        self,
+        vehicle_type: str,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        attributes: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Возвращает одну страницу транспортных средств заданного типа
+        через GSI type-index (без полного scan таблицы).
+
+        Args:
+            vehicle_type: Тип ТС ("car", "truck", "trailer")
+            limit: Размер страницы
+            cursor: Курсор продолжения из предыдущей страницы
+            attributes: Читать только эти атрибуты (ProjectionExpression)
+
+        Returns:
+            (список документов, курсор следующей страницы или None)
+
+        Raises:
+            ValueError: курсор поврежден или выдан для другого списка
+        """
+        query_kwargs: Dict[str, Any] = {
+            'IndexName': 'type-index',
+            # type — зарезервированное слово DynamoDB
+            'KeyConditionExpression': '#type = :type',
+            'ExpressionAttributeNames': {'#type': 'type'},
+            'ExpressionAttributeValues': {':type': vehicle_type},
+            'Limit': limit
+        }
+        if cursor:
+            start_key = self._decode_cursor(cursor)
+            # Курсор другого списка (другого типа или таблицы) не принимаем
+            if set(start_key) != {'id', 'type'} or start_key['type'] != vehicle_type:
+                raise ValueError("Invalid pagination cursor")
+            query_kwargs['ExclusiveStartKey'] = start_key
+        projection = self._projection(attributes)
+        if projection:
+            query_kwargs['ProjectionExpression'] = projection['ProjectionExpression']
+            query_kwargs['ExpressionAttributeNames'].update(projection['ExpressionAttributeNames'])
+
+        # Ошибки DynamoDB (throttling, доступ) пробрасываются: пустая страница
+        # без курсора выглядела бы для клиента как конец списка
+        try:
+            async with self.pool.table('vehicles') as table:
+                response = await table.query(**query_kwargs)
+        except ClientError as e:
+            logger.error(f"Ошибка получения страницы vehicles ({vehicle_type}): {str(e)}")
+            if cursor and e.response.get('Error', {}).get('Code') == 'ValidationException':
+                raise ValueError("Invalid pagination cursor")
+            raise
+
+        items = [self._deserialize_item(item) for item in response.get('Items', [])]
+        return items, self._encode_cursor(response.get('LastEvaluatedKey'))
+
+    async def iter_vehicles(
+        self,
+        vehicle_type: Optional[str] = None,
+        page_size: int = 500
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Асинхронно перебирает транспортные средства постранично.
+        С vehicle_type читает GSI type-index, без него — scan всей таблицы.
+        В памяти одновременно держится не больше одной страницы;
+        resource из пула берется только на время чтения страницы.
+        """
+        if vehicle_type:
+            request: Dict[str, Any] = {
+                'IndexName': 'type-index',
+                'KeyConditionExpression': '#type = :type',
+                'ExpressionAttributeNames': {'#type': 'type'},
+                'ExpressionAttributeValues': {':type': vehicle_type},
+                'Limit': page_size
+            }
+        else:
+            request = {'Limit': page_size}
+
+        while True:
+            async with self.pool.table('vehicles') as table:
+                if vehicle_type:
+                    response = await table.query(**request)
+                else:
+                    response = await table.scan(**request)
+
+            for item in response.get('Items', []):
+                yield self._deserialize_item(item)
+
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                return
+            request['ExclusiveStartKey'] = last_key
+
+    @staticmethod
+    def _projection(attributes: Optional[Sequence[str]]) -> Dict[str, Any]:
+        """
+        Параметры ProjectionExpression для чтения части атрибутов.
+        id и type читаются всегда (ключ и выбор кодека); имена подставляются
+        через ExpressionAttributeNames — среди них есть зарезервированные слова.
+        """
+        if not attributes:
+            return {}
+        names = list(dict.fromkeys(['id', 'type', *attributes]))
+        placeholders = {f'#p{i}': name for i, name in enumerate(names)}
+        return {
+            'ProjectionExpression': ', '.join(placeholders),
+            'ExpressionAttributeNames': placeholders
+        }
+
+    @staticmethod
+    def _encode_cursor(last_key: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Упаковывает LastEvaluatedKey в непрозрачный курсор для клиента"""
+        if not last_key:
+            return None
+        raw = json.dumps(last_key, sort_keys=True, default=str).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Dict[str, Any]:
+        """Распаковывает курсор обратно в ExclusiveStartKey"""
         try:
-            async with self.session.resource('dynamodb') as resource:
-                table = await resource.Table('vehicles')
-                response = await table.get_item(Key={'id': vehicle_id})
+            key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid pagination cursor")
+        if not isinstance(key, dict):
+            raise ValueError("Invalid pagination cursor")
+        return key
+
+    async def batch_write_items(
+        self,
+        table_name: str,
+        items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Записывает элементы через BatchWriteItem пачками по 25.
+        UnprocessedItems (обычно при нехватке WCU) повторяются
+        с экспоненциальной задержкой, поэтому скорость записи
+        ограничивается provisioned throughput таблицы.
+
+        Запись безусловная: PutRequest в BatchWriteItem не поддерживает
+        ConditionExpression, поэтому существующий элемент с тем же id
+        перезаписывается без ошибки (в отличие от create_vehicle).
+        Вызывающий код отвечает за уникальность id.
+
+        Returns:
+            Элементы, которые не удалось записать после всех повторов
+        """
+        failed: List[Dict[str, Any]] = []
+        for start in range(0, len(items), BATCH_WRITE_CHUNK_SIZE):
+            chunk = [
+                self._serialize_item(item, table_name)
+                for item in items[start:start + BATCH_WRITE_CHUNK_SIZE]
+            ]
+            try:
+                async with self.pool.resource() as resource:
+                    failed.extend(await self._batch_write_chunk(resource, table_name, chunk))
+            except Exception as e:
+                logger.error(f"Ошибка BatchWriteItem в {table_name}: {str(e)}")
+                failed.extend(chunk)
+        return failed
+
+    async def _batch_write_chunk(
+        self,
+        resource,
+        table_name: str,
+        chunk: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Одна пачка BatchWriteItem с повтором необработанных элементов"""
+        request = {table_name: [{'PutRequest': {'Item': item}} for item in chunk]}
+
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = await resource.batch_write_item(RequestItems=request)
+            request = response.get('UnprocessedItems') or {}
+            if not request:
+                return []
+            if attempt < BATCH_MAX_RETRIES:
+                await asyncio.sleep(BATCH_RETRY_BASE_DELAY * (2 ** attempt))
+
+        unprocessed = [r['PutRequest']['Item'] for r in request.get(table_name, [])]
+        logger.error(f"BatchWriteItem: {len(unprocessed)} элементов не записано после {BATCH_MAX_RETRIES} повторов")
+        return unprocessed
+
+    async def get_vehicle(
+        self,
+        vehicle_id: str,
+        attributes: Optional[Sequence[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Получает транспортное средство по ID (с attributes — только эти атрибуты)"""
+        try:
+            async with self.pool.table('vehicles') as table:
+                response = await table.get_item(Key={'id': vehicle_id}, **self._projection(attributes))
 
                 if 'Item' not in response:
                     return None
@@ -263,12 +529,84 @@ class DynamoDB:
             logger.error(f"Ошибка получения vehicle {vehicle_id}: {str(e)}")
             return None
 
+    async def get_vehicles(
+        self,
+        vehicle_ids: List[str],
+        attributes: Optional[Sequence[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Получает несколько транспортных средств за минимальное число запросов.
+        Ключи разбиваются на пачки по 100 (лимит BatchGetItem), пачки читаются
+        параллельно, UnprocessedKeys повторяются с экспоненциальной задержкой.
+        С attributes читаются только эти атрибуты (ProjectionExpression).
+
+        Returns:
+            Словарь id -> документ (отсутствующие в базе id не попадают в результат)
+
+        Raises:
+            VehiclesUnavailableError: часть ключей не прочитана (ошибка DynamoDB
+                или UnprocessedKeys после повторов) — такие id не «отсутствуют»
+        """
+        unique_ids = list(dict.fromkeys(vehicle_ids))
+        if not unique_ids:
+            return {}
+
+        chunks = [
+            unique_ids[i:i + BATCH_GET_CHUNK_SIZE]
+            for i in range(0, len(unique_ids), BATCH_GET_CHUNK_SIZE)
+        ]
+        try:
+            async with self.pool.resource() as resource:
+                chunk_results = await asyncio.gather(
+                    *(self._batch_get_chunk(resource, 'vehicles', chunk, attributes) for chunk in chunks)
+                )
+        except VehiclesUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка пакетного получения vehicles: {str(e)}")
+            raise VehiclesUnavailableError(unique_ids) from e
+
+        result = {}
+        for items in chunk_results:
+            for item in items:
+                doc = self._deserialize_item(item)
+                result[doc['_id']] = doc
+        return result
+
+    async def _batch_get_chunk(
+        self,
+        resource,
+        table_name: str,
+        ids: List[str],
+        attributes: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Читает одну пачку ключей через BatchGetItem с повтором необработанных ключей"""
+        keys_and_attributes = {'Keys': [{'id': vehicle_id} for vehicle_id in ids]}
+        keys_and_attributes.update(self._projection(attributes))
+        request = {table_name: keys_and_attributes}
+        items: List[Dict[str, Any]] = []
+
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = await resource.batch_get_item(RequestItems=request)
+            items.extend(response.get('Responses', {}).get(table_name, []))
+
+            request = response.get('UnprocessedKeys') or {}
+            if not request:
+                return items
+            if attempt < BATCH_MAX_RETRIES:
+                await asyncio.sleep(BATCH_RETRY_BASE_DELAY * (2 ** attempt))
+
+        unprocessed = [key['id'] for key in request.get(table_name, {}).get('Keys', [])]
+        logger.error(f"BatchGetItem: {len(unprocessed)} ключей не обработано после {BATCH_MAX_RETRIES} повторов")
+        raise VehiclesUnavailableError(unprocessed)
+
     async def update_vehicle(self, vehicle_id: str, update_data: Dict[str, Any]) -> bool:
         """Обновляет данные транспортного средства"""
         try:
             # Добавляем метку времени обновления
             data = update_data.copy()
             data["updated_at"] = datetime.utcnow().isoformat()
+            removed = await self._geometry_update(vehicle_id, data)
 
             # Формируем выражение обновления
             update_expression = "SET "
@@ -279,14 +617,16 @@ class DynamoDB:
                 placeholder = f":val{i}"
                 name_placeholder = f"#name{i}"
                 update_expression += f"{name_placeholder} = {placeholder}, "
-                expression_attribute_values[placeholder] = value
+                expression_attribute_values[placeholder] = encode_value(value)
                 expression_attribute_names[name_placeholder] = key
 
             # Удаляем последнюю запятую и пробел
             update_expression = update_expression[:-2]
+            if removed:
+                update_expression += " REMOVE " + ", ".join(f"#remove{i}" for i in range(len(removed)))
+                expression_attribute_names.update({f"#remove{i}": key for i, key in enumerate(removed)})
 
-            async with self.session.resource('dynamodb') as resource:
-                table = await resource.Table('vehicles')
+            async with self.pool.table('vehicles') as table:
                 response = await table.update_item(
                     Key={'id': vehicle_id},
                     UpdateExpression=update_expression,
@@ -300,11 +640,50 @@ class DynamoDB:
             logger.error(f"Ошибка обновления vehicle {vehicle_id}: {str(e)}")
             return False
 
+    async def _geometry_update(self, vehicle_id: str, data: Dict[str, Any]) -> List[str]:
+        """
+        Готовит обновление геометрии грузовика под текущий формат хранения.
+        В формате "blob" геометрия дочитывается и блок перезаписывается целиком
+        (вложенные атрибуты удаляются), иначе удаляется устаревший блок.
+        Возвращает атрибуты для REMOVE; data изменяется на месте.
+        """
+        changed = [key for key in GEOMETRY_FIELDS if key in data]
+        if not changed:
+            return []
+        if settings.TRUCK_GEOMETRY_STORAGE != STORAGE_BLOB:
+            return [GEOMETRY_BLOB_FIELD]
+
+        current = await self.get_vehicle(vehicle_id) or {}
+        geometry = {key: current.get(key) for key in GEOMETRY_FIELDS if current.get(key) is not None}
+        geometry.update({key: data.pop(key) for key in changed})
+        data[GEOMETRY_BLOB_FIELD] = pack_geometry_blob(geometry, settings.TRUCK_GEOMETRY_COMPRESSION)
+        return list(GEOMETRY_FIELDS)
+
+    async def rewrite_truck_geometry(self, doc: Dict[str, Any], storage: str) -> bool:
+        """
+        Перезаписывает грузовик в заданном формате хранения геометрии
+        ("map" или "blob"). Запись условная: если грузовик изменился после
+        чтения (другой updated_at), она пропускается и возвращается False.
+        """
+        item = self._serialize_item(doc, 'vehicles', geometry_storage=storage)
+        try:
+            async with self.pool.table('vehicles') as table:
+                await table.put_item(
+                    Item=item,
+                    ConditionExpression='updated_at = :seen',
+                    ExpressionAttributeValues={':seen': item.get('updated_at')}
+                )
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                logger.warning(f"Грузовик {item.get('id')} изменился во время миграции, пропущен")
+                return False
+            raise
+
     async def delete_vehicle(self, vehicle_id: str) -> bool:
         """Удаляет транспортное средство"""
         try:
-            async with self.session.resource('dynamodb') as resource:
-                table = await resource.Table('vehicles')
+            async with self.pool.table('vehicles') as table:
                 response = await table.delete_item(Key={'id': vehicle_id})
 
             return response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 200
@@ -315,7 +694,12 @@ class DynamoDB:
     # -------------------- Методы для работы с Loading Configuration --------------------
 
     async def save_configuration(self, config_data: Dict[str, Any]) -> str:
-        """Сохраняет конфигурацию загрузки"""
+        """
+        Сохраняет конфигурацию загрузки. Конфигурация с configuration_hash
+        адресуется им (id = хэш) и записывается условно: если такая уже есть,
+        повторное сохранение ничего не меняет.
+        """
+        condition: Dict[str, Any] = {}
         try:
             # Создаем копию данных и добавляем ID если его нет
             data = config_data.copy()
@@ -326,6 +710,8 @@ class DynamoDB:
                 data['id'] = data.pop('_id')
             else:
                 data['id'] = config_id
+            if data.get('configuration_hash'):
+                config_id = data['id'] = data['configuration_hash']
 
             # Добавляем временные метки
             if 'created_at' not in data:
@@ -334,13 +720,20 @@ class DynamoDB:
                 data['updated_at'] = datetime.utcnow().isoformat()
 
             # Сериализуем объект для DynamoDB
-            dynamo_item = self._serialize_item(data)
+            dynamo_item = self._serialize_item(data, 'loading_configurations')
+            if data.get('configuration_hash'):
+                condition['ConditionExpression'] = 'attribute_not_exists(id)'
 
-            async with self.session.resource('dynamodb') as resource:
-                table = await resource.Table('loading_configurations')
-                await table.put_item(Item=dynamo_item)
+            async with self.pool.table('loading_configurations') as table:
+                await table.put_item(Item=dynamo_item, **condition)
 
             return config_id
+        except ClientError as e:
+            if condition and e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                # Такая раскладка уже сохранена
+                return config_id
+            logger.error(f"Ошибка сохранения configuration: {str(e)}")
+            raise e
         except Exception as e:
             logger.error(f"Ошибка сохранения configuration: {str(e)}")
             raise e
@@ -348,45 +741,49 @@ class DynamoDB:
     async def get_configuration(self, config_id: str) -> Optional[Dict[str, Any]]:
         """Получает сохраненную конфигурацию"""
         try:
-            async with self.session.resource('dynamodb') as resource:
-                table = await resource.Table('loading_configurations')
+            async with self.pool.table('loading_configurations') as table:
                 response = await table.get_item(Key={'id': config_id})
 
                 if 'Item' not in response:
                     return None
 
                 # Десериализуем объект из DynamoDB
-                return self._deserialize_item(response['Item'])
+                return self._deserialize_item(response['Item'], 'loading_configurations')
         except Exception as e:
             logger.error(f"Ошибка получения configuration {config_id}: {str(e)}")
             return None
 
     # -------------------- Методы для работы с Loading History --------------------
 
+    @staticmethod
+    def prepare_loading_experience(experience_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Запись опыта загрузки с id и временной меткой (новый dict)"""
+        # Создаем копию данных и добавляем ID если его нет
+        data = experience_data.copy()
+        exp_id = data.get('_id') or data.get('id') or str(uuid.uuid4())
+
+        # Стандартизируем ID
+        if '_id' in data:
+            data['id'] = data.pop('_id')
+        else:
+            data['id'] = exp_id
+
+        # Добавляем временную метку
+        data['timestamp'] = data.get('timestamp') or datetime.utcnow().isoformat()
+        return data
+
     async def log_loading_experience(self, experience_data: Dict[str, Any]) -> str:
         """Логирует опыт загрузки"""
         try:
-            # Создаем копию данных и добавляем ID если его нет
-            data = experience_data.copy()
-            exp_id = data.get('_id') or data.get('id') or str(uuid.uuid4())
-
-            # Стандартизируем ID
-            if '_id' in data:
-                data['id'] = data.pop('_id')
-            else:
-                data['id'] = exp_id
-
-            # Добавляем временную метку
-            data['timestamp'] = data.get('timestamp') or datetime.utcnow().isoformat()
+            data = self.prepare_loading_experience(experience_data)
 
             # Сериализуем объект для DynamoDB
-            dynamo_item = self._serialize_item(data)
+            dynamo_item = self._serialize_item(data, 'loading_history')
 
-            async with self.session.resource('dynamodb') as resource:
-                table = await resource.Table('loading_history')
+            async with self.pool.table('loading_history') as table:
                 await table.put_item(Item=dynamo_item)
 
-            return exp_id
+            return data['id']
         except Exception as e:
             logger.error(f"Ошибка логирования loading experience: {str(e)}")
             raise e
@@ -394,8 +791,7 @@ class DynamoDB:
     async def get_loading_history(self, truck_id: str, limit: int = 100) -> List[Dict[str, Any]]:
         """Получает историю загрузок для грузовика"""
         try:
-            async with self.session.resource('dynamodb') as resource:
-                table = await resource.Table('loading_history')
+            async with self.pool.table('loading_history') as table:
 
                 response = await table.query(
                     IndexName='truck_id-timestamp-index',
@@ -409,7 +805,7 @@ class DynamoDB:
 
                 items = response.get('Items', [])
                 # Десериализуем объекты из DynamoDB
-                return [self._deserialize_item(item) for item in items]
+                return [self._deserialize_item(item, 'loading_history') for item in items]
         except Exception as e:
             logger.error(f"Ошибка получения loading history для {truck_id}: {str(e)}")
             return []
@@ -0,0 +1,115 @@
+# app/db/geometry_blob.py
+
+import json
+import zlib
+import struct
+import logging
+from typing import Any, Dict, Optional
+
+try:
+    import msgpack
+except ImportError:  # msgpack не обязателен — упаковываем в JSON
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # zstd не обязателен — сжимаем zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Геометрия грузовика, которая хранится одним бинарным атрибутом
+GEOMETRY_FIELDS = ("upper_deck", "lower_deck", "vertical_connections")
+GEOMETRY_BLOB_FIELD = "geometry_blob"
+
+STORAGE_MAP = "map"
+STORAGE_BLOB = "blob"
+
+# Заголовок: сигнатура, версия формата, кодировка, сжатие
+MAGIC = b"TG"
+VERSION = 1
+HEADER = struct.Struct(">2sBBB")
+
+ENCODING_JSON = 1
+ENCODING_MSGPACK = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+COMPRESSIONS = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "zstd": COMPRESSION_ZSTD}
+
+# Меньшие данные не сжимаем: выигрыш съедает служебная часть
+MIN_COMPRESS_SIZE = 256
+
+
+def pack_geometry_blob(geometry: Dict[str, Any], compression: str = "zlib") -> bytes:
+    """
+    Упаковывает геометрию (палубы и вертикальные связи) в версионированный
+    бинарный блок: msgpack, если установлен, иначе компактный JSON;
+    сжатие zstd (если установлен) или zlib — только если оно уменьшает размер.
+    """
+    if msgpack is not None:
+        encoding = ENCODING_MSGPACK
+        payload = msgpack.packb(geometry, use_bin_type=True, default=str)
+    else:
+        encoding = ENCODING_JSON
+        payload = json.dumps(geometry, separators=(",", ":"), default=str).encode("utf-8")
+
+    method = COMPRESSIONS.get(compression, COMPRESSION_ZLIB)
+    if method == COMPRESSION_ZSTD and zstandard is None:
+        method = COMPRESSION_ZLIB
+    if method != COMPRESSION_NONE and len(payload) >= MIN_COMPRESS_SIZE:
+        if method == COMPRESSION_ZSTD:
+            compressed = zstandard.ZstdCompressor().compress(payload)
+        else:
+            compressed = zlib.compress(payload, 6)
+        if len(compressed) < len(payload):
+            return HEADER.pack(MAGIC, VERSION, encoding, method) + compressed
+    return HEADER.pack(MAGIC, VERSION, encoding, COMPRESSION_NONE) + payload
+
+
+def unpack_geometry_blob(blob: Any) -> Dict[str, Any]:
+    """Распаковывает блок pack_geometry_blob (bytes или boto3 Binary)"""
+    data = bytes(getattr(blob, "value", blob))
+    magic, version, encoding, method = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a truck geometry blob")
+    if version > VERSION:
+        raise ValueError(f"Unsupported geometry blob version: {version}")
+    payload = data[HEADER.size:]
+
+    if method == COMPRESSION_ZLIB:
+        payload = zlib.decompress(payload)
+    elif method == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Geometry blob is zstd-compressed but zstandard is not installed")
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+
+    if encoding == ENCODING_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("Geometry blob is msgpack-encoded but msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+def pack_geometry(item: Dict[str, Any], compression: str = "zlib") -> Dict[str, Any]:
+    """Документ грузовика с геометрией в GEOMETRY_BLOB_FIELD (новый dict)"""
+    geometry = {key: item[key] for key in GEOMETRY_FIELDS if key in item}
+    if not geometry:
+        return item
+    packed = {key: value for key, value in item.items() if key not in GEOMETRY_FIELDS}
+    packed[GEOMETRY_BLOB_FIELD] = pack_geometry_blob(geometry, compression)
+    return packed
+
+
+def unpack_geometry(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Документ грузовика с геометрией в обычных полях (новый dict).
+    Документы без блока возвращаются как есть — читаются оба формата.
+    """
+    blob: Optional[Any] = item.get(GEOMETRY_BLOB_FIELD)
+    if blob is None:
+        return item
+    unpacked = {key: value for key, value in item.items() if key != GEOMETRY_BLOB_FIELD}
+    unpacked.update(unpack_geometry_blob(blob))
+    return unpacked
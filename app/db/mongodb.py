@@ -243,6 +243,15 @@ class MongoDB:
     async def save_configuration(self, config_data: Dict[str, Any]) -> str:
         """Сохраняет конфигурацию загрузки"""
         try:
+            config_hash = config_data.get("configuration_hash")
+            if config_hash:
+                # Уникальный индекс configuration_hash: повторное сохранение — без изменений
+                await self.setups.update_one(
+                    {"configuration_hash": config_hash},
+                    {"$setOnInsert": {**config_data, "_id": config_hash}},
+                    upsert=True
+                )
+                return config_hash
             result = await self.setups.insert_one(config_data)
             return str(result.inserted_id)
         except Exception as e:
@@ -0,0 +1,162 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, Iterable
+
+from botocore.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledResource:
+    """Открытый aioboto3 resource вместе с закэшированными Table"""
+
+    __slots__ = ("context", "resource", "tables", "created_at")
+
+    def __init__(self, context, resource, created_at: float):
+        self.context = context
+        self.resource = resource
+        self.tables: Dict[str, Any] = {}
+        self.created_at = created_at
+
+
+class DynamoResourcePool:
+    """
+    Пул долгоживущих aioboto3 resource('dynamodb').
+
+    Resource и Table открываются один раз и переиспользуются между запросами,
+    вместо `async with session.resource(...)` на каждый вызов.
+    Resource старше keepalive секунд пересоздается (recycled).
+    """
+
+    def __init__(
+        self,
+        session,
+        table_names: Iterable[str],
+        size: int = 10,
+        keepalive: float = 300.0,
+        max_connections: int = 10
+    ):
+        self.session = session
+        self.table_names = list(table_names)
+        self.size = max(1, size)
+        self.keepalive = keepalive
+        self.config = Config(tcp_keepalive=True, max_pool_connections=max_connections)
+
+        self._idle: deque = deque()
+        self._semaphore = asyncio.Semaphore(self.size)
+        self._closed = False
+
+        # Статистика
+        self._created = 0
+        self._in_use = 0
+        self._waits = 0
+        self._recycled = 0
+
+    async def open(self) -> None:
+        """Прогревает пул: открывает первый resource и его таблицы"""
+        self._closed = False
+        entry = await self._create()
+        self._idle.append(entry)
+
+    async def close(self) -> None:
+        """Закрывает все свободные resource; занятые закроются при возврате"""
+        self._closed = True
+        while self._idle:
+            await self._dispose(self._idle.pop())
+
+    @asynccontextmanager
+    async def resource(self):
+        """Выдает resource из пула на время блока async with"""
+        entry = await self._acquire()
+        try:
+            yield entry.resource
+        finally:
+            await self._release(entry)
+
+    @asynccontextmanager
+    async def table(self, table_name: str):
+        """Выдает закэшированный Table из пула на время блока async with"""
+        entry = await self._acquire()
+        try:
+            table = entry.tables.get(table_name)
+            if table is None:
+                table = await entry.resource.Table(table_name)
+                entry.tables[table_name] = table
+            yield table
+        finally:
+            await self._release(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика пула"""
+        return {
+            "size": self.size,
+            "open": self._created,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "waits": self._waits,
+            "recycled": self._recycled,
+            "keepalive_seconds": self.keepalive,
+        }
+
+    # -------------------- Внутренние методы --------------------
+
+    async def _acquire(self) -> _PooledResource:
+        if self._closed:
+            raise RuntimeError("DynamoDB resource pool is closed")
+        if self._semaphore.locked():
+            self._waits += 1
+        await self._semaphore.acquire()
+        try:
+            entry = None
+            while self._idle and entry is None:
+                candidate = self._idle.pop()
+                if self._expired(candidate):
+                    await self._recycle(candidate)
+                else:
+                    entry = candidate
+            if entry is None:
+                entry = await self._create()
+        except Exception:
+            self._semaphore.release()
+            raise
+
+        self._in_use += 1
+        return entry
+
+    async def _release(self, entry: _PooledResource) -> None:
+        self._in_use -= 1
+        try:
+            if self._closed:
+                await self._dispose(entry)
+            elif self._expired(entry):
+                await self._recycle(entry)
+            else:
+                self._idle.append(entry)
+        finally:
+            self._semaphore.release()
+
+    def _expired(self, entry: _PooledResource) -> bool:
+        return self.keepalive > 0 and time.monotonic() - entry.created_at > self.keepalive
+
+    async def _create(self) -> _PooledResource:
+        context = self.session.resource('dynamodb', config=self.config)
+        resource = await context.__aenter__()
+        entry = _PooledResource(context, resource, time.monotonic())
+        for table_name in self.table_names:
+            entry.tables[table_name] = await resource.Table(table_name)
+        self._created += 1
+        return entry
+
+    async def _recycle(self, entry: _PooledResource) -> None:
+        self._recycled += 1
+        await self._dispose(entry)
+
+    async def _dispose(self, entry: _PooledResource) -> None:
+        self._created -= 1
+        try:
+            await entry.context.__aexit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Ошибка закрытия resource DynamoDB: {str(e)}")
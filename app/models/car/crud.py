@@ -1,10 +1,15 @@
-from typing import List, Optional
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime
 import uuid
 
+from app.core.ids import car_ids
 from app.db.dynamodb import db  # Заменяем MongoDB на DynamoDB
+from app.models.car.records import CAR_RECORD_FIELDS, CarRecord
 from app.models.car.schemas import CarCreateSchema, CarResponseSchema
 
+# Размер страницы при постраничном чтении списка
+LIST_PAGE_SIZE = 100
+
 class CarCRUD:
     """
     CRUD для Cars с использованием DynamoDB.
@@ -16,8 +21,8 @@ class CarCRUD:
         # Преобразуем входные данные в словарь
         doc = data.dict()
 
-        # Генерируем id для DynamoDB
-        doc["id"] = f"car{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+        # Генерируем id для DynamoDB (уникален и при параллельном создании)
+        doc["id"] = car_ids.new_id()
 
         doc["type"] = "car"
         doc["created_at"] = datetime.utcnow()
@@ -29,51 +34,89 @@ class CarCRUD:
         # Считываем обратно из базы, чтобы вернуть полные данные
         new_doc = await db.get_vehicle(doc["id"])
         if new_doc:
-            # Обеспечиваем совместимость с CarResponseSchema
-            if "id" in new_doc and "_id" not in new_doc:
-                new_doc["_id"] = new_doc["id"]
-
             # При необходимости можно дополнить недостающие поля:
             if "model" not in new_doc:
                 new_doc["model"] = ""
 
-            return CarResponseSchema(**new_doc)
+            return self._to_response(new_doc)
         return None
 
-    async def list_cars(self) -> List[CarResponseSchema]:
-        """Возвращает список всех автомобилей из DynamoDB."""
-        # Получаем все транспортные средства
-        vehicles = await db.list_vehicles()
-
-        # Фильтруем только автомобили (type="car")
-        cars = [v for v in vehicles if v.get("type") == "car"]
-
-        # Если в БД нет ни одной машины, вернём пустой список
-        if not cars:
-            return []
+    def build_document(self, data: CarCreateSchema) -> dict:
+        """
+        Готовит документ автомобиля для записи в DynamoDB
+        (используется пакетным импортом, где нет чтения после записи).
+        """
+        doc = data.dict()
+        doc["id"] = car_ids.new_id()
+        doc["type"] = "car"
+        doc["created_at"] = datetime.utcnow()
+        doc["updated_at"] = datetime.utcnow()
+        return doc
 
-        # Преобразуем каждый doc -> CarResponseSchema
+    async def list_cars(self) -> List[CarResponseSchema]:
+        """Возвращает список всех автомобилей из DynamoDB (постранично через type-index)."""
         results = []
-        for d in cars:
-            # Переносим DynamoDB id -> поле "_id" для совместимости
-            if "id" in d and "_id" not in d:
-                d["_id"] = d["id"]
-
-            results.append(CarResponseSchema(**d))
-
-        return results
+        cursor = None
+        while True:
+            page, cursor = await self.list_cars_page(limit=LIST_PAGE_SIZE, cursor=cursor)
+            results.extend(page)
+            if not cursor:
+                return results
+
+    async def list_cars_page(
+        self,
+        limit: int = LIST_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[CarResponseSchema], Optional[str]]:
+        """
+        Возвращает одну страницу автомобилей и курсор следующей страницы.
+        Читаются только документы type="car" (GSI type-index).
+        """
+        docs, next_cursor = await db.list_vehicles_page("car", limit=limit, cursor=cursor)
+        return [self._to_response(doc) for doc in docs], next_cursor
 
     async def get_car(self, car_id: str) -> Optional[CarResponseSchema]:
         """Получает автомобиль по ID из DynamoDB."""
         doc = await db.get_vehicle(car_id)
         if doc and doc.get("type") == "car":
-            # Обеспечиваем совместимость с CarResponseSchema
-            if "id" in doc and "_id" not in doc:
-                doc["_id"] = doc["id"]
+            return self._to_response(doc)
+        return None
 
-            return CarResponseSchema(**doc)
+    async def get_cars(self, ids: List[str]) -> Dict[str, CarResponseSchema]:
+        """
+        Получает несколько автомобилей пакетным чтением (BatchGetItem).
+        Возвращает словарь car_id -> автомобиль; отсутствующие id не попадают в результат.
+
+        Если DynamoDB недоступна, пробрасывается VehiclesUnavailableError.
+        """
+        docs = await db.get_vehicles(ids)
+
+        results = {}
+        for car_id, doc in docs.items():
+            if doc.get("type") != "car":
+                continue
+            results[car_id] = self._to_response(doc)
+        return results
+
+    async def get_car_record(self, car_id: str) -> Optional[CarRecord]:
+        """Читает только атрибуты, нужные оптимизатору (ProjectionExpression)."""
+        doc = await db.get_vehicle(car_id, attributes=CAR_RECORD_FIELDS)
+        if doc and doc.get("type") == "car":
+            return CarRecord.from_doc(doc)
         return None
 
+    async def get_car_records(self, ids: List[str]) -> Dict[str, CarRecord]:
+        """
+        Пакетное чтение автомобилей для оптимизатора и пакетных операций:
+        только CAR_RECORD_FIELDS, без построения CarResponseSchema.
+        """
+        docs = await db.get_vehicles(ids, attributes=CAR_RECORD_FIELDS)
+        return {
+            car_id: CarRecord.from_doc(doc)
+            for car_id, doc in docs.items()
+            if doc.get("type") == "car"
+        }
+
     async def update_car(self, car_id: str, updates: dict) -> Optional[CarResponseSchema]:
         """Обновляет данные автомобиля в DynamoDB."""
         # Обновляем поле updated_at при каждом изменении
@@ -85,17 +128,21 @@ class CarCRUD:
 
         doc = await db.get_vehicle(car_id)
         if doc:
-            # Обеспечиваем совместимость с CarResponseSchema
-            if "id" in doc and "_id" not in doc:
-                doc["_id"] = doc["id"]
-
-            return CarResponseSchema(**doc)
+            return self._to_response(doc)
         return None
 
     async def delete_car(self, car_id: str) -> bool:
         """Удаляет автомобиль из DynamoDB."""
         return await db.delete_vehicle(car_id)
 
+    @staticmethod
+    def _to_response(doc: dict) -> CarResponseSchema:
+        """Документ DynamoDB -> CarResponseSchema"""
+        # _deserialize_item переносит id -> _id, а CarResponseSchema ждет поле id
+        if "_id" in doc and "id" not in doc:
+            doc["id"] = doc["_id"]
+        return CarResponseSchema(**doc)
+
 
 # Экземпляр CRUD для использования в API
 car_crud = CarCRUD()
\ No newline at end of file
@@ -0,0 +1,82 @@
+from typing import Any, Dict, Optional
+
+from app.models.enums import CarBodyType
+
+# Атрибуты автомобиля, которые нужны оптимизатору (остальные — lot_data,
+# modifications, даты — при расчете размещения не используются)
+CAR_RECORD_FIELDS = (
+    "id",
+    "height_ft",
+    "length_in",
+    "width_in",
+    "wheelbase_in",
+    "body_type",
+    "curb_weight_lb",
+    "hood_height_in",
+)
+
+
+class CarRecord:
+    """
+    Легкая запись автомобиля для оптимизатора и пакетных операций:
+    только CAR_RECORD_FIELDS, без валидации pydantic. Атрибуты совпадают
+    с CarResponseSchema, поэтому сервисы принимают обе модели.
+    """
+
+    __slots__ = CAR_RECORD_FIELDS
+
+    def __init__(
+        self,
+        id: Optional[str] = None,
+        height_ft: Optional[float] = None,
+        length_in: Optional[float] = None,
+        width_in: Optional[float] = None,
+        wheelbase_in: Optional[float] = None,
+        body_type: Optional[CarBodyType] = None,
+        curb_weight_lb: Optional[float] = None,
+        hood_height_in: Optional[float] = None
+    ):
+        self.id = id
+        self.height_ft = height_ft
+        self.length_in = length_in
+        self.width_in = width_in
+        self.wheelbase_in = wheelbase_in
+        self.body_type = body_type
+        self.curb_weight_lb = curb_weight_lb
+        self.hood_height_in = hood_height_in
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> "CarRecord":
+        """Документ DynamoDB (или dict автомобиля) -> запись; лишние поля отбрасываются"""
+        body_type = doc.get("body_type")
+        if body_type is not None and not isinstance(body_type, CarBodyType):
+            try:
+                body_type = CarBodyType(body_type)
+            except ValueError:
+                pass  # Неизвестный тип кузова: оценки по типу берут значения по умолчанию
+        return cls(
+            id=doc.get("id") or doc.get("_id"),
+            height_ft=doc.get("height_ft"),
+            length_in=doc.get("length_in"),
+            width_in=doc.get("width_in"),
+            wheelbase_in=doc.get("wheelbase_in"),
+            body_type=body_type,
+            curb_weight_lb=doc.get("curb_weight_lb"),
+            hood_height_in=doc.get("hood_height_in"),
+        )
+
+    @classmethod
+    def of(cls, car: Any) -> "CarRecord":
+        """Запись из CarResponseSchema (или другой модели с теми же атрибутами)"""
+        if isinstance(car, cls):
+            return car
+        return cls(**{field: getattr(car, field, None) for field in CAR_RECORD_FIELDS})
+
+    def dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in CAR_RECORD_FIELDS}
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, CarRecord) and self.dict() == other.dict()
+
+    def __repr__(self) -> str:
+        return f"CarRecord(id={self.id!r}, height_ft={self.height_ft!r}, length_in={self.length_in!r})"
@@ -49,6 +49,10 @@ class CarResponseSchema(BaseModel):
     width_in: Optional[float] = None
     height_ft: Optional[float] = None
     wheelbase_in: Optional[float] = None
+    # Снаряженная масса (фунты); если не задана — оценка по типу кузова
+    curb_weight_lb: Optional[float] = None
+    # Высота капота (дюймы) — учитывается при выборе направления на наклонных платформах
+    hood_height_in: Optional[float] = None
 
     body_type: Optional[CarBodyType] = None
     status: CarStatus = CarStatus.RUN_AND_DRIVE
@@ -92,6 +96,8 @@ class CarCreateSchema(BaseModel):
     width_in: float
     height_ft: float
     wheelbase_in: float
+    curb_weight_lb: Optional[float] = None
+    hood_height_in: Optional[float] = None
 
     body_type: Optional[CarBodyType] = None
     status: Optional[CarStatus] = CarStatus.RUN_AND_DRIVE
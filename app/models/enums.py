@@ -89,4 +89,18 @@ class VehicleCategory(str, Enum):
     STANDARD = "standard"
     PICKUP = "pickup"
     FULL_SIZE_SUV = "full_size_suv"
-    ELECTRIC = "electric"
\ No newline at end of file
+    ELECTRIC = "electric"
+
+class JobPriority(str, Enum):
+    """Очередь (приоритет) задачи оптимизации"""
+    URGENT = "urgent"
+    NORMAL = "normal"
+    BATCH = "batch"
+
+
+class JobStatus(str, Enum):
+    """Статус задачи оптимизации"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
@@ -1,10 +1,13 @@
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from app.db.dynamodb import db  # Заменяем MongoDB на DynamoDB
 from app.models.trailer.schemas import TrailerCreateSchema, TrailerResponseSchema
 
+# Размер страницы при постраничном чтении списка
+LIST_PAGE_SIZE = 100
+
 class TrailerCRUD:
     """
     Логика для trailers с использованием DynamoDB вместо MongoDB.
@@ -30,22 +33,26 @@ class TrailerCRUD:
         return None
 
     async def list_trailers(self) -> List[TrailerResponseSchema]:
-        """Возвращает список всех трейлеров из DynamoDB."""
-        vehicles = await db.list_vehicles()
-        if not vehicles:
-            return []
-
-        # Фильтруем только трейлеры (type="trailer")
-        trailers = [v for v in vehicles if v.get("type") == "trailer"]
-
+        """Возвращает список всех трейлеров из DynamoDB (постранично через type-index)."""
         results = []
-        for d in trailers:
-            # Обеспечиваем совместимость с TrailerResponseSchema
-            if "id" in d and "_id" not in d:
-                d["_id"] = d["id"]
-
-            results.append(TrailerResponseSchema(**d))
-        return results
+        cursor = None
+        while True:
+            page, cursor = await self.list_trailers_page(limit=LIST_PAGE_SIZE, cursor=cursor)
+            results.extend(page)
+            if not cursor:
+                return results
+
+    async def list_trailers_page(
+        self,
+        limit: int = LIST_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[TrailerResponseSchema], Optional[str]]:
+        """
+        Возвращает одну страницу трейлеров и курсор следующей страницы.
+        Читаются только документы type="trailer" (GSI type-index).
+        """
+        docs, next_cursor = await db.list_vehicles_page("trailer", limit=limit, cursor=cursor)
+        return [TrailerResponseSchema(**doc) for doc in docs], next_cursor
 
     async def get_trailer(self, trailer_id: str) -> Optional[TrailerResponseSchema]:
         """Получает трейлер по ID из DynamoDB."""
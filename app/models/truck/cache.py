@@ -0,0 +1,60 @@
+import logging
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+from app.models.truck.schemas import TruckResponseSchema
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class TruckCache:
+    """
+    Кэш разобранных TruckResponseSchema по id грузовика.
+
+    Запись хранится вместе с updated_at: если вызывающий знает актуальный
+    updated_at и он не совпадает, это промах. Более старая версия не
+    вытесняет более новую. Объекты из кэша общие — их нельзя изменять.
+
+    Подписчики (on_invalidate) получают id грузовика при его изменении или
+    удалении — так сбрасываются производные кэши (геометрия, таблицы высот).
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._cache = LRUCache("trucks", max_size=max_size, ttl=ttl)
+        self._subscribers: List[Callable[[str], None]] = []
+
+    def get(self, truck_id: str, updated_at: Optional[datetime] = None) -> Optional[TruckResponseSchema]:
+        truck = self._cache.get(truck_id)
+        if truck is not None and updated_at is not None and truck.updated_at != updated_at:
+            self._cache.invalidate(truck_id)
+            return None
+        return truck
+
+    def put(self, truck: TruckResponseSchema) -> None:
+        cached = self._cache.peek(truck.id)
+        if cached is not None and cached.updated_at > truck.updated_at:
+            return
+        self._cache.put(truck.id, truck)
+
+    def invalidate(self, truck_id: str) -> None:
+        self._cache.invalidate(truck_id)
+        for callback in self._subscribers:
+            try:
+                callback(truck_id)
+            except Exception as e:
+                logger.error(f"Ошибка сброса производного кэша для грузовика {truck_id}: {str(e)}")
+
+    def on_invalidate(self, callback: Callable[[str], None]) -> None:
+        self._subscribers.append(callback)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+truck_cache = TruckCache(
+    max_size=settings.TRUCK_CACHE_SIZE,
+    ttl=settings.TRUCK_CACHE_TTL
+)
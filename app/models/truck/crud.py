@@ -1,9 +1,18 @@
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Dict, Tuple, Any
 
 from app.db.dynamodb import db  # Изменение импорта с mongodb на dynamodb
-from app.models.truck.schemas import TruckCreateSchema, TruckResponseSchema
+from app.models.truck.schemas import (
+    TruckCreateSchema,
+    TruckResponseSchema,
+    DeckSchema,
+    VerticalConnectionSchema
+)
+from app.models.truck.cache import truck_cache
+
+# Размер страницы при постраничном чтении списка
+LIST_PAGE_SIZE = 100
 
 class TruckCRUD:
     """
@@ -28,39 +37,78 @@ class TruckCRUD:
             # Но наш TruckResponseSchema ожидает поле _id
             if "id" in new_doc and "_id" not in new_doc:
                 new_doc["_id"] = new_doc["id"]
-            return TruckResponseSchema(**new_doc)
+            truck = TruckResponseSchema(**new_doc)
+            truck_cache.put(truck)
+            return truck
         return None
 
     async def list_trucks(self) -> List[TruckResponseSchema]:
-        """Возвращает список всех грузовиков из DynamoDB."""
-        vehicles = await db.list_vehicles()
-        if not vehicles:
-            return []
-
-        # Фильтруем только documents с type="truck"
-        trucks = [v for v in vehicles if v.get("type") == "truck"]
-
+        """Возвращает список всех грузовиков из DynamoDB (постранично через type-index)."""
         results = []
-        for d in trucks:
-            # Убедимся, что _id существует для совместимости со схемой
-            if "id" in d and "_id" not in d:
-                d["_id"] = d["id"]
-            results.append(TruckResponseSchema(**d))
-        return results
+        cursor = None
+        while True:
+            page, cursor = await self.list_trucks_page(limit=LIST_PAGE_SIZE, cursor=cursor)
+            results.extend(page)
+            if not cursor:
+                return results
+
+    async def list_trucks_page(
+        self,
+        limit: int = LIST_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[TruckResponseSchema], Optional[str]]:
+        """
+        Возвращает одну страницу грузовиков и курсор следующей страницы.
+        Читаются только документы type="truck" (GSI type-index).
+        """
+        docs, next_cursor = await db.list_vehicles_page("truck", limit=limit, cursor=cursor)
+        return [TruckResponseSchema(**doc) for doc in docs], next_cursor
 
     async def get_truck(self, truck_id: str) -> Optional[TruckResponseSchema]:
-        """Получает один грузовик по ID из DynamoDB."""
+        """Получает один грузовик по ID (сначала из кэша, затем из DynamoDB)."""
+        cached = truck_cache.get(truck_id)
+        if cached is not None:
+            return cached
+
         doc = await db.get_vehicle(truck_id)
         if doc and doc.get("type") == "truck":
             # Убедимся, что _id существует для совместимости
             if "id" in doc and "_id" not in doc:
                 doc["_id"] = doc["id"]
-            return TruckResponseSchema(**doc)
+            truck = TruckResponseSchema(**doc)
+            truck_cache.put(truck)
+            return truck
         return None
 
+    async def get_trucks(self, truck_ids: List[str]) -> Dict[str, TruckResponseSchema]:
+        """
+        Получает несколько грузовиков пакетным чтением (BatchGetItem).
+        Возвращает словарь truck_id -> грузовик; отсутствующие id не попадают в результат.
+
+        Если DynamoDB недоступна, пробрасывается VehiclesUnavailableError.
+        """
+        results = {}
+        missing = []
+        for truck_id in truck_ids:
+            cached = truck_cache.get(truck_id)
+            if cached is not None:
+                results[truck_id] = cached
+            else:
+                missing.append(truck_id)
+
+        docs = await db.get_vehicles(missing) if missing else {}
+        for truck_id, doc in docs.items():
+            if doc.get("type") == "truck":
+                truck = TruckResponseSchema(**doc)
+                truck_cache.put(truck)
+                results[truck_id] = truck
+        return results
+
     async def update_truck(self, truck_id: str, updates: dict) -> Optional[TruckResponseSchema]:
         """Обновляет данные грузовика в DynamoDB."""
         updates["updated_at"] = datetime.utcnow()
+        # Сбрасываем кэш до записи: даже при ошибке следующий get прочитает базу
+        truck_cache.invalidate(truck_id)
         success = await db.update_vehicle(truck_id, updates)
         if not success:
             return None
@@ -70,11 +118,39 @@ class TruckCRUD:
             # Убедимся, что _id существует для совместимости
             if "id" in doc and "_id" not in doc:
                 doc["_id"] = doc["id"]
-            return TruckResponseSchema(**doc)
+            truck = TruckResponseSchema(**doc)
+            truck_cache.put(truck)
+            return truck
         return None
 
+    async def update_truck_configuration(
+        self,
+        truck_id: str,
+        updates: Dict[str, Any]
+    ) -> Optional[TruckResponseSchema]:
+        """
+        Обновляет данные и конфигурацию грузовика (палубы, платформы,
+        вертикальные связи). Конфигурация палуб проверяется схемами
+        перед записью.
+        """
+        updates = dict(updates)
+        for deck_name in ("upper_deck", "lower_deck"):
+            if updates.get(deck_name) is not None:
+                updates[deck_name] = DeckSchema.parse_obj(updates[deck_name]).dict()
+        if updates.get("vertical_connections") is not None:
+            updates["vertical_connections"] = [
+                VerticalConnectionSchema.parse_obj(connection).dict()
+                for connection in updates["vertical_connections"]
+            ]
+        # Служебные поля через этот метод не меняются
+        for key in ("id", "_id", "type", "created_at"):
+            updates.pop(key, None)
+
+        return await self.update_truck(truck_id, updates)
+
     async def delete_truck(self, truck_id: str) -> bool:
         """Удаляет грузовик из DynamoDB."""
+        truck_cache.invalidate(truck_id)
         return await db.delete_vehicle(truck_id)
 
 
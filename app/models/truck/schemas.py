@@ -107,6 +107,8 @@ class TruckCreateSchema(BaseModel):
     truck_type: TruckType
     coupling_type: CouplingType
     gvwr: float
+    # Снаряженная масса грузовика: GVWR включает ее, груз — только остаток
+    tare_weight_lb: Optional[float] = None
     loading_spots: int = 0
     deck_count: int = 1
 
@@ -123,6 +125,7 @@ class TruckResponseSchema(BaseModel):
     truck_type: str
     coupling_type: str
     gvwr: float
+    tare_weight_lb: Optional[float] = None
     loading_spots: int
     deck_count: int
 
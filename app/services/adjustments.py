@@ -0,0 +1,230 @@
+# app/services/adjustments.py
+
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.services.orientation import FORWARD, OrientedCar, roof_fraction
+from app.services.placement import CRITICAL_HEIGHT_IN
+from app.services.truck_geometry import DECKS, CompiledTruckGeometry
+
+# Итерации бисекции уровня запаса при укорачивании раздвижных платформ
+LEVEL_ITERATIONS = 60
+
+
+def _car_length(car: Any) -> float:
+    return (getattr(car, "length_in", None) or 0.0) if car is not None else 0.0
+
+
+class AdjustmentResult:
+    """Выбранные длины раздвижных платформ и сдвиги mobile краев"""
+
+    __slots__ = ("lengths", "lifts", "issues")
+
+    def __init__(self):
+        self.lengths: Dict[int, float] = {}
+        self.lifts: Dict[int, float] = {}
+        self.issues: List[str] = []
+
+    def apply(self, geometry: CompiledTruckGeometry) -> CompiledTruckGeometry:
+        """Геометрия грузовика с выбранными настройками"""
+        return geometry.with_settings(self.lengths, self.lifts)
+
+    def settings(self, geometry: CompiledTruckGeometry) -> Dict[str, Dict[str, float]]:
+        """
+        Настройки для размещения в формате API:
+        platform_id -> {"length", "edge_a_height", "edge_b_height"}
+        (только регулируемые параметры платформы).
+        """
+        result: Dict[str, Dict[str, float]] = {}
+        for p in sorted(set(self.lengths) | set(self.lifts)):
+            platform = {}
+            if p in self.lengths:
+                platform["length"] = round(self.lengths[p], 3)
+            if p in self.lifts:
+                for key, e in (("edge_a_height", 2 * p), ("edge_b_height", 2 * p + 1)):
+                    if geometry.edge_mobile[e]:
+                        platform[key] = round(geometry.edge_heights[e] + self.lifts[p], 3)
+            result[geometry.platform_ids[p]] = platform
+        return result
+
+
+def solve_adjustments(
+    geometry: CompiledTruckGeometry,
+    cars: Sequence[Any],
+    directions: Sequence[Optional[str]],
+    max_height: float = CRITICAL_HEIGHT_IN,
+    min_clearance: Optional[float] = None
+) -> AdjustmentResult:
+    """
+    Подбирает непрерывные параметры после дискретного размещения:
+    длины раздвижных платформ (slide) и положение mobile краев.
+
+    Длины: платформы раздвигаются до max_length, пока палуба укладывается
+    в total_length; иначе укорачиваются те, у которых больше всего запаса
+    длины над автомобилем (выравнивание уровня запаса бисекцией), но не
+    короче min_length и не короче, чем допускает load_overhang.
+
+    Mobile края: платформа опускается до нижнего положения, а верхняя
+    платформа поднимается ровно настолько, чтобы над автомобилем под ней
+    был min_clearance (не меньше пользовательского), но не выше max_height
+    для автомобиля на ней самой.
+    Запас по зазору линеен по подъему, поэтому каждая платформа решается
+    за O(1).
+
+    Args:
+        geometry: Скомпилированная геометрия грузовика
+        cars: Автомобиль (или None) для каждой платформы
+        directions: Направление автомобиля для каждой платформы
+        max_height: Предельная общая высота, дюймы
+        min_clearance: Пользовательский минимальный зазор (поверх зазоров грузовика)
+
+    Returns:
+        Выбранные настройки и проблемы, которые настройкой не решаются
+    """
+    result = AdjustmentResult()
+    _solve_lengths(geometry, cars, result)
+    _solve_lifts(geometry, cars, directions, max_height, min_clearance, result)
+    return result
+
+
+def apply_adjustments(
+    geometry: CompiledTruckGeometry,
+    settings: Optional[Dict[str, Dict[str, float]]]
+) -> CompiledTruckGeometry:
+    """
+    Геометрия с настройками из размещения (placement["adjustments"]).
+    Значения вне допустимых пределов платформы ограничиваются ими.
+    """
+    if not settings:
+        return geometry
+    lengths: Dict[int, float] = {}
+    lifts: Dict[int, float] = {}
+    for platform_id, platform in settings.items():
+        p = geometry.index.get(platform_id)
+        if p is None:
+            continue
+        length = platform.get("length")
+        if length is not None and not math.isnan(geometry.slide_max_length[p]):
+            lengths[p] = min(max(float(length), geometry.slide_min_length[p]), geometry.slide_max_length[p])
+        for key, e in (("edge_a_height", 2 * p), ("edge_b_height", 2 * p + 1)):
+            height = platform.get(key)
+            if height is not None and geometry.edge_mobile[e]:
+                lift = float(height) - geometry.edge_heights[e]
+                lifts[p] = min(max(lift, geometry.lift_min[p]), geometry.lift_max[p])
+                break
+    return geometry.with_settings(lengths, lifts)
+
+
+# -------------------- Длины раздвижных платформ --------------------
+
+def _solve_lengths(geometry: CompiledTruckGeometry, cars: Sequence[Any], result: AdjustmentResult) -> None:
+    for deck in DECKS:
+        chain = [p for p in range(geometry.platform_count) if geometry.decks[p] == deck]
+        slides = [p for p in chain if not math.isnan(geometry.slide_max_length[p])]
+        if not slides:
+            continue
+
+        lower: Dict[int, float] = {}
+        upper: Dict[int, float] = {}
+        for p in slides:
+            upper[p] = geometry.slide_max_length[p]
+            required = geometry.slide_min_length[p]
+            if cars[p] is not None and not math.isinf(geometry.max_overhang[p]):
+                required = max(required, _car_length(cars[p]) - geometry.max_overhang[p])
+            lower[p] = min(required, upper[p])
+
+        total = geometry.deck_total_lengths.get(deck) or 0.0
+        fixed = sum(geometry.lengths[p] for p in chain if p not in upper)
+        budget = total - fixed if total > 0 else math.inf
+
+        if sum(upper.values()) <= budget:
+            result.lengths.update(upper)
+            continue
+        if sum(lower.values()) > budget:
+            result.issues.append(
+                f"Slide limits exceed {deck} length: {round(sum(lower.values()) + fixed, 3)} inches "
+                f"(total: {total:g} inches)"
+            )
+            result.lengths.update(lower)
+            continue
+
+        # Уровень запаса (длина платформы минус длина автомобиля), до которого
+        # укорачиваются платформы: суммарная длина монотонна по уровню
+        def lengths_at(level: float) -> Dict[int, float]:
+            return {
+                p: min(max(_car_length(cars[p]) + level, lower[p]), upper[p])
+                for p in slides
+            }
+
+        low = min(lower[p] - _car_length(cars[p]) for p in slides)
+        high = max(upper[p] - _car_length(cars[p]) for p in slides)
+        for _ in range(LEVEL_ITERATIONS):
+            middle = (low + high) / 2.0
+            if sum(lengths_at(middle).values()) > budget:
+                high = middle
+            else:
+                low = middle
+        result.lengths.update(lengths_at(low))
+
+
+# -------------------- Mobile края --------------------
+
+def _solve_lifts(
+    geometry: CompiledTruckGeometry,
+    cars: Sequence[Any],
+    directions: Sequence[Optional[str]],
+    max_height: float,
+    min_clearance: Optional[float],
+    result: AdjustmentResult
+) -> None:
+    movable = [
+        p for p in range(geometry.platform_count)
+        if geometry.lift_min[p] < 0.0 or geometry.lift_max[p] > 0.0
+    ]
+    if not movable:
+        return
+
+    # Исходное положение — нижнее: так ниже и общая высота, и автомобили
+    # на нижней палубе (что только увеличивает зазор над ними)
+    for p in movable:
+        result.lifts[p] = geometry.lift_min[p]
+    lowest = result.apply(geometry)
+
+    for u in movable:
+        p = geometry.lower_of[u]
+        if p < 0 or cars[p] is None or not math.isnan(geometry.clearance_gap[p]):
+            continue  # поднимать незачем (или зазор задан clearance_profile)
+        direction = directions[p] or FORWARD
+        _, headroom = OrientedCar(lowest, cars[p]).evaluate(lowest, p, direction)
+        required = geometry.min_clearance[p]
+        if min_clearance is not None:
+            required = max(required, min_clearance)
+        shortfall = required - headroom
+        if shortfall <= 0.0:
+            continue
+
+        # Низ верхней платформы в точке крыши поднимается на lift * доля mobile краев
+        t = _roof_weight(geometry, u, direction)
+        if t <= 0.0:
+            continue
+        needed = shortfall / t
+
+        if cars[u] is not None:
+            top, _ = OrientedCar(lowest, cars[u]).evaluate(lowest, u, directions[u] or FORWARD)
+        else:
+            top = max(lowest.edge_heights[2 * u], lowest.edge_heights[2 * u + 1])
+        limit = min(geometry.lift_max[u] - geometry.lift_min[u], max(0.0, max_height - top))
+
+        if needed > limit:
+            result.issues.append(
+                f"Cannot raise platform {geometry.platform_ids[u]} enough for clearance: "
+                f"{round((needed - limit) * t, 3)} inches short"
+            )
+            needed = limit
+        result.lifts[u] = geometry.lift_min[u] + needed
+
+
+def _roof_weight(geometry: CompiledTruckGeometry, u: int, direction: str) -> float:
+    """Доля подъема верхней платформы u в точке крыши автомобиля под ней"""
+    t = roof_fraction(direction)
+    return geometry.edge_mobile[2 * u] * (1.0 - t) + geometry.edge_mobile[2 * u + 1] * t
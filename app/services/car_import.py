@@ -0,0 +1,243 @@
+# app/services/car_import.py
+
+import csv
+import json
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Callable, Awaitable
+
+from pydantic import ValidationError
+
+from app.db.dynamodb import db, BATCH_WRITE_CHUNK_SIZE
+from app.models.car.schemas import CarCreateSchema
+from app.models.car.crud import car_crud
+
+logger = logging.getLogger(__name__)
+
+# Размер блока чтения загруженного файла
+READ_CHUNK_SIZE = 64 * 1024
+# Сколько проверенных строк может ждать записи (дальше чтение файла приостанавливается)
+IMPORT_QUEUE_SIZE = 500
+# Параллельных писателей BatchWriteItem
+IMPORT_WRITERS = 4
+# Не раздуваем отчет на файлах с массовыми ошибками
+MAX_REPORTED_ERRORS = 1000
+
+# Колонки CSV, которые собираются во вложенный lot_data (CarLotData)
+LOT_DATA_FIELDS = ("lot_number", "buyer_number", "gate_number", "lot_location", "order_number")
+
+SUPPORTED_FORMATS = ("csv", "ndjson")
+
+
+@dataclass
+class CarImportReport:
+    """Итог импорта с ошибками по строкам"""
+    total_rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    # Ошибка, прервавшая чтение файла (уже записанные строки остаются в базе)
+    error: Optional[str] = None
+
+    def add_error(self, row: int, messages: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": messages})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_rows": self.total_rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "error": self.error
+        }
+
+
+async def iter_lines(read: Callable[[int], Awaitable[bytes]]) -> AsyncIterator[str]:
+    """Читает загруженный файл блоками и отдает строки по одной"""
+    buffer = b""
+    first = True
+    while True:
+        chunk = await read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line = raw.decode("utf-8").rstrip("\r")
+            if first:
+                line, first = line.lstrip("\ufeff"), False
+            yield line
+    if buffer:
+        line = buffer.decode("utf-8").rstrip("\r")
+        yield line.lstrip("\ufeff") if first else line
+
+
+def _format_validation_error(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    ]
+
+
+def _csv_row_to_dict(header: List[str], values: List[str]) -> Dict[str, Any]:
+    """Строка CSV -> словарь для CarCreateSchema (пустые ячейки пропускаются)"""
+    row = {
+        name: value.strip()
+        for name, value in zip(header, values)
+        if value is not None and value.strip() != ""
+    }
+    lot_data = {name: row.pop(name) for name in LOT_DATA_FIELDS if name in row}
+    if lot_data:
+        row["lot_data"] = lot_data
+    return row
+
+
+class CarImportService:
+    """
+    Потоковый импорт автомобилей из CSV / NDJSON.
+
+    Строки читаются и проверяются по одной, проверенные документы идут
+    в ограниченную очередь, из которой писатели забирают пачки по 25
+    для BatchWriteItem. Когда запись не успевает (не хватает WCU),
+    очередь заполняется и чтение файла приостанавливается.
+
+    BatchWriteItem не умеет условную запись (attribute_not_exists(id)),
+    поэтому защиты create_vehicle от перезаписи здесь нет. Ее заменяет то,
+    что id каждой строки выдает генератор car_ids (id из файла не
+    используется), так что импорт не пересекается с существующими записями.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = BATCH_WRITE_CHUNK_SIZE,
+        queue_size: int = IMPORT_QUEUE_SIZE,
+        writers: int = IMPORT_WRITERS
+    ):
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.writers = writers
+
+    async def import_upload(
+        self,
+        read: Callable[[int], Awaitable[bytes]],
+        file_format: str
+    ) -> Dict[str, Any]:
+        """
+        Импортирует файл.
+
+        Args:
+            read: Асинхронная функция чтения (например, UploadFile.read)
+            file_format: "csv" или "ndjson"
+
+        Returns:
+            Отчет импорта (CarImportReport.to_dict()). Если файл оказался
+            не в UTF-8, чтение прерывается, а отчет содержит записанное
+            до этого места и error.
+        """
+        if file_format not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported import format: {file_format}")
+
+        report = CarImportReport()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        writers = [asyncio.create_task(self._writer(queue, report)) for _ in range(self.writers)]
+
+        try:
+            async for row_number, row, parse_error in self._iter_rows(iter_lines(read), file_format):
+                report.total_rows += 1
+                if parse_error:
+                    report.add_error(row_number, [parse_error])
+                    continue
+                try:
+                    car = CarCreateSchema.parse_obj(row)
+                except ValidationError as e:
+                    report.add_error(row_number, _format_validation_error(e))
+                    continue
+                # При переполнении очереди ждем писателей (backpressure)
+                await queue.put((row_number, car_crud.build_document(car)))
+        except UnicodeDecodeError as e:
+            # Предыдущие пачки уже записаны — возвращаем их число, а не голую ошибку
+            report.error = f"File is not valid UTF-8 after row {report.total_rows}: {e.reason}"
+        finally:
+            for _ in writers:
+                await queue.put(None)
+            await asyncio.gather(*writers)
+
+        logger.info(
+            f"Импорт автомобилей: строк {report.total_rows}, "
+            f"записано {report.imported}, ошибок {report.failed}"
+        )
+        return report.to_dict()
+
+    async def _iter_rows(
+        self,
+        lines: AsyncIterator[str],
+        file_format: str
+    ) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        """Отдает (номер строки файла, словарь, ошибка разбора)"""
+        header: Optional[List[str]] = None
+        line_number = 0
+        async for line in lines:
+            line_number += 1
+            if not line.strip():
+                continue
+
+            if file_format == "ndjson":
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield line_number, None, f"Invalid JSON: {str(e)}"
+                    continue
+                if not isinstance(row, dict):
+                    yield line_number, None, "Row must be a JSON object"
+                    continue
+                yield line_number, row, None
+                continue
+
+            # CSV: многострочные ячейки в кавычках не поддерживаются
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) > len(header):
+                yield line_number, None, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            yield line_number, _csv_row_to_dict(header, values), None
+
+    async def _writer(self, queue: asyncio.Queue, report: CarImportReport) -> None:
+        """Забирает документы из очереди и пишет пачками"""
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+        while True:
+            entry = await queue.get()
+            if entry is None:
+                if batch:
+                    await self._flush(batch, report)
+                return
+            batch.append(entry)
+            if len(batch) >= self.batch_size:
+                await self._flush(batch, report)
+                batch = []
+
+    async def _flush(self, batch: List[Tuple[int, Dict[str, Any]]], report: CarImportReport) -> None:
+        """
+        Пишет пачку. Ошибка BatchWriteItem не должна останавливать писателя:
+        иначе очередь никто не разбирает и чтение файла зависает на put().
+        """
+        try:
+            failed_items = await db.batch_write_items('vehicles', [doc for _, doc in batch])
+        except Exception as e:
+            logger.error(f"Ошибка записи пачки импорта ({len(batch)} строк): {e}")
+            failed_items = [doc for _, doc in batch]
+        failed_ids = {item.get('id') for item in failed_items}
+
+        for row_number, doc in batch:
+            if doc["id"] in failed_ids:
+                report.add_error(row_number, ["Write to DynamoDB failed"])
+            else:
+                report.imported += 1
+
+
+car_import_service = CarImportService()
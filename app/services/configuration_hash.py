@@ -0,0 +1,71 @@
+# app/services/configuration_hash.py
+
+import json
+import hashlib
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from app.models.car.records import CAR_RECORD_FIELDS
+
+# Версия канонического представления: меняется вместе с его составом,
+# чтобы хэши разных версий не совпадали
+HASH_VERSION = 1
+
+# Точность чисел: конфигурация, прочитанная из DynamoDB (Decimal -> float),
+# дает тот же хэш, что и только что рассчитанная
+FLOAT_DIGITS = 6
+
+CAR_DIMENSION_FIELDS = tuple(field for field in CAR_RECORD_FIELDS if field != "id")
+
+
+def _canonical(value: Any) -> Any:
+    """Значение в канонический вид: числа округлены, перечисления — значения, даты — ISO"""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, Decimal)):
+        number = round(float(value), FLOAT_DIGITS)
+        return int(number) if number.is_integer() else number
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return str(value)
+
+
+def car_dimensions(car: Any) -> Dict[str, Any]:
+    """Габариты автомобиля, от которых зависит размещение (без id)"""
+    return {field: _canonical(getattr(car, field, None)) for field in CAR_DIMENSION_FIELDS}
+
+
+def configuration_hash(
+    truck: Any,
+    cars: List[Any],
+    constraints: Optional[Dict[str, Any]],
+    placement: Dict[str, Any]
+) -> str:
+    """
+    Хэш конфигурации загрузки (sha256, hex): версия геометрии грузовика
+    (id и updated_at — тот же ключ, что у кэша геометрии), отсортированные
+    габариты автомобилей, ограничения и размещение. Одинаковые раскладки
+    дают одинаковый хэш, поэтому он служит id сохраненной конфигурации.
+    """
+    document = {
+        "v": HASH_VERSION,
+        "truck": [truck.id, _canonical(truck.updated_at)],
+        "cars": sorted(
+            (car_dimensions(car) for car in cars),
+            key=lambda dims: json.dumps(dims, sort_keys=True)
+        ),
+        "constraints": _canonical(constraints or {}),
+        "placement": _canonical(placement),
+    }
+    raw = json.dumps(document, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
@@ -0,0 +1,568 @@
+# app/services/constraints.py
+
+import math
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.models.truck.schemas import TruckResponseSchema
+from app.services.height_profile import HeightProfile
+from app.services.orientation import joint_shortfall
+from app.services.placement import CRITICAL_HEIGHT_IN, TARGET_HEIGHT_IN
+from app.services.weights import (
+    AXLE_GROUPS, WeightLoad, car_weight_known, car_weight_lb, known_weight_lb, payload_limit_lb
+)
+
+# Области действия ограничений: что пересчитывать при изменении одной платформы
+SCOPE_TRUCK = "truck"
+SCOPE_PLATFORM = "platform"
+SCOPE_JOINT = "joint"
+
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+
+# Предельное число принятых ходов при исправлении размещения (repair)
+REPAIR_MAX_MOVES = 32
+
+# Пользовательские ограничения, которые понимает валидатор (/optimize, constraints)
+USER_CONSTRAINT_KEYS = (
+    "max_height",
+    "target_height",
+    "min_clearance",
+    "max_weight_lb",
+    "excluded_platforms",
+    "fixed_positions",
+    "max_axle_load_lb",
+)
+
+
+@dataclass
+class Violation:
+    """Нарушение ограничения"""
+    constraint: str
+    message: str
+    severity: str = SEVERITY_ERROR
+    platform_id: Optional[str] = None
+
+
+@dataclass
+class ConstraintOptions:
+    """Пороговые значения и пользовательские ограничения для одной проверки"""
+    max_height: float = CRITICAL_HEIGHT_IN
+    target_height: float = TARGET_HEIGHT_IN
+    min_clearance: Optional[float] = None
+    max_weight_lb: Optional[float] = None
+    excluded_platforms: Set[str] = field(default_factory=set)
+    fixed_positions: Dict[str, str] = field(default_factory=dict)
+    max_axle_load_lb: Dict[str, float] = field(default_factory=dict)
+    warnings: List[str] = field(default_factory=list)
+
+    @classmethod
+    def parse(cls, constraints: Optional[Dict[str, Any]]) -> "ConstraintOptions":
+        """Разбирает словарь constraints из запроса. Неизвестные ключи — предупреждения."""
+        options = cls()
+        for key, value in (constraints or {}).items():
+            if key not in USER_CONSTRAINT_KEYS:
+                options.warnings.append(f"Unknown constraint ignored: {key}")
+                continue
+            if value is None:
+                continue
+            if key == "max_height":
+                # Пользователь может только ужесточить критическую высоту
+                options.max_height = min(float(value), CRITICAL_HEIGHT_IN)
+            elif key == "target_height":
+                options.target_height = float(value)
+            elif key == "min_clearance":
+                options.min_clearance = float(value)
+            elif key == "max_weight_lb":
+                options.max_weight_lb = float(value)
+            elif key == "excluded_platforms":
+                options.excluded_platforms = set(value)
+            elif key == "fixed_positions":
+                options.fixed_positions = dict(value)
+            elif key == "max_axle_load_lb":
+                unknown = set(value) - set(AXLE_GROUPS)
+                if unknown:
+                    options.warnings.append(f"Unknown axle groups ignored: {', '.join(sorted(unknown))}")
+                options.max_axle_load_lb = {
+                    group: float(limit) for group, limit in value.items() if group in AXLE_GROUPS
+                }
+        return options
+
+
+class Constraint:
+    """
+    Базовый класс ограничения.
+
+    scope определяет ключи, по которым ограничение проверяется:
+    SCOPE_TRUCK — один ключ None, SCOPE_PLATFORM — индекс платформы,
+    SCOPE_JOINT — индекс соединения платформ.
+    """
+
+    name = "base"
+    scope = SCOPE_PLATFORM
+
+    def evaluate(self, validator: "ConstraintValidator", key: Optional[int]) -> List[Violation]:
+        raise NotImplementedError
+
+
+class HeightConstraint(Constraint):
+    """Общая высота: критическая (ошибка) и целевая (предупреждение)"""
+
+    name = "height"
+    scope = SCOPE_TRUCK
+
+    def evaluate(self, validator, key):
+        options = validator.options
+        height = round(validator.profile.max_height, 3)
+        violations = []
+        if height > options.max_height:
+            violations.append(Violation(
+                self.name,
+                f"Critical height exceeded: {height} inches (max: {options.max_height:g} inches)"
+            ))
+        if height > options.target_height:
+            violations.append(Violation(
+                self.name,
+                f"Target height exceeded: {height} inches (target: {options.target_height:g} inches)",
+                SEVERITY_WARNING
+            ))
+        return violations
+
+
+class ClearanceConstraint(Constraint):
+    """min_clearance между крышей автомобиля и верхней платформой"""
+
+    name = "clearance"
+
+    def evaluate(self, validator, p):
+        headroom = validator.profile.headroom(p)
+        if headroom is None:
+            return []
+        required = validator.geometry.min_clearance[p]
+        if validator.options.min_clearance is not None:
+            required = max(required, validator.options.min_clearance)
+        if headroom < required:
+            return [Violation(
+                self.name,
+                f"Insufficient clearance on platform {validator.geometry.platform_ids[p]}: "
+                f"{round(headroom, 3)} inches (min: {required:g} inches)",
+                platform_id=validator.geometry.platform_ids[p]
+            )]
+        return []
+
+
+class OverhangConstraint(Constraint):
+    """Вынос автомобиля за платформу не больше суммы load_overhang краев"""
+
+    name = "overhang"
+
+    def evaluate(self, validator, p):
+        car = validator.profile.cars[p]
+        geometry = validator.geometry
+        if car is None or math.isinf(geometry.max_overhang[p]):
+            return []
+        overhang = (getattr(car, "length_in", None) or 0.0) - geometry.lengths[p]
+        if overhang > geometry.max_overhang[p]:
+            return [Violation(
+                self.name,
+                f"Load overhang exceeded on platform {geometry.platform_ids[p]}: "
+                f"{round(overhang, 3)} inches (max: {geometry.max_overhang[p]:g} inches)",
+                platform_id=geometry.platform_ids[p]
+            )]
+        return []
+
+
+class JointConstraint(Constraint):
+    """
+    minimum_loading_distance / max_overlap на соединении платформ
+    с учетом направлений автомобилей (см. orientation.joint_shortfall).
+    """
+
+    name = "joint"
+    scope = SCOPE_JOINT
+
+    def evaluate(self, validator, j):
+        geometry = validator.geometry
+        cars = validator.profile.cars
+        directions = validator.profile.directions
+        a, b = geometry.joint_a[j], geometry.joint_b[j]
+        if cars[a] is None or cars[b] is None:
+            return []
+
+        distance, nested, shortfall = joint_shortfall(geometry, j, cars[a], directions[a], cars[b], directions[b])
+        if shortfall <= 0:
+            return []
+        label = f"{geometry.platform_ids[a]}/{geometry.platform_ids[b]}"
+        if nested:
+            limit = geometry.joint_max_overlap[j]
+            return [Violation(
+                self.name,
+                f"Overlap at joint {label}: {round(-distance, 3)} inches "
+                f"(max: {0.0 if math.isnan(limit) else limit:g} inches)"
+            )]
+        limit = geometry.joint_min_distance[j]
+        return [Violation(
+            self.name,
+            f"Loading distance at joint {label}: {round(distance, 3)} inches "
+            f"(min: {0.0 if math.isnan(limit) else limit:g} inches)"
+        )]
+
+
+class GvwrConstraint(Constraint):
+    """
+    Масса груза не больше допустимой (GVWR минус масса грузовика
+    tare_weight_lb, и пользовательского max_weight_lb), нагрузка на группы
+    осей — не больше max_axle_load_lb.
+
+    Ошибкой считается превышение по известным массам (curb_weight_lb);
+    если лимит превышен только с учетом оценок по типу кузова —
+    предупреждение.
+    """
+
+    name = "gvwr"
+    scope = SCOPE_TRUCK
+
+    def evaluate(self, validator, key):
+        limit = payload_limit_lb(validator.truck)
+        if validator.options.max_weight_lb is not None:
+            limit = min(limit, validator.options.max_weight_lb)
+        load, known = validator.load, validator.known_load
+        violations = []
+        if known.total > limit:
+            violations.append(Violation(
+                self.name,
+                f"Load weight exceeded: {round(known.total, 1)} lb (max: {limit:g} lb)"
+            ))
+        elif load.total > limit:
+            violations.append(Violation(
+                self.name,
+                f"Load weight may exceed limit: {round(load.total, 1)} lb with estimated curb weights "
+                f"(max: {limit:g} lb)",
+                SEVERITY_WARNING
+            ))
+        axle_limits = validator.options.max_axle_load_lb
+        overloaded = known.over_limits(float("inf"), axle_limits)
+        for group, excess in overloaded.items():
+            violations.append(Violation(
+                self.name,
+                f"Axle group {group} overloaded by {round(excess, 1)} lb (max: {axle_limits[group]:g} lb)"
+            ))
+        for group, excess in load.over_limits(float("inf"), axle_limits).items():
+            if group not in overloaded:
+                violations.append(Violation(
+                    self.name,
+                    f"Axle group {group} may be overloaded by {round(excess, 1)} lb with estimated curb weights "
+                    f"(max: {axle_limits[group]:g} lb)",
+                    SEVERITY_WARNING
+                ))
+        if getattr(validator.truck, "tare_weight_lb", None) is None and load.total > 0:
+            violations.append(Violation(
+                self.name,
+                "Truck tare weight unknown: load checked against full GVWR",
+                SEVERITY_WARNING
+            ))
+        if validator.unknown_weights:
+            violations.append(Violation(
+                self.name,
+                f"Curb weight estimated by body type for {validator.unknown_weights} cars",
+                SEVERITY_WARNING
+            ))
+        return violations
+
+
+class ExcludedPlatformConstraint(Constraint):
+    """Пользовательское ограничение: платформа должна остаться пустой"""
+
+    name = "excluded_platforms"
+
+    def evaluate(self, validator, p):
+        platform_id = validator.geometry.platform_ids[p]
+        if validator.profile.cars[p] is not None and platform_id in validator.options.excluded_platforms:
+            return [Violation(self.name, f"Platform {platform_id} must stay empty", platform_id=platform_id)]
+        return []
+
+
+class FixedPositionConstraint(Constraint):
+    """Пользовательское ограничение: автомобиль закреплен за платформой"""
+
+    name = "fixed_positions"
+
+    def evaluate(self, validator, p):
+        car = validator.profile.cars[p]
+        if car is None:
+            return []
+        required = validator.options.fixed_positions.get(getattr(car, "id", None))
+        platform_id = validator.geometry.platform_ids[p]
+        if required is not None and required != platform_id:
+            return [Violation(
+                self.name,
+                f"Car {car.id} must be placed on platform {required}, found on {platform_id}",
+                platform_id=platform_id
+            )]
+        return []
+
+
+class ConstraintMetrics:
+    """Накопленное по процессу время проверки по типам ограничений"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, List[float]] = {}
+
+    def record(self, timings: Dict[str, Dict[str, float]]) -> None:
+        with self._lock:
+            for name, timing in timings.items():
+                entry = self._data.setdefault(name, [0, 0.0])
+                entry[0] += timing["calls"]
+                entry[1] += timing["total_ms"]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    "calls": calls,
+                    "total_ms": round(total_ms, 3),
+                    "avg_us": round(total_ms * 1000 / calls, 3) if calls else None,
+                }
+                for name, (calls, total_ms) in sorted(self._data.items(), key=lambda kv: -kv[1][1])
+            }
+
+
+constraint_metrics = ConstraintMetrics()
+
+
+class ConstraintValidator:
+    """
+    Проверка размещения по набору ограничений с инкрементальным пересчетом.
+
+    Нарушения хранятся по (ограничение, ключ области). При изменении одной
+    платформы (apply/swap) пересчитываются только ограничения этой платформы,
+    соседних по соединениям и ограничения уровня грузовика (высота — O(1)
+    через дерево отрезков HeightProfile, нагрузка — WeightLoad по плечам сил).
+    Для каждого типа ограничения учитывается число проверок и затраченное время.
+    """
+
+    def __init__(
+        self,
+        truck: TruckResponseSchema,
+        placement: Dict[str, Any],
+        cars_by_id: Optional[Dict[str, Any]] = None,
+        constraints: Optional[Dict[str, Any]] = None,
+        profile: Optional[HeightProfile] = None
+    ):
+        self.truck = truck
+        self.options = ConstraintOptions.parse(constraints)
+        self.profile = profile or HeightProfile.from_placement(truck, placement, cars_by_id)
+        self.geometry = self.profile.geometry
+
+        self.constraints: List[Constraint] = [
+            HeightConstraint(),
+            ClearanceConstraint(),
+            OverhangConstraint(),
+            JointConstraint(),
+            GvwrConstraint(),
+        ]
+        if self.options.excluded_platforms:
+            self.constraints.append(ExcludedPlatformConstraint())
+        if self.options.fixed_positions:
+            self.constraints.append(FixedPositionConstraint())
+
+        self.timings: Dict[str, Dict[str, float]] = {
+            constraint.name: {"calls": 0, "total_ms": 0.0} for constraint in self.constraints
+        }
+        self._violations: Dict[Tuple[str, Optional[int]], List[Violation]] = {}
+
+        # Полная нагрузка (с оценками по типу кузова) и только известная —
+        # по второй отклоняем, по первой предупреждаем
+        self.load = WeightLoad(self.geometry)
+        self.known_load = WeightLoad(self.geometry)
+        self.unknown_weights = 0
+        for p, car in enumerate(self.profile.cars):
+            self._add_weight(p, car, 1)
+
+        self._evaluate_all()
+
+    # -------------------- Результат --------------------
+
+    @property
+    def valid(self) -> bool:
+        return not any(
+            violation.severity == SEVERITY_ERROR
+            for violations in self._violations.values()
+            for violation in violations
+        )
+
+    def violations(self) -> List[Violation]:
+        return [violation for violations in self._violations.values() for violation in violations]
+
+    def result(self) -> Dict[str, Any]:
+        """Результат в формате _validate_constraints"""
+        violations = self.violations()
+        issues = [v.message for v in violations if v.severity == SEVERITY_ERROR]
+        warnings = [v.message for v in violations if v.severity == SEVERITY_WARNING]
+        return {
+            "valid": not issues,
+            "issues": issues,
+            "warnings": warnings + self.options.warnings,
+            "max_height": round(self.profile.max_height, 3),
+            "weights": self.load.to_dict(),
+            "timings": self.timing_stats(),
+        }
+
+    def timing_stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {"calls": timing["calls"], "total_ms": round(timing["total_ms"], 3)}
+            for name, timing in self.timings.items()
+        }
+
+    # -------------------- Изменения (дельта) --------------------
+
+    def apply(self, p: int, car: Any, direction: Optional[str] = None) -> bool:
+        """Ставит автомобиль (или None) на платформу p и пересчитывает затронутое"""
+        self._add_weight(p, self.profile.cars[p], -1)
+        self._add_weight(p, car, 1)
+        self.profile.place(p, car, direction)
+        self._reevaluate((p,))
+        return self.valid
+
+    def swap(self, p: int, q: int) -> bool:
+        """Меняет местами автомобили платформ p и q и пересчитывает затронутое"""
+        car_p, car_q = self.profile.cars[p], self.profile.cars[q]
+        self._add_weight(p, car_p, -1)
+        self._add_weight(q, car_q, -1)
+        self._add_weight(p, car_q, 1)
+        self._add_weight(q, car_p, 1)
+        self.profile.swap(p, q)
+        self._reevaluate((p, q))
+        return self.valid
+
+    def flip(self, p: int) -> bool:
+        """Разворачивает автомобиль на платформе p и пересчитывает затронутое"""
+        self.profile.flip(p)
+        self._reevaluate((p,))
+        return self.valid
+
+    # -------------------- Исправление размещения --------------------
+
+    def error_count(self) -> int:
+        return sum(
+            1 for violations in self._violations.values()
+            for violation in violations
+            if violation.severity == SEVERITY_ERROR
+        )
+
+    def repair(self, max_moves: int = REPAIR_MAX_MOVES) -> int:
+        """
+        Локальный поиск по ходам «развернуть» и «поменять местами» (в том числе
+        с пустой платформой). Каждый ход оценивается дельтой: flip/swap
+        пересчитывают только затронутые ограничения; ход, не уменьшивший
+        число ошибок, откатывается тем же ходом. Принимается первый
+        улучшающий ход, пока размещение не станет допустимым.
+
+        Returns:
+            Число принятых ходов
+        """
+        cars = self.profile.cars
+        count = self.geometry.platform_count
+        errors = self.error_count()
+        accepted = 0
+        while errors and accepted < max_moves:
+            improved = False
+            for p in range(count):
+                if cars[p] is None:
+                    continue
+                self.flip(p)
+                if self.error_count() < errors:
+                    improved = True
+                    break
+                self.flip(p)
+                for q in range(count):
+                    if q == p or (cars[q] is not None and q < p):
+                        continue  # пара с двумя автомобилями уже проверена
+                    self.swap(p, q)
+                    if self.error_count() < errors:
+                        improved = True
+                        break
+                    self.swap(p, q)
+                if improved:
+                    break
+            if not improved:
+                break
+            accepted += 1
+            errors = self.error_count()
+        return accepted
+
+    def placement(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Текущее размещение в формате API (автомобили, направления, высоты)"""
+        placement: Dict[str, List[Dict[str, Any]]] = {}
+        for p, car in enumerate(self.profile.cars):
+            if car is None:
+                continue
+            placement.setdefault(self.geometry.decks[p], []).append({
+                "car_id": car.id,
+                "platform_id": self.geometry.platform_ids[p],
+                "direction": self.profile.directions[p],
+                "top_height": round(self.profile.top(p), 3),
+            })
+        return placement
+
+    # -------------------- Внутренние методы --------------------
+
+    def _add_weight(self, p: int, car: Any, sign: int) -> None:
+        if car is None:
+            return
+        if not car_weight_known(car):
+            self.unknown_weights += sign
+        self.load.add(p, car_weight_lb(car), sign)
+        self.known_load.add(p, known_weight_lb(car), sign)
+
+    def _keys(self, constraint: Constraint) -> Iterable[Optional[int]]:
+        if constraint.scope == SCOPE_TRUCK:
+            return (None,)
+        if constraint.scope == SCOPE_JOINT:
+            return range(len(self.geometry.joint_a))
+        return range(self.geometry.platform_count)
+
+    def _evaluate_all(self) -> None:
+        for constraint in self.constraints:
+            for key in self._keys(constraint):
+                self._run(constraint, key)
+        constraint_metrics.record(self.timings)
+
+    def _reevaluate(self, platforms: Iterable[int]) -> None:
+        platforms = set(platforms)
+        joints = {j for p in platforms for j in self.geometry.adjacent_joints[p]}
+        before = {name: timing["total_ms"] for name, timing in self.timings.items()}
+        calls = {name: timing["calls"] for name, timing in self.timings.items()}
+
+        for constraint in self.constraints:
+            if constraint.scope == SCOPE_TRUCK:
+                keys = (None,)
+            elif constraint.scope == SCOPE_JOINT:
+                keys = joints
+            else:
+                keys = platforms
+            for key in keys:
+                self._run(constraint, key)
+
+        constraint_metrics.record({
+            name: {
+                "calls": timing["calls"] - calls[name],
+                "total_ms": timing["total_ms"] - before[name],
+            }
+            for name, timing in self.timings.items()
+        })
+
+    def _run(self, constraint: Constraint, key: Optional[int]) -> None:
+        started = time.perf_counter()
+        violations = constraint.evaluate(self, key)
+        timing = self.timings[constraint.name]
+        timing["calls"] += 1
+        timing["total_ms"] += (time.perf_counter() - started) * 1000
+
+        if violations:
+            self._violations[(constraint.name, key)] = violations
+        else:
+            self._violations.pop((constraint.name, key), None)
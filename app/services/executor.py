@@ -0,0 +1,383 @@
+# app/services/executor.py
+
+import os
+import asyncio
+import logging
+import itertools
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.models.truck.schemas import TruckResponseSchema
+from app.models.car.records import CarRecord
+from app.models.car.schemas import CarResponseSchema
+from app.services.constraints import ConstraintOptions
+from app.services.placement import PlacementResult, get_placement_engine
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturatedError(Exception):
+    """Очередь задач оптимизатора заполнена — новая задача не принимается"""
+
+    def __init__(self, depth: int):
+        super().__init__(f"Optimizer queue is full: {depth} jobs in flight")
+        self.depth = depth
+
+
+class JobTimeoutError(Exception):
+    """Задача оптимизатора не уложилась в отведенное время"""
+
+    def __init__(self, timeout_ms: float):
+        super().__init__(f"Optimization job timed out after {timeout_ms:g} ms")
+        self.timeout_ms = timeout_ms
+
+
+# -------------------- Дочерний процесс --------------------
+
+# Флаги отмены задач в общей памяти и очередь промежуточных результатов
+# (наследуются воркерами через initializer)
+_cancel_flags = None
+_improvements = None
+
+
+def _init_worker(flags, improvements=None) -> None:
+    global _cancel_flags, _improvements
+    _cancel_flags = flags
+    _improvements = improvements
+
+
+class _CancelFlag:
+    """Флаг отмены задачи с интерфейсом threading.Event.is_set() для движка размещения"""
+
+    __slots__ = ("slot",)
+
+    def __init__(self, slot: int):
+        self.slot = slot
+
+    def is_set(self) -> bool:
+        return bool(_cancel_flags[self.slot])
+
+
+def solve_truck_layout(
+    truck_data: Dict[str, Any],
+    cars_data: List[Dict[str, Any]],
+    engine_name: str,
+    time_budget_ms: Optional[float],
+    axle_limits: Optional[Dict[str, float]] = None,
+    cancel_slot: Optional[int] = None,
+    options: Optional[ConstraintOptions] = None,
+    stream_id: Optional[int] = None
+) -> PlacementResult:
+    """
+    Поиск размещения для одного грузовика. Выполняется в дочернем процессе,
+    поэтому принимает и возвращает только сериализуемые (pickle) данные.
+    С stream_id каждое улучшенное размещение отправляется в общую очередь
+    промежуточных результатов с этим id, а после поиска — маркер конца
+    (stream_id, None).
+    """
+    truck = TruckResponseSchema(**truck_data)
+    cars = [CarRecord.from_doc(car) for car in cars_data]
+    engine = get_placement_engine(engine_name)
+    cancel_event = _CancelFlag(cancel_slot) if cancel_slot is not None and _cancel_flags is not None else None
+    on_improvement = None
+    if stream_id is not None and _improvements is not None:
+        def on_improvement(result: PlacementResult) -> None:
+            _improvements.put((stream_id, result))
+    try:
+        return engine.search(
+            truck, cars, time_budget_ms=time_budget_ms, axle_limits=axle_limits, cancel_event=cancel_event,
+            on_improvement=on_improvement, options=options
+        )
+    finally:
+        if on_improvement is not None:
+            _improvements.put((stream_id, None))
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+# -------------------- Пул --------------------
+
+class OptimizationExecutor:
+    """
+    Пул процессов для поиска размещений: event loop только отправляет
+    задачу и ждет результат.
+
+    Число задач в работе (выполняются + ждут воркера) ограничено
+    workers + max_queue; сверх этого задача сразу отклоняется
+    (ExecutorSaturatedError, API отвечает 429) либо, если задан
+    queue_timeout_ms, ждет освобождения слота в порядке поступления
+    (так пакетная оптимизация проходит парк волнами). Каждой задаче выделяется
+    флаг отмены в общей памяти: по таймауту или отмене ожидающей корутины
+    флаг поднимается, и движок в воркере останавливает поиск.
+
+    Промежуточные результаты (потоковая оптимизация) воркеры отправляют
+    в общую multiprocessing.Queue; поток-разборщик в основном процессе
+    передает их подписчику задачи по ее stream_id.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        job_timeout_ms: Optional[float] = None
+    ):
+        self.workers = workers or settings.OPTIMIZER_WORKERS or os.cpu_count() or 1
+        self.max_queue = settings.OPTIMIZER_MAX_QUEUE if max_queue is None else max_queue
+        self.job_timeout_ms = job_timeout_ms or settings.OPTIMIZER_JOB_TIMEOUT_MS
+        self.capacity = self.workers + self.max_queue
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._flags = None
+        self._improvements = None
+        self._pump: Optional[threading.Thread] = None
+        # stream_id -> (обработчик промежуточных результатов, future конца потока)
+        self._listeners: Dict[int, Tuple[Callable[[PlacementResult], None], asyncio.Future]] = {}
+        self._stream_ids = itertools.count()
+        self._free_slots = list(range(self.capacity))
+        # Задачи, ждущие свободного слота (FIFO)
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._generation = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.cancelled = 0
+
+    @property
+    def depth(self) -> int:
+        """Задачи в работе: выполняются или ждут свободного воркера"""
+        return self.capacity - len(self._free_slots)
+
+    @property
+    def saturated(self) -> bool:
+        """Свободных слотов нет"""
+        return not self._free_slots
+
+    async def _acquire_slot(self, queue_timeout_ms: Optional[float]) -> int:
+        """Свободный слот; без queue_timeout_ms — отказ, если слотов нет"""
+        if self._free_slots:
+            return self._free_slots.pop()
+        if queue_timeout_ms is None:
+            self.rejected += 1
+            raise ExecutorSaturatedError(self.depth)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, queue_timeout_ms / 1000.0)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ExecutorSaturatedError(self.depth)
+        except asyncio.CancelledError:
+            # Слот мог быть передан в момент отмены — возвращаем его
+            if waiter.done() and not waiter.cancelled():
+                self._put_slot(waiter.result())
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _put_slot(self, slot: int) -> None:
+        # Освободившийся слот сразу передается первой ждущей задаче
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(slot)
+                return
+        self._free_slots.append(slot)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._flags = multiprocessing.Array("b", self.capacity, lock=False)
+            self._improvements = multiprocessing.Queue()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(self._flags, self._improvements)
+            )
+            self._pump = threading.Thread(
+                target=self._dispatch_improvements, args=(self._improvements,),
+                name="optimizer-improvements", daemon=True
+            )
+            self._pump.start()
+            logger.info(f"Пул процессов оптимизатора запущен: {self.workers} воркеров, очередь {self.max_queue}")
+        return self._pool
+
+    async def search(
+        self,
+        truck: TruckResponseSchema,
+        cars: List[CarResponseSchema],
+        engine_name: str,
+        time_budget_ms: Optional[float] = None,
+        axle_limits: Optional[Dict[str, float]] = None,
+        timeout_ms: Optional[float] = None,
+        queue_timeout_ms: Optional[float] = None,
+        options: Optional[ConstraintOptions] = None,
+        on_improvement: Optional[Callable[[PlacementResult], None]] = None
+    ) -> PlacementResult:
+        """
+        Выполняет поиск размещения в пуле процессов.
+
+        Args:
+            options: Пользовательские ограничения, применяемые внутри поиска
+            on_improvement: Обработчик улучшенных размещений; вызывается
+                из потока-разборщика, а не из event loop
+            timeout_ms: Предельное время выполнения задачи в пуле
+            queue_timeout_ms: Сколько ждать свободного слота (None — не ждать)
+
+        Raises:
+            ExecutorSaturatedError: задач в работе уже workers + max_queue
+                (и слот не освободился за queue_timeout_ms)
+            JobTimeoutError: результат не получен за timeout_ms
+        """
+        slot = await self._acquire_slot(queue_timeout_ms)
+        try:
+            pool = self._get_pool()
+        except Exception:
+            self._put_slot(slot)
+            raise
+        self._flags[slot] = 0
+        loop = asyncio.get_running_loop()
+        stream_id = drained = None
+        if on_improvement is not None:
+            stream_id = next(self._stream_ids)
+            drained = loop.create_future()
+            self._listeners[stream_id] = (on_improvement, drained)
+        try:
+            future: Future = pool.submit(
+                solve_truck_layout,
+                truck.dict(by_alias=True),
+                [CarRecord.of(car).dict() for car in cars],
+                engine_name,
+                time_budget_ms,
+                axle_limits,
+                slot,
+                options,
+                stream_id
+            )
+        except Exception:
+            self._listeners.pop(stream_id, None)
+            self._put_slot(slot)
+            raise
+        self.submitted += 1
+        # Слот освобождается, только когда воркер действительно закончил
+        generation = self._generation
+
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self._release, slot, generation)
+            except RuntimeError:
+                pass  # event loop уже закрыт (остановка приложения)
+
+        future.add_done_callback(release)
+
+        async def result() -> PlacementResult:
+            placement = await asyncio.wrap_future(future)
+            # Все промежуточные результаты доходят до подписчика раньше итога
+            if drained is not None:
+                await drained
+            return placement
+
+        timeout_ms = timeout_ms or self.job_timeout_ms
+        try:
+            return await asyncio.wait_for(result(), timeout_ms / 1000.0 if timeout_ms else None)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            self._cancel(slot, future)
+            raise JobTimeoutError(timeout_ms)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            self._cancel(slot, future)
+            raise
+        finally:
+            # Запоздавшие промежуточные результаты задачи отбрасываются
+            self._listeners.pop(stream_id, None)
+
+    def _dispatch_improvements(self, improvements) -> None:
+        """Поток-разборщик: промежуточные результаты воркеров -> подписчики задач"""
+        while True:
+            try:
+                message = improvements.get()
+            except (EOFError, OSError):
+                return
+            if message is None:
+                return
+            stream_id, result = message
+            listener = self._listeners.get(stream_id)
+            if listener is None:
+                continue
+            on_improvement, drained = listener
+            if result is None:
+                try:
+                    drained.get_loop().call_soon_threadsafe(_resolve, drained)
+                except RuntimeError:
+                    pass  # event loop уже закрыт
+                continue
+            try:
+                on_improvement(result)
+            except Exception as e:
+                logger.error(f"Ошибка обработки промежуточного результата: {e}")
+
+    def _release(self, slot: int, generation: int) -> None:
+        # Задачи остановленного пула слоты нового пула не освобождают
+        if generation == self._generation:
+            self._put_slot(slot)
+
+    def _cancel(self, slot: int, future: Future) -> None:
+        # Еще не начатая задача снимается с очереди, выполняемая — останавливается флагом
+        future.cancel()
+        if self._flags is not None:
+            self._flags[slot] = 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "depth": self.depth,
+            "waiting": len(self._waiters),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            for slot in range(self.capacity):
+                self._flags[slot] = 1
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._improvements.put(None)
+            self._improvements = None
+            self._pump = None
+            self._listeners.clear()
+            self._free_slots = list(range(self.capacity))
+            self._generation += 1
+        # Ждущим задачам слотов уже не будет
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(ExecutorSaturatedError(self.depth))
+        logger.info("Пул процессов оптимизатора остановлен")
+
+
+_executor: Optional[OptimizationExecutor] = None
+
+
+def get_optimization_executor() -> OptimizationExecutor:
+    """Общий пул процессов оптимизатора (создается лениво)"""
+    global _executor
+    if _executor is None:
+        _executor = OptimizationExecutor()
+    return _executor
+
+
+def shutdown_optimization_executor() -> None:
+    """Останавливает пул процессов (вызывается из lifespan)"""
+    if _executor is not None:
+        _executor.shutdown()
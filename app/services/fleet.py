@@ -0,0 +1,209 @@
+# app/services/fleet.py
+
+import math
+import time
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.core.config import get_settings
+from app.models.truck.schemas import TruckResponseSchema
+from app.models.car.schemas import CarResponseSchema
+from app.services.constraints import ConstraintOptions
+from app.services.executor import ExecutorSaturatedError, JobTimeoutError, get_optimization_executor
+from app.services.placement import compute_tops
+from app.services.truck_geometry import compile_truck_geometry, precompute_effective_heights
+from app.services.weights import known_weight_lb, payload_limit_lb
+from app.services.orientation import car_height_in
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class _TruckPlan:
+    """Состояние грузовика при распределении автомобилей по парку"""
+
+    def __init__(
+        self,
+        truck: TruckResponseSchema,
+        cars: List[CarResponseSchema],
+        options: Optional[ConstraintOptions] = None
+    ):
+        self.truck = truck
+        self.geometry = compile_truck_geometry(truck)
+        self.capacity = min(truck.loading_spots, self.geometry.platform_count)
+        tops, _, _ = compute_tops(self.geometry, cars, options=options)
+        # Для каждого автомобиля пула — индексы допустимых платформ
+        self.feasible = [[j for j, t in enumerate(row) if t is not None] for row in tops]
+        self.slot_owner: Dict[int, int] = {}
+        # Как и поиск, ограничиваем только известные массы автомобилей
+        self.weights = [known_weight_lb(car) for car in cars]
+        self.max_load_lb = payload_limit_lb(truck)
+        if options is not None and options.max_weight_lb is not None:
+            self.max_load_lb = min(self.max_load_lb, options.max_weight_lb)
+        self.load_lb = 0.0
+
+    @property
+    def free(self) -> int:
+        return self.capacity - len(self.slot_owner)
+
+    def try_add(self, car_index: int) -> bool:
+        """
+        Добавляет автомобиль, если для всех назначенных автомобилей остается
+        паросочетание «автомобиль — платформа» (алгоритм Куна)
+        и известная масса груза не превышает допустимую (GVWR минус масса
+        грузовика и max_weight_lb из ограничений).
+        """
+        if self.free <= 0 or not self.feasible[car_index]:
+            return False
+        if self.load_lb + self.weights[car_index] > self.max_load_lb:
+            return False
+        if not self._augment(car_index, set()):
+            return False
+        self.load_lb += self.weights[car_index]
+        return True
+
+    def _augment(self, car_index: int, visited: set) -> bool:
+        for slot_index in self.feasible[car_index]:
+            if slot_index in visited:
+                continue
+            visited.add(slot_index)
+            owner = self.slot_owner.get(slot_index)
+            if owner is None or self._augment(owner, visited):
+                self.slot_owner[slot_index] = car_index
+                return True
+        return False
+
+    def car_indexes(self) -> List[int]:
+        return sorted(self.slot_owner.values())
+
+
+def assign_cars_to_trucks(
+    trucks: List[TruckResponseSchema],
+    cars: List[CarResponseSchema],
+    options: Optional[ConstraintOptions] = None
+) -> Tuple[Dict[str, List[CarResponseSchema]], List[str]]:
+    """
+    Распределяет пул автомобилей по грузовикам.
+    options — пользовательские ограничения, они применяются к каждому грузовику.
+
+    Самые ограниченные (подходят к меньшему числу грузовиков) и самые высокие
+    автомобили распределяются первыми; грузовик выбирается по принципу
+    best-fit — наименьшее число свободных мест, чтобы заполнять рейсы целиком.
+
+    Returns:
+        (truck_id -> список автомобилей, список нераспределенных car_id)
+    """
+    # Эффективные высоты всех грузовиков по всем категориям — одним вызовом
+    precompute_effective_heights([compile_truck_geometry(truck) for truck in trucks])
+    plans = [_TruckPlan(truck, cars, options) for truck in trucks]
+
+    def fitting_trucks(car_index):
+        return sum(1 for plan in plans if plan.feasible[car_index])
+
+    order = sorted(
+        range(len(cars)),
+        key=lambda i: (fitting_trucks(i), -car_height_in(cars[i]))
+    )
+
+    unassigned = []
+    for car_index in order:
+        candidates = sorted(
+            (plan for plan in plans if plan.free > 0 and plan.feasible[car_index]),
+            key=lambda plan: plan.free
+        )
+        if not any(plan.try_add(car_index) for plan in candidates):
+            unassigned.append(cars[car_index].id)
+
+    assignment = {
+        plan.truck.id: [cars[i] for i in plan.car_indexes()]
+        for plan in plans
+    }
+    return assignment, unassigned
+
+
+def fleet_queue_timeout_ms(executor, truck_count: int, time_budget_ms: float) -> float:
+    """
+    Сколько грузовику парка ждать слота в пуле: время волн поиска до него
+    (по time_budget_ms на волну из workers задач) плюс таймаут задачи.
+    """
+    waves = math.ceil(truck_count / max(executor.workers, 1))
+    return waves * time_budget_ms + executor.job_timeout_ms
+
+
+class FleetOptimizer:
+    """
+    Пакетная оптимизация парка: распределяет автомобили по грузовикам
+    и ищет размещение для каждого грузовика параллельно в пуле процессов
+    (см. executor.py).
+    """
+
+    def __init__(self, optimizer, executor=None):
+        self.optimizer = optimizer
+        self.executor = executor
+
+    async def optimize_fleet(
+        self,
+        trucks: List[TruckResponseSchema],
+        cars: List[CarResponseSchema],
+        constraints: Optional[Dict[str, Any]] = None,
+        time_budget_ms: Optional[float] = None
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        logger.info(f"Пакетная оптимизация: {len(trucks)} грузовиков, {len(cars)} автомобилей")
+
+        options = ConstraintOptions.parse(constraints)
+        # Распределение (compute_tops на каждую пару, паросочетания) — в потоке,
+        # чтобы event loop не блокировался на больших парках
+        assignment, unassigned = await asyncio.to_thread(assign_cars_to_trucks, trucks, cars, options)
+        budget = time_budget_ms or self.optimizer.time_budget_ms
+        engine_name = self.optimizer.engine.name
+
+        executor = self.executor or get_optimization_executor()
+        loaded = [truck for truck in trucks if assignment.get(truck.id)]
+        # 429 — только если пул уже занят; большой парк проходит волнами:
+        # грузовики сверх свободных слотов ждут их в очереди исполнителя
+        if loaded and executor.saturated:
+            executor.rejected += 1
+            raise ExecutorSaturatedError(executor.depth)
+        queue_timeout_ms = fleet_queue_timeout_ms(executor, len(loaded), budget)
+        search_results = await asyncio.gather(*[
+            executor.search(
+                truck,
+                assignment[truck.id],
+                engine_name,
+                budget,
+                queue_timeout_ms=queue_timeout_ms,
+                options=options
+            )
+            for truck in loaded
+        ], return_exceptions=True)
+        # Таймаут отдельных грузовиков попадает в их результаты;
+        # если не уложился ни один — вся пакетная задача завершилась по таймауту (504)
+        if search_results and all(isinstance(r, JobTimeoutError) for r in search_results):
+            raise search_results[0]
+
+        results = []
+        for truck, search_result in zip(loaded, search_results):
+            truck_cars = assignment[truck.id]
+            if isinstance(search_result, Exception):
+                logger.error(f"Ошибка поиска размещения для грузовика {truck.id}: {search_result}")
+                results.append({
+                    "success": False,
+                    "message": str(search_result),
+                    "truck_id": truck.id,
+                    "car_count": len(truck_cars)
+                })
+                continue
+            results.append(
+                await self.optimizer.complete_optimization(truck, truck_cars, search_result, constraints)
+            )
+
+        return {
+            "success": all(result["success"] for result in results) and not unassigned,
+            "truck_count": len(trucks),
+            "car_count": len(cars),
+            "results": results,
+            "idle_truck_ids": [truck.id for truck in trucks if not assignment.get(truck.id)],
+            "unassigned_car_ids": unassigned,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
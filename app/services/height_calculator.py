@@ -1,10 +1,149 @@
 # app/services/height_calculator.py
 
-from typing import Dict, Any
-from app.models.enums import VehicleCategory
+from array import array
+from typing import Dict, Any, List, Sequence
+
+import numpy as np
+
+from app.models.enums import VehicleCategory, CarBodyType
 from app.models.truck.schemas import PlatformHeightAdjustment, ChainConfiguration
 
+# Соответствие типа кузова категории ТС для расчета снижения высоты цепями
+BODY_TYPE_CATEGORIES = {
+    CarBodyType.PICKUP: VehicleCategory.PICKUP,
+    CarBodyType.UTILITY_TRUCK: VehicleCategory.PICKUP,
+    CarBodyType.FULL_SIZE_SUV: VehicleCategory.FULL_SIZE_SUV,
+}
+
+# Числовые коды категорий для векторного расчета (порядок VehicleCategory)
+CATEGORIES: List[VehicleCategory] = list(VehicleCategory)
+CATEGORY_CODES: Dict[VehicleCategory, int] = {category: code for code, category in enumerate(CATEGORIES)}
+
+# Снижение высоты края цепями по коду категории.
+# Берется из PlatformHeightAdjustment, чтобы правило было в одном месте.
+CHAIN_REDUCTIONS = np.array([
+    -PlatformHeightAdjustment.calculate_effective_height(
+        base_height=0.0,
+        chains_config=ChainConfiguration(is_used=True),
+        vehicle_category=category
+    )
+    for category in CATEGORIES
+], dtype=np.float64)
+
+EDGE_KEYS = ("edge_a", "edge_b")
+
 class HeightCalculationService:
+    @staticmethod
+    def category_codes(categories: Sequence[VehicleCategory]) -> np.ndarray:
+        """Коды категорий для batch_effective_heights"""
+        return np.fromiter(
+            (CATEGORY_CODES[VehicleCategory(category)] for category in categories),
+            dtype=np.intp,
+            count=len(categories)
+        )
+
+    @staticmethod
+    def chain_reduction(vehicle_category: VehicleCategory) -> float:
+        """Снижение высоты края при использовании цепей для категории ТС"""
+        return float(CHAIN_REDUCTIONS[CATEGORY_CODES[vehicle_category]])
+
+    @staticmethod
+    def batch_effective_heights(
+        edge_heights: np.ndarray,
+        chain_flags: np.ndarray,
+        category_codes: np.ndarray
+    ) -> np.ndarray:
+        """
+        Эффективные высоты краев для набора категорий за один вызов.
+
+        Args:
+            edge_heights: Базовые высоты краев любой формы (например, грузовики x края);
+                NaN — высота не задана, остается NaN
+            chain_flags: Флаги использования цепей той же формы
+            category_codes: Коды категорий (M,), см. category_codes()
+
+        Returns:
+            Массив формы (M, *edge_heights.shape)
+        """
+        heights = np.asarray(edge_heights, dtype=np.float64)
+        flags = np.asarray(chain_flags, dtype=bool)
+        reductions = CHAIN_REDUCTIONS[np.asarray(category_codes, dtype=np.intp)]
+        return heights - np.multiply.outer(reductions, flags)
+
+    @staticmethod
+    def effective_edge_heights(
+        edge_heights: Sequence[float],
+        chain_flags: Sequence[int],
+        vehicle_category: VehicleCategory
+    ) -> array:
+        """
+        Эффективные высоты краев по плоским массивам (см. CompiledTruckGeometry)
+        для одной категории.
+        """
+        result = HeightCalculationService.batch_effective_heights(
+            np.asarray(edge_heights, dtype=np.float64),
+            np.asarray(chain_flags, dtype=bool),
+            [CATEGORY_CODES[vehicle_category]]
+        )
+        return array("d", result[0].tolist())
+
+    @staticmethod
+    def vehicle_category_for(car: Any) -> VehicleCategory:
+        """
+        Определяет категорию ТС по типу кузова автомобиля.
+        Если тип кузова неизвестен — STANDARD.
+        """
+        body_type = getattr(car, "body_type", None)
+        if body_type is None:
+            return VehicleCategory.STANDARD
+        try:
+            body_type = CarBodyType(body_type)
+        except ValueError:
+            return VehicleCategory.STANDARD
+        return BODY_TYPE_CATEGORIES.get(body_type, VehicleCategory.STANDARD)
+
+    @staticmethod
+    def calculate_adjusted_platforms(
+        platforms: List[Dict[str, Any]],
+        vehicle_category: VehicleCategory
+    ) -> List[Dict[str, Any]]:
+        """
+        Рассчитывает effective_height краёв для списка платформ одним
+        векторным вызовом. Возвращает копии данных платформ с полями
+        edge_a['effective_height'] и edge_b['effective_height'].
+        Края без height или без настроек цепей не изменяются.
+        """
+        adjusted = [dict(platform_data) for platform_data in platforms]
+
+        targets = []
+        heights = []
+        flags = []
+        for platform_data in adjusted:
+            for edge_key in EDGE_KEYS:
+                edge = platform_data.get(edge_key)
+                if not edge:
+                    continue
+                base_height = edge.get('height')
+                chains_cfg = edge.get('chains')
+                # Если высота не задана, игнорируем (возможно, mobile edge)
+                if base_height is not None and chains_cfg:
+                    edge = dict(edge)
+                    platform_data[edge_key] = edge
+                    targets.append(edge)
+                    heights.append(base_height)
+                    flags.append(bool(chains_cfg.get('is_used', False)))
+
+        if targets:
+            effective = HeightCalculationService.batch_effective_heights(
+                np.array(heights, dtype=np.float64),
+                np.array(flags, dtype=bool),
+                [CATEGORY_CODES[vehicle_category]]
+            )[0]
+            for edge, height in zip(targets, effective.tolist()):
+                edge['effective_height'] = height
+
+        return adjusted
+
     @staticmethod
     async def calculate_adjusted_heights(
         platform_data: Dict[str, Any],
@@ -12,24 +151,7 @@ class HeightCalculationService:
     ) -> Dict[str, Any]:
         """
         Рассчитывает итоговые (effective) высоты краёв платформы
-        с учётом использования цепей. Возвращает копию данных 
+        с учётом использования цепей. Возвращает копию данных
         платформы с полем edge_a['effective_height'] и edge_b['effective_height'].
         """
-        adjusted_data = dict(platform_data)  # скопируем начальные данные
-
-        for edge_key in ['edge_a', 'edge_b']:
-            if edge_key in adjusted_data:
-                base_height = adjusted_data[edge_key].get('height')
-                chains_cfg = adjusted_data[edge_key].get('chains')
-
-                # Если высота не задана, игнорируем (возможно, mobile edge)
-                if base_height is not None and chains_cfg:
-                    # Вызываем расчет
-                    new_height = PlatformHeightAdjustment.calculate_effective_height(
-                        base_height=base_height,
-                        chains_config=ChainConfiguration(**chains_cfg),
-                        vehicle_category=vehicle_category
-                    )
-                    adjusted_data[edge_key]['effective_height'] = new_height
-
-        return adjusted_data
\ No newline at end of file
+        return HeightCalculationService.calculate_adjusted_platforms([platform_data], vehicle_category)[0]
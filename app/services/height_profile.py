@@ -0,0 +1,187 @@
+# app/services/height_profile.py
+
+from array import array
+from typing import Any, Dict, List, Optional
+
+from app.models.truck.schemas import TruckResponseSchema
+from app.services.adjustments import apply_adjustments
+from app.services.orientation import DIRECTIONS, FORWARD, BACKWARD, OrientedCar
+from app.services.truck_geometry import DECKS, CompiledTruckGeometry, compile_truck_geometry
+
+NEG_INF = float("-inf")
+
+
+class MaxSegmentTree:
+    """Дерево отрезков для максимума: обновление точки и запрос максимума за O(log n)"""
+
+    __slots__ = ("size", "tree")
+
+    def __init__(self, values: List[float]):
+        size = 1
+        while size < max(1, len(values)):
+            size *= 2
+        self.size = size
+        self.tree = array("d", [NEG_INF] * (2 * size))
+        for i, value in enumerate(values):
+            self.tree[size + i] = value
+        for i in range(size - 1, 0, -1):
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def update(self, index: int, value: float) -> None:
+        i = self.size + index
+        self.tree[i] = value
+        i //= 2
+        while i:
+            best = max(self.tree[2 * i], self.tree[2 * i + 1])
+            if self.tree[i] == best:
+                break  # выше по дереву ничего не меняется
+            self.tree[i] = best
+            i //= 2
+
+    def max(self) -> float:
+        return self.tree[1]
+
+
+class HeightProfile:
+    """
+    Высотный профиль загруженного грузовика.
+
+    Для каждой платформы хранится высота верхней точки автомобиля при его
+    направлении (см. orientation.oriented_top: опора с учетом цепей и deeping,
+    крыша и капот) или, если платформа пустая, ее конструкция (максимальная
+    высота края). Если направление не задано, берется лучшее.
+    Общая высота — максимум по платформам, поддерживается деревом отрезков,
+    поэтому перестановка или переворот одного автомобиля пересчитывает только
+    затронутые платформы. Запас по зазору под верхней платформой
+    (clearance_profile / низ верхней платформы) считается там же.
+    """
+
+    def __init__(
+        self,
+        geometry: CompiledTruckGeometry,
+        cars: Optional[Dict[int, Any]] = None,
+        directions: Optional[Dict[int, str]] = None
+    ):
+        self.geometry = geometry
+        count = geometry.platform_count
+        self.cars: List[Any] = [None] * count
+        self.directions: List[Optional[str]] = [None] * count
+        self.tops = array("d", [0.0] * count)
+        self.headrooms: List[Optional[float]] = [None] * count
+        self._oriented: Dict[int, OrientedCar] = {}
+        self.structure = array("d", (
+            max(geometry.edge_heights[2 * p], geometry.edge_heights[2 * p + 1])
+            for p in range(count)
+        ))
+
+        for p, car in (cars or {}).items():
+            self.cars[p] = car
+        for p, direction in (directions or {}).items():
+            self.directions[p] = direction
+        for p in range(count):
+            self._evaluate(p)
+        self._tree = MaxSegmentTree(list(self.tops))
+
+    @classmethod
+    def from_placement(
+        cls,
+        truck: TruckResponseSchema,
+        placement: Dict[str, Any],
+        cars_by_id: Optional[Dict[str, Any]] = None
+    ) -> "HeightProfile":
+        """
+        Строит профиль по размещению в формате API.
+        Автомобили, которых нет в cars_by_id, считаются стандартными
+        высотой orientation.DEFAULT_CAR_HEIGHT_IN. Настройки регулируемых платформ
+        (placement["adjustments"]) применяются к геометрии.
+        """
+        geometry = apply_adjustments(compile_truck_geometry(truck), placement.get("adjustments"))
+        cars_by_id = cars_by_id or {}
+        cars: Dict[int, Any] = {}
+        directions: Dict[int, str] = {}
+        for deck in DECKS:
+            for item in placement.get(deck, []) or []:
+                p = geometry.index.get(item.get("platform_id"))
+                if p is None:
+                    continue
+                cars[p] = cars_by_id.get(item.get("car_id"), _UnknownCar(item.get("car_id")))
+                if item.get("direction"):
+                    directions[p] = item["direction"]
+
+        return cls(geometry, cars, directions)
+
+    # -------------------- Запросы --------------------
+
+    @property
+    def max_height(self) -> float:
+        return self._tree.max()
+
+    def top(self, p: int) -> float:
+        return self.tops[p]
+
+    def headroom(self, p: int) -> Optional[float]:
+        return self.headrooms[p]
+
+    # -------------------- Изменения (инкрементально) --------------------
+
+    def place(self, p: int, car: Any, direction: Optional[str] = None) -> float:
+        """
+        Ставит автомобиль на платформу p (без направления — лучшее по высоте).
+        Возвращает новую общую высоту.
+        """
+        self.cars[p] = car
+        self.directions[p] = direction
+        self._refresh(p)
+        return self.max_height
+
+    def remove(self, p: int) -> float:
+        """Освобождает платформу p. Возвращает новую общую высоту."""
+        return self.place(p, None)
+
+    def swap(self, p: int, q: int) -> float:
+        """Меняет местами автомобили платформ p и q. Возвращает новую общую высоту."""
+        self.cars[p], self.cars[q] = self.cars[q], self.cars[p]
+        self.directions[p], self.directions[q] = self.directions[q], self.directions[p]
+        self._refresh(p)
+        self._refresh(q)
+        return self.max_height
+
+    def flip(self, p: int) -> float:
+        """Разворачивает автомобиль на платформе p. Возвращает новую общую высоту."""
+        self.directions[p] = BACKWARD if self.directions[p] == FORWARD else FORWARD
+        self._refresh(p)
+        return self.max_height
+
+    def _refresh(self, p: int) -> None:
+        self._evaluate(p)
+        self._tree.update(p, self.tops[p])
+
+    def _evaluate(self, p: int) -> None:
+        car = self.cars[p]
+        if car is None:
+            self.directions[p] = None
+            self.tops[p] = self.structure[p]
+            self.headrooms[p] = None
+            return
+        oriented = self._oriented.get(id(car))
+        if oriented is None or oriented.car is not car:
+            oriented = OrientedCar(self.geometry, car)
+            self._oriented[id(car)] = oriented
+
+        if self.directions[p] is None:
+            # Направление не задано — фиксируем лучшее по высоте
+            self.directions[p] = min(
+                DIRECTIONS, key=lambda direction: oriented.evaluate(self.geometry, p, direction)[0]
+            )
+        top, headroom = oriented.evaluate(self.geometry, p, self.directions[p])
+        self.tops[p] = max(top, self.structure[p])
+        self.headrooms[p] = headroom
+
+
+class _UnknownCar:
+    """Автомобиль из размещения, данных которого нет: высота и категория по умолчанию"""
+
+    __slots__ = ("id",)
+
+    def __init__(self, car_id: Optional[str]):
+        self.id = car_id
@@ -0,0 +1,252 @@
+# app/services/history_buffer.py
+
+import os
+import json
+import asyncio
+import logging
+from collections import deque
+from typing import IO, Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from app.core.config import get_settings
+from app.db.dynamodb import DynamoDB, db
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+HISTORY_TABLE = 'loading_history'
+
+# Запись пачки: возвращает элементы, которые записать не удалось
+BatchWriter = Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]]
+
+
+async def _write_to_dynamodb(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return await db.batch_write_items(HISTORY_TABLE, items)
+
+
+class LoadingHistoryBuffer:
+    """
+    Отложенная (write-behind) запись опыта загрузки в loading_history.
+
+    record() только кладет запись в буфер — запрос оптимизации не ждет
+    DynamoDB и не падает из-за ее ошибок. Фоновая задача отправляет буфер
+    пачками BatchWriteItem, когда набралось flush_size записей или прошло
+    flush_interval секунд. В памяти не больше max_items записей: старейшие
+    сверх лимита, как и записи, которые не удалось отправить, дописываются
+    в файл spill_path (JSON Lines) и отправляются повторно, когда запись
+    снова проходит. id записи фиксируется при record(), поэтому повторная
+    отправка идемпотентна. При остановке (lifespan) буфер сбрасывается.
+
+    Файловые операции выполняются в потоке (asyncio.to_thread), а файл
+    досылается построчно пачками по flush_size — ни event loop, ни память
+    не зависят от того, сколько накопилось за время недоступности DynamoDB.
+    """
+
+    def __init__(
+        self,
+        writer: Optional[BatchWriter] = None,
+        flush_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_items: Optional[int] = None,
+        spill_path: Optional[str] = None
+    ):
+        self.writer = writer or _write_to_dynamodb
+        self.flush_size = flush_size or settings.HISTORY_FLUSH_SIZE
+        self.flush_interval = flush_interval or settings.HISTORY_FLUSH_INTERVAL
+        self.max_items = max_items or settings.HISTORY_BUFFER_SIZE
+        self.spill_path = spill_path or settings.HISTORY_SPILL_PATH
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._lock = asyncio.Lock()
+        # Запись в файл по порядку: сбросы не перемешиваются между собой
+        self._spill_lock = asyncio.Lock()
+        self._spills: Set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Последняя отправка прошла: можно дослать записи из файла
+        self._healthy = True
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+
+    @property
+    def replay_path(self) -> str:
+        return self.spill_path + '.replay'
+
+    def record(self, experience_data: Dict[str, Any]) -> str:
+        """Ставит запись в буфер и возвращает ее id (без обращения к DynamoDB)"""
+        data = DynamoDB.prepare_loading_experience(experience_data)
+        self._buffer.append(data)
+        if len(self._buffer) > self.max_items:
+            self._spill_later(self._take(self.flush_size))
+        if len(self._buffer) >= self.flush_size and self._wakeup is not None:
+            self._wakeup.set()
+        return data['id']
+
+    async def start(self) -> None:
+        """Запускает фоновую отправку (вызывается из lifespan)"""
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name='history-flusher')
+
+    async def stop(self) -> None:
+        """Останавливает фоновую отправку и сбрасывает буфер; неотправленное — в файл"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._wakeup = None
+        await self.flush()
+        if self._buffer:
+            await self._spill(self._take(len(self._buffer)))
+        await self._settle()
+
+    async def flush(self) -> int:
+        """
+        Отправляет буфер пачками по flush_size. На первой неудачной пачке
+        останавливается (ее неотправленные записи уходят в файл, остаток
+        ждет следующей попытки). Возвращает число записанных записей.
+        """
+        async with self._lock:
+            written = 0
+            while self._buffer:
+                batch = self._take(self.flush_size)
+                failed = await self._write(batch)
+                written += len(batch) - len(failed)
+                if failed:
+                    await self._spill(failed)
+                    break
+            await self._settle()
+            if self._healthy and self._has_spill():
+                await self._replay()
+            return written
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "spill_pending": self._has_spill(),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка отправки loading_history: {e}")
+
+    def _take(self, count: int) -> List[Dict[str, Any]]:
+        return [self._buffer.popleft() for _ in range(min(count, len(self._buffer)))]
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Записывает пачку; возвращает исходные записи, которые не записались"""
+        try:
+            failed = await self.writer(batch)
+        except Exception as e:
+            logger.error(f"Ошибка BatchWriteItem в {HISTORY_TABLE}: {e}")
+            failed = batch
+        failed_ids = {item.get('id') for item in failed}
+        unsent = [item for item in batch if item['id'] in failed_ids]
+        self.written += len(batch) - len(unsent)
+        self._healthy = not unsent
+        return unsent
+
+    def _has_spill(self) -> bool:
+        return os.path.exists(self.spill_path) or os.path.exists(self.replay_path)
+
+    def _spill_later(self, records: List[Dict[str, Any]]) -> None:
+        """Сброс на диск в фоне: record() вызывается из event loop и не ждет файла"""
+        try:
+            task = asyncio.get_running_loop().create_task(self._spill(records))
+        except RuntimeError:
+            self._append(records)  # Вне event loop блокировать нечего
+            return
+        self._spills.add(task)
+        task.add_done_callback(self._spills.discard)
+
+    async def _settle(self) -> None:
+        """Дожидается фоновых сбросов на диск"""
+        if self._spills:
+            await asyncio.gather(*list(self._spills), return_exceptions=True)
+
+    async def _spill(self, records: List[Dict[str, Any]]) -> bool:
+        """Дописывает записи в файл (в потоке); False, если записать не удалось"""
+        if not records:
+            return True
+        async with self._spill_lock:
+            return await asyncio.to_thread(self._append, records)
+
+    def _append(self, records: List[Dict[str, Any]]) -> bool:
+        try:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, default=str) + '\n')
+            self.spilled += len(records)
+            logger.warning(f"{len(records)} записей loading_history сохранено в {self.spill_path}")
+            return True
+        except OSError as e:
+            logger.error(f"Не удалось сохранить {len(records)} записей loading_history: {e}")
+            return False
+
+    def _read_batch(self, f: IO[str]) -> List[Dict[str, Any]]:
+        """Следующие flush_size записей файла отправки"""
+        batch = []
+        while len(batch) < self.flush_size:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                batch.append(json.loads(line))
+        return batch
+
+    def _append_rest(self, f: IO[str]) -> bool:
+        """Переносит непрочитанный остаток файла отправки в файл сброса построчно"""
+        try:
+            with open(self.spill_path, 'a', encoding='utf-8') as out:
+                for line in f:
+                    if line.strip():
+                        out.write(line)
+            return True
+        except OSError as e:
+            logger.error(f"Не удалось перенести остаток {self.replay_path}: {e}")
+            return False
+
+    async def _replay(self) -> None:
+        """
+        Досылает записи из файла построчно, пачками по flush_size. Файл
+        сначала переименовывается, чтобы новые сбросы на диск не смешивались
+        с отправляемыми; незавершенная отправка (например, после падения
+        процесса) повторяется при следующей попытке.
+        """
+        if not os.path.exists(self.replay_path):
+            try:
+                os.replace(self.spill_path, self.replay_path)
+            except FileNotFoundError:
+                return
+        with open(self.replay_path, 'r', encoding='utf-8') as f:
+            while True:
+                batch = await asyncio.to_thread(self._read_batch, f)
+                if not batch:
+                    break
+                failed = await self._write(batch)
+                self.replayed += len(batch) - len(failed)
+                if failed:
+                    if not await self._spill(failed):
+                        return  # Файл отправки остается до следующей попытки
+                    async with self._spill_lock:
+                        if not await asyncio.to_thread(self._append_rest, f):
+                            return
+                    break
+        await asyncio.to_thread(os.remove, self.replay_path)
+
+
+history_buffer = LoadingHistoryBuffer()
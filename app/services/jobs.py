@@ -0,0 +1,210 @@
+# app/services/jobs.py
+
+import uuid
+import asyncio
+import logging
+import itertools
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.models.enums import JobPriority, JobStatus
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Порядок обслуживания очередей: меньше — раньше
+PRIORITY_ORDER = {JobPriority.URGENT: 0, JobPriority.NORMAL: 1, JobPriority.BATCH: 2}
+
+
+class JobQueueFullError(Exception):
+    """В очереди задач нет места — новая задача не принимается"""
+
+    def __init__(self, pending: int):
+        super().__init__(f"Job queue is full: {pending} jobs pending")
+        self.pending = pending
+
+
+class Job:
+    """Задача оптимизации: статус, прогресс и результат"""
+
+    __slots__ = (
+        "id", "kind", "priority", "payload", "status", "progress", "stage",
+        "result", "error", "configuration_ids", "created_at", "started_at", "finished_at",
+    )
+
+    def __init__(self, kind: str, payload: Dict[str, Any], priority: JobPriority):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.priority = priority
+        self.payload = payload
+        self.status = JobStatus.QUEUED
+        self.progress = 0.0
+        self.stage = "queued"
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.configuration_ids: List[str] = []
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+    def report(self, stage: str, progress: float) -> None:
+        """Обновляет этап и прогресс (0..1) выполняющейся задачи"""
+        self.stage = stage
+        self.progress = round(min(max(progress, 0.0), 1.0), 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "priority": self.priority.value,
+            "status": self.status.value,
+            "stage": self.stage,
+            "progress": self.progress,
+            "configuration_ids": self.configuration_ids,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+JobHandler = Callable[[Job], Awaitable[Dict[str, Any]]]
+
+
+class JobQueue:
+    """
+    Очередь задач оптимизации в процессе приложения (без внешних сервисов).
+
+    Задачи обслуживаются по приоритету (urgent, normal, batch), внутри
+    приоритета — по порядку поступления. Одновременно выполняется не больше
+    concurrency задач; ожидающих — не больше max_pending, иначе submit
+    отклоняет задачу (JobQueueFullError, API отвечает 429). Обработчик
+    задачи регистрируется по ее виду (register). Завершенные задачи
+    хранятся в памяти, старейшие вытесняются после history_size.
+    """
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        history_size: Optional[int] = None
+    ):
+        self.concurrency = concurrency or settings.JOB_CONCURRENCY
+        self.max_pending = max_pending or settings.JOB_MAX_PENDING
+        self.history_size = history_size or settings.JOB_HISTORY_SIZE
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._workers: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        """Запускает воркеры очереди (вызывается из lifespan)"""
+        if self._workers:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Очередь задач оптимизации запущена: {self.concurrency} воркеров")
+
+    async def stop(self) -> None:
+        """Останавливает воркеры; невыполненные задачи помечаются как failed"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in self._jobs.values():
+            if not job.finished:
+                self._finish(job, JobStatus.FAILED, error="Job queue stopped")
+        self._queue = None
+        logger.info("Очередь задач оптимизации остановлена")
+
+    def submit(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        priority: JobPriority = JobPriority.NORMAL
+    ) -> Job:
+        """Ставит задачу в очередь и возвращает ее (статус queued)"""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        if self.pending >= self.max_pending:
+            raise JobQueueFullError(self.pending)
+
+        job = Job(kind, payload, JobPriority(priority))
+        self._jobs[job.id] = job
+        self._queue.put_nowait((PRIORITY_ORDER[job.priority], next(self._sequence), job.id))
+        self._evict()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        statuses = {status.value: 0 for status in JobStatus}
+        for job in self._jobs.values():
+            statuses[job.status.value] += 1
+        return {"concurrency": self.concurrency, "pending": self.pending, "jobs": statuses}
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                continue
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.utcnow()
+            job.report("running", 0.0)
+            try:
+                result = await self._handlers[job.kind](job)
+            except asyncio.CancelledError:
+                self._finish(job, JobStatus.FAILED, error="Job queue stopped")
+                raise
+            except Exception as e:
+                logger.error(f"Задача {job.id} ({job.kind}) завершилась ошибкой: {e}")
+                self._finish(job, JobStatus.FAILED, error=str(e))
+            else:
+                self._finish(job, JobStatus.SUCCEEDED, result=result)
+
+    def _finish(
+        self,
+        job: Job,
+        status: JobStatus,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        job.payload = {}
+        job.report("done" if status == JobStatus.SUCCEEDED else "failed", 1.0)
+
+    def _evict(self) -> None:
+        # Вытесняем старейшие завершенные задачи
+        excess = len(self._jobs) - self.history_size
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished][:excess]:
+            del self._jobs[job_id]
+
+
+job_queue = JobQueue()
@@ -1,14 +1,30 @@
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Tuple
+import asyncio
+import contextlib
+import threading
 import uuid
 import logging
 from datetime import datetime
 
+from app.core.config import get_settings
 from app.db.dynamodb import db
 from app.models.truck.schemas import TruckResponseSchema
 from app.models.car.schemas import CarResponseSchema
 from app.services.height_calculator import HeightCalculationService
+from app.services.executor import OptimizationExecutor
+from app.services.history_buffer import history_buffer
+from app.services.placement import PlacementEngine, PlacementResult, get_placement_engine
+from app.services.truck_geometry import compile_truck_geometry, effective_height_table
+from app.services.orientation import OrientedCar, car_height_in, optimize_orientations
+from app.services.adjustments import solve_adjustments
+from app.services.height_profile import HeightProfile
+from app.services.constraints import ConstraintOptions, ConstraintValidator
+from app.services.configuration_hash import configuration_hash
+from app.models.car.crud import car_crud
+from app.models.truck.crud import truck_crud
 from app.models.enums import VehicleCategory
 
+settings = get_settings()
 logger = logging.getLogger(__name__)
 
 class LoadingOptimizer:
@@ -17,8 +33,18 @@ class LoadingOptimizer:
     Реализует алгоритмы оптимального размещения с учетом физических ограничений.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        engine: Optional[PlacementEngine] = None,
+        time_budget_ms: Optional[float] = None,
+        executor: Optional[OptimizationExecutor] = None
+    ):
         self.name = "Loading Optimizer Service"
+        # Движок размещения можно подменить (например, для тестов)
+        self.engine = engine or get_placement_engine(settings.OPTIMIZER_ENGINE)
+        self.time_budget_ms = time_budget_ms or settings.OPTIMIZER_TIME_BUDGET_MS
+        # Пул процессов для поиска; без него поиск выполняется в текущем потоке
+        self.executor = executor
 
     async def health_check(self) -> Dict[str, str]:
         """Проверка работоспособности сервиса"""
@@ -28,7 +54,8 @@ class LoadingOptimizer:
         self, 
         truck: TruckResponseSchema, 
         cars: List[CarResponseSchema], 
-        constraints: Optional[Dict[str, Any]] = None
+        constraints: Optional[Dict[str, Any]] = None,
+        time_budget_ms: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Основной метод оптимизации загрузки.
@@ -37,6 +64,8 @@ class LoadingOptimizer:
             truck: Грузовик для загрузки
             cars: Список автомобилей для размещения
             constraints: Дополнительные ограничения
+            time_budget_ms: Бюджет времени поиска запроса (anytime: берется
+                лучшее размещение, найденное к дедлайну)
 
         Returns:
             Оптимизированная конфигурация загрузки
@@ -46,25 +75,158 @@ class LoadingOptimizer:
         # Проверка возможности размещения
         if not self._can_fit_all_cars(truck, cars):
             logger.warning("Невозможно разместить все автомобили на грузовике")
-            return {
-                "success": False,
-                "message": "Cannot fit all cars on the truck",
-                "truck_id": truck.id,
-                "car_count": len(cars),
-                "loading_spots": truck.loading_spots
-            }
+            return self._not_enough_spots(truck, cars)
 
         # Сортировка автомобилей по приоритету размещения
         sorted_cars = self._sort_cars_by_priority(cars)
 
-        # Базовое размещение
-        base_placement = self._create_initial_placement(truck, sorted_cars)
+        # Базовое размещение (поиск движком размещения)
+        if self.executor is not None:
+            search_result = await self.executor.search(
+                truck,
+                sorted_cars,
+                self.engine.name,
+                time_budget_ms or self.time_budget_ms,
+                options=ConstraintOptions.parse(constraints)
+            )
+        else:
+            search_result = self._create_initial_placement(truck, sorted_cars, constraints, time_budget_ms)
+
+        return await self.complete_optimization(truck, cars, search_result, constraints)
+
+    async def stream_optimization(
+        self,
+        truck: TruckResponseSchema,
+        cars: List[CarResponseSchema],
+        constraints: Optional[Dict[str, Any]] = None,
+        time_budget_ms: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Оптимизация с промежуточными результатами.
 
-        # Оптимизация высот
-        optimized_placement = await self._optimize_heights(truck, base_placement)
+        Поиск выполняется в пуле процессов (без пула — в потоке), каждое
+        улучшенное размещение отдается событием ("improvement", {...}),
+        в конце — ("result", итог как у optimize_loading). Если итерацию
+        прервали (клиент отключился), поиск останавливается: задача пула
+        отменяется через флаг в общей памяти, поток — через cancel_event.
+        """
+        cancel_event = cancel_event or threading.Event()
+        if not self._can_fit_all_cars(truck, cars):
+            yield "result", self._not_enough_spots(truck, cars)
+            return
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def on_improvement(result: PlacementResult) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, result)
 
-        # Проверка ограничений
-        validation_result = await self._validate_constraints(truck, optimized_placement, constraints)
+        sorted_cars = self._sort_cars_by_priority(cars)
+        if self.executor is not None:
+            search = asyncio.ensure_future(self.executor.search(
+                truck,
+                sorted_cars,
+                self.engine.name,
+                time_budget_ms or self.time_budget_ms,
+                options=ConstraintOptions.parse(constraints),
+                on_improvement=on_improvement
+            ))
+        else:
+            search = loop.run_in_executor(
+                None,
+                lambda: self._create_initial_placement(
+                    truck, sorted_cars, constraints, time_budget_ms,
+                    on_improvement=on_improvement, cancel_event=cancel_event
+                )
+            )
+        waiter = None
+        try:
+            while True:
+                waiter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({waiter, search}, return_when=asyncio.FIRST_COMPLETED)
+                if waiter not in done:
+                    waiter.cancel()
+                    break
+                improvement = waiter.result()
+                yield "improvement", {
+                    "score": improvement.score,
+                    "peak_height": improvement.peak_height,
+                    "elapsed_ms": round(improvement.elapsed_ms, 3),
+                    "nodes_explored": improvement.nodes_explored,
+                    "placement": improvement.placement,
+                }
+
+            # Улучшения, пришедшие вместе с завершением поиска, уже не нужны —
+            # их покрывает итоговый результат
+            search_result = await search
+            yield "result", await self.complete_optimization(truck, cars, search_result, constraints)
+        finally:
+            cancel_event.set()
+            if waiter is not None:
+                waiter.cancel()
+            if not search.done():
+                # Отмена задачи пула поднимает ее флаг в общей памяти
+                search.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await search
+
+    async def complete_optimization(
+        self,
+        truck: TruckResponseSchema,
+        cars: List[CarResponseSchema],
+        search_result: PlacementResult,
+        constraints: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Доводит найденное движком размещение до итоговой конфигурации:
+        оптимизация высот, проверка ограничений, логирование.
+        Используется и для одиночной, и для пакетной (fleet) оптимизации,
+        где поиск выполняется в отдельном процессе. Вычисления
+        (finish_optimization) идут в потоке, event loop только ждет результат
+        и ставит запись в историю загрузок.
+        """
+        result = await asyncio.to_thread(self.finish_optimization, truck, cars, search_result, constraints)
+        if result["success"]:
+            self._log_loading_experience(truck.id, result["configuration"])
+            logger.info(f"Оптимизация загрузки завершена успешно для грузовика {truck.id}")
+        return result
+
+    def finish_optimization(
+        self,
+        truck: TruckResponseSchema,
+        cars: List[CarResponseSchema],
+        search_result: PlacementResult,
+        constraints: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Вычислительная часть complete_optimization (без ввода-вывода и event loop)"""
+        if not search_result.feasible:
+            logger.warning(f"Движок размещения не нашел допустимой конфигурации: {search_result.issues}")
+            return {
+                "success": False,
+                "message": "No feasible placement found",
+                "issues": search_result.issues,
+                "truck_id": truck.id,
+                "search": search_result.stats()
+            }
+        base_placement = search_result.placement
+
+        # Оптимизация высот
+        cars_by_id = {car.id: car for car in cars}
+        optimized_placement = self._optimize_heights(
+            truck, base_placement, cars_by_id, ConstraintOptions.parse(constraints).min_clearance
+        )
+
+        # Настройка раздвижных платформ и mobile краев
+        optimized_placement = self._adjust_platforms(truck, optimized_placement, cars_by_id, constraints)
+
+        # Проверка ограничений; нарушения исправляются локальным поиском
+        # с инкрементальной проверкой ходов (финальная оптимизация)
+        validator = ConstraintValidator(truck, optimized_placement, cars_by_id, constraints)
+        if not validator.valid:
+            optimized_placement = self._final_optimization(truck, optimized_placement, validator, cars_by_id)
+        validation_result = validator.result()
+        logger.debug(f"Время проверки ограничений (мс): {validation_result['timings']}")
         if not validation_result["valid"]:
             logger.warning(f"Конфигурация не соответствует ограничениям: {validation_result['issues']}")
             return {
@@ -74,8 +236,7 @@ class LoadingOptimizer:
                 "truck_id": truck.id
             }
 
-        # Финальная оптимизация
-        final_placement = self._final_optimization(truck, optimized_placement)
+        final_placement = optimized_placement
 
         # Сохраняем результат
         configuration = {
@@ -85,17 +246,17 @@ class LoadingOptimizer:
             "created_at": datetime.utcnow(),
             "constraints": constraints or {}
         }
-
-        # Логируем опыт загрузки
-        await self._log_loading_experience(truck.id, configuration)
-
-        logger.info(f"Оптимизация загрузки завершена успешно для грузовика {truck.id}")
+        # Одинаковые раскладки сохраняются один раз: id — хэш содержимого
+        configuration["configuration_hash"] = configuration_hash(truck, cars, constraints, final_placement)
+        configuration["id"] = configuration["configuration_hash"]
 
         return {
             "success": True,
             "truck_id": truck.id,
             "car_count": len(cars),
-            "configuration": configuration
+            "configuration": configuration,
+            "weights": validation_result["weights"],
+            "search": search_result.stats()
         }
 
     async def validate_configuration(
@@ -113,8 +274,21 @@ class LoadingOptimizer:
         Returns:
             Результат валидации
         """
+        placement = configuration.get("placement", {})
+
+        # Данные автомобилей нужны для расчета высоты
+        car_ids = [
+            item["car_id"]
+            for deck in ["upper_deck", "lower_deck"]
+            for item in placement.get(deck, []) or []
+            if item.get("car_id")
+        ]
+        cars_by_id = await car_crud.get_car_records(car_ids) if car_ids else {}
+
         # Проверяем физические ограничения
-        validation_result = await self._validate_constraints(truck, configuration.get("placement", {}))
+        validation_result = await self._validate_constraints(
+            truck, placement, configuration.get("constraints"), cars_by_id
+        )
 
         return {
             "valid": validation_result["valid"],
@@ -132,174 +306,243 @@ class LoadingOptimizer:
 
         Returns:
             ID сохраненной конфигурации
+
+        Raises:
+            ValueError: переданный configuration_hash не совпадает с вычисленным
         """
-        # Добавляем ID если его нет
-        if "id" not in configuration:
+        # Хэш всегда считается на сервере по текущим данным грузовика и автомобилей:
+        # присланному хэшу не доверяем, иначе под чужим хэшем можно сохранить что угодно
+        submitted = configuration.pop("configuration_hash", None)
+        config_hash = await self._hash_configuration(configuration)
+        if submitted and submitted != config_hash:
+            raise ValueError(f"Configuration hash mismatch: {submitted}")
+
+        # Сохраненная конфигурация адресуется хэшем; без него — прежний случайный id
+        if config_hash:
+            configuration["configuration_hash"] = config_hash
+            configuration["id"] = config_hash
+        elif "id" not in configuration:
             configuration["id"] = str(uuid.uuid4())
 
-        # Сохраняем конфигурацию
+        # Сохраняем конфигурацию (повторное сохранение той же раскладки ничего не меняет)
         config_id = await db.save_configuration(configuration)
 
         return config_id
 
+    async def get_configuration_by_hash(self, config_hash: str) -> Optional[Dict[str, Any]]:
+        """Ранее сохраненная конфигурация с тем же хэшем (для повторного использования)"""
+        configuration = await db.get_configuration(config_hash)
+        if configuration and configuration.get("configuration_hash") == config_hash:
+            return configuration
+        return None
+
+    async def _hash_configuration(self, configuration: Dict[str, Any]) -> Optional[str]:
+        """Хэш конфигурации; None, если грузовик или автомобили не найдены"""
+        truck = await truck_crud.get_truck(configuration.get("truck_id")) if configuration.get("truck_id") else None
+        if truck is None:
+            return None
+        car_ids = configuration.get("cars") or []
+        cars_by_id = await car_crud.get_car_records(car_ids) if car_ids else {}
+        if len(cars_by_id) != len(set(car_ids)):
+            return None
+        return configuration_hash(
+            truck,
+            [cars_by_id[car_id] for car_id in car_ids],
+            configuration.get("constraints"),
+            configuration.get("placement") or {}
+        )
+
     # -------------------- Вспомогательные методы --------------------
 
     def _can_fit_all_cars(self, truck: TruckResponseSchema, cars: List[CarResponseSchema]) -> bool:
         """Проверяет, можно ли разместить все автомобили на грузовике"""
         return len(cars) <= truck.loading_spots
 
+    def _not_enough_spots(self, truck: TruckResponseSchema, cars: List[CarResponseSchema]) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "message": "Cannot fit all cars on the truck",
+            "truck_id": truck.id,
+            "car_count": len(cars),
+            "loading_spots": truck.loading_spots
+        }
+
     def _sort_cars_by_priority(self, cars: List[CarResponseSchema]) -> List[CarResponseSchema]:
         """Сортирует автомобили по приоритету размещения"""
         # Сначала размещаем самые высокие автомобили
-        return sorted(cars, key=lambda car: car.height_ft, reverse=True)
+        return sorted(cars, key=car_height_in, reverse=True)
 
     def _create_initial_placement(
         self, 
         truck: TruckResponseSchema, 
-        cars: List[CarResponseSchema]
-    ) -> Dict[str, Any]:
-        """Создает начальное размещение автомобилей на грузовике"""
-        # В реальности здесь был бы сложный алгоритм размещения
-        # Для MVP используем упрощенный подход
-
-        placement = {
-            "upper_deck": [],
-            "lower_deck": []
-        }
-
-        # Получаем доступные места на верхней и нижней палубах
-        upper_platforms = []
-        lower_platforms = []
-
-        if truck.upper_deck and truck.upper_deck.platforms:
-            upper_platforms = sorted(truck.upper_deck.platforms, key=lambda p: p.position)
-
-        if truck.lower_deck and truck.lower_deck.platforms:
-            lower_platforms = sorted(truck.lower_deck.platforms, key=lambda p: p.position)
-
-        # Распределяем автомобили по платформам
-        car_index = 0
-
-        # Сначала заполняем верхнюю палубу
-        for platform in upper_platforms:
-            if car_index < len(cars):
-                placement["upper_deck"].append({
-                    "car_id": cars[car_index].id,
-                    "platform_id": platform.id,
-                    "direction": "forward"  # По умолчанию носом вперед
-                })
-                car_index += 1
-
-        # Затем заполняем нижнюю палубу
-        for platform in lower_platforms:
-            if car_index < len(cars):
-                placement["lower_deck"].append({
-                    "car_id": cars[car_index].id,
-                    "platform_id": platform.id,
-                    "direction": "backward"  # По умолчанию носом назад
-                })
-                car_index += 1
-
-        return placement
-
-    async def _optimize_heights(
+        cars: List[CarResponseSchema],
+        constraints: Optional[Dict[str, Any]] = None,
+        time_budget_ms: Optional[float] = None,
+        on_improvement: Optional[Callable[[PlacementResult], None]] = None,
+        cancel_event: Optional[threading.Event] = None
+    ) -> PlacementResult:
+        """Создает начальное размещение автомобилей на грузовике движком размещения"""
+        result = self.engine.search(
+            truck,
+            cars,
+            time_budget_ms=time_budget_ms or self.time_budget_ms,
+            on_improvement=on_improvement,
+            cancel_event=cancel_event,
+            options=ConstraintOptions.parse(constraints)
+        )
+        logger.info(
+            f"Поиск размещения ({result.engine}): узлов {result.nodes_explored}, "
+            f"отсечено {result.nodes_pruned}, {result.elapsed_ms:.1f} мс"
+        )
+        return result
+
+    def _optimize_heights(
         self, 
         truck: TruckResponseSchema, 
-        placement: Dict[str, Any]
+        placement: Dict[str, Any],
+        cars_by_id: Optional[Dict[str, CarResponseSchema]] = None,
+        min_clearance: Optional[float] = None
     ) -> Dict[str, Any]:
-        """Оптимизирует высоты размещения для минимизации общей высоты"""
-        # Копируем исходное размещение
-        optimized = placement.copy()
-
-        # В реальности здесь был бы сложный алгоритм оптимизации высот
-        # с учетом наклонов платформ и размещения автомобилей
+        """
+        Оптимизирует высоты размещения: выбирает направление каждого автомобиля
+        динамическим программированием вдоль палуб (см. orientation.py)
+        и добавляет эффективные высоты краев. min_clearance — пользовательский
+        минимальный зазор из constraints.
+        """
+        cars_by_id = cars_by_id or {}
+        optimized = {
+            deck: [dict(item) for item in items]
+            for deck, items in placement.items()
+        }
+        geometry = compile_truck_geometry(truck)
 
-        # Для MVP просто пытаемся оптимизировать направление автомобилей
+        # Автомобиль для каждой платформы (неизвестные автомобили не переворачиваем)
+        platform_cars: List[Any] = [None] * geometry.platform_count
         for deck in ["upper_deck", "lower_deck"]:
-            for i, placement_item in enumerate(optimized.get(deck, [])):
-                # Определяем категорию автомобиля (для расчета высоты с цепями)
-                car_category = self._determine_vehicle_category(placement_item["car_id"])
-
-                # Для некоторых автомобилей меняем направление, если это снизит высоту
-                if i % 2 == 1:  # Просто для примера меняем каждый второй
-                    optimized[deck][i]["direction"] = "backward" if placement_item["direction"] == "forward" else "forward"
-
-                # Рассчитываем эффективную высоту с учетом цепей
-                platform_id = placement_item["platform_id"]
-                platform = next(
-                    (p for p in getattr(truck, deck).platforms if p.id == platform_id), 
-                    None
-                )
-
-                if platform:
-                    platform_dict = platform.dict() if hasattr(platform, "dict") else platform
-                    adjusted = await HeightCalculationService.calculate_adjusted_heights(
-                        platform_data=platform_dict,
-                        vehicle_category=car_category
-                    )
+            for item in optimized.get(deck, []):
+                p = geometry.index.get(item["platform_id"])
+                if p is not None:
+                    platform_cars[p] = cars_by_id.get(item["car_id"])
 
-                    # Сохраняем расчетные высоты в размещении
-                    optimized[deck][i]["effective_heights"] = {
-                        "edge_a": adjusted.get("edge_a", {}).get("effective_height"),
-                        "edge_b": adjusted.get("edge_b", {}).get("effective_height")
-                    }
+        directions, summary = optimize_orientations(geometry, platform_cars, min_clearance)
+        logger.debug(f"Направления автомобилей: нехватка {summary['shortfall']}, пик {summary['peak_height']}")
 
+        for deck in ["upper_deck", "lower_deck"]:
+            for placement_item in optimized.get(deck, []):
+                car = cars_by_id.get(placement_item["car_id"])
+                p = geometry.index.get(placement_item["platform_id"])
+                if p is not None and directions[p] is not None:
+                    placement_item["direction"] = directions[p]
+                    top, _ = OrientedCar(geometry, car).evaluate(geometry, p, directions[p])
+                    placement_item["top_height"] = round(top, 3)
+
+        self._add_effective_heights(truck, optimized, cars_by_id)
         return optimized
 
+    def _add_effective_heights(
+        self,
+        truck: TruckResponseSchema,
+        placement: Dict[str, Any],
+        cars_by_id: Dict[str, CarResponseSchema]
+    ) -> None:
+        """Эффективная высота с учетом цепей (кэшированная таблица грузовика)"""
+        for deck in ["upper_deck", "lower_deck"]:
+            for placement_item in placement.get(deck, []):
+                car_category = self._determine_vehicle_category(cars_by_id.get(placement_item["car_id"]))
+                heights = effective_height_table(truck, car_category).get(placement_item["platform_id"])
+                if heights is not None:
+                    placement_item["effective_heights"] = dict(heights)
+
+    def _adjust_platforms(
+        self,
+        truck: TruckResponseSchema,
+        placement: Dict[str, Any],
+        cars_by_id: Dict[str, CarResponseSchema],
+        constraints: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Подбирает длины раздвижных платформ и положение mobile краев
+        для найденного размещения (см. adjustments.py), записывает их
+        в placement["adjustments"] и пересчитывает top_height.
+        """
+        geometry = compile_truck_geometry(truck)
+        cars: List[Any] = [None] * geometry.platform_count
+        directions: List[Optional[str]] = [None] * geometry.platform_count
+        for deck in ["upper_deck", "lower_deck"]:
+            for item in placement.get(deck, []):
+                p = geometry.index.get(item["platform_id"])
+                if p is not None:
+                    cars[p] = cars_by_id.get(item["car_id"])
+                    directions[p] = item.get("direction")
+
+        options = ConstraintOptions.parse(constraints)
+        adjustment = solve_adjustments(geometry, cars, directions, options.max_height, options.min_clearance)
+        if not adjustment.lengths and not adjustment.lifts:
+            return placement
+        for issue in adjustment.issues:
+            logger.warning(f"Настройка платформ: {issue}")
+
+        adjusted = adjustment.apply(geometry)
+        for deck in ["upper_deck", "lower_deck"]:
+            for item in placement.get(deck, []):
+                p = geometry.index.get(item["platform_id"])
+                if p is not None and cars[p] is not None and directions[p] is not None:
+                    top, _ = OrientedCar(adjusted, cars[p]).evaluate(adjusted, p, directions[p])
+                    item["top_height"] = round(top, 3)
+        placement["adjustments"] = adjustment.settings(geometry)
+        return placement
+
     async def _validate_constraints(
         self, 
         truck: TruckResponseSchema, 
         placement: Dict[str, Any], 
-        constraints: Optional[Dict[str, Any]] = None
+        constraints: Optional[Dict[str, Any]] = None,
+        cars_by_id: Optional[Dict[str, CarResponseSchema]] = None
     ) -> Dict[str, Any]:
-        """Проверяет размещение на соответствие ограничениям"""
-        issues = []
-        warnings = []
-
-        # Проверка общей критической высоты
-        max_height_inches = self._calculate_max_height(truck, placement)
-
-        # Общая критическая высота не более 14 фут 2 дюйма (170 дюймов)
-        if max_height_inches > 170:
-            issues.append(f"Critical height exceeded: {max_height_inches} inches (max: 170 inches)")
-
-        # Целевая высота 13 фут 6 дюймов (162 дюйма)
-        if max_height_inches > 162:
-            warnings.append(f"Target height exceeded: {max_height_inches} inches (target: 162 inches)")
-
-        # Проверка минимальных зазоров
-        # В реальности здесь был бы сложный алгоритм проверки зазоров
-
-        # Дополнительные пользовательские ограничения
-        if constraints:
-            # Проверка дополнительных ограничений
-            # ...
-            pass
-
-        return {
-            "valid": len(issues) == 0,
-            "issues": issues,
-            "warnings": warnings
-        }
+        """
+        Проверяет размещение на соответствие ограничениям: критическая и целевая
+        высота, min_clearance, соединения платформ, load_overhang, GVWR
+        и пользовательские ограничения (см. app/services/constraints.py).
+        """
+        validator = ConstraintValidator(truck, placement, cars_by_id, constraints)
+        result = validator.result()
+        logger.debug(f"Время проверки ограничений (мс): {result['timings']}")
+        return result
 
     def _final_optimization(
         self, 
         truck: TruckResponseSchema, 
-        placement: Dict[str, Any]
+        placement: Dict[str, Any],
+        validator: ConstraintValidator,
+        cars_by_id: Dict[str, CarResponseSchema]
     ) -> Dict[str, Any]:
-        """Финальная оптимизация размещения"""
-        # В реальности здесь был бы алгоритм финальной оптимизации
-        # с учетом всех факторов
-
-        # Для MVP просто возвращаем текущее размещение
-        return placement
-
-    async def _log_loading_experience(
+        """
+        Финальная оптимизация: исправляет нарушения ограничений перестановками
+        и разворотами автомобилей (ConstraintValidator.repair, каждый ход
+        проверяется дельтой). Настройки платформ остаются прежними —
+        валидатор проверяет ходы с ними же.
+        """
+        moves = validator.repair()
+        if not moves:
+            return placement
+        logger.info(f"Финальная оптимизация: принято ходов {moves}, нарушений {validator.error_count()}")
+
+        repaired: Dict[str, Any] = {deck: [] for deck in ["upper_deck", "lower_deck"]}
+        repaired.update(validator.placement())
+        if "adjustments" in placement:
+            repaired["adjustments"] = placement["adjustments"]
+        self._add_effective_heights(truck, repaired, cars_by_id)
+        return repaired
+
+    def _log_loading_experience(
         self, 
         truck_id: str, 
         configuration: Dict[str, Any]
     ) -> None:
-        """Логирует опыт загрузки для анализа"""
+        """
+        Логирует опыт загрузки для анализа. Запись уходит в буфер
+        и отправляется в DynamoDB в фоне, не задерживая ответ.
+        """
         experience_data = {
             "truck_id": truck_id,
             "configuration_id": configuration.get("id", str(uuid.uuid4())),
@@ -308,26 +551,23 @@ class LoadingOptimizer:
             "success": True
         }
 
-        await db.log_loading_experience(experience_data)
+        history_buffer.record(experience_data)
 
     def _calculate_max_height(
         self, 
         truck: TruckResponseSchema, 
-        placement: Dict[str, Any]
+        placement: Dict[str, Any],
+        cars_by_id: Optional[Dict[str, CarResponseSchema]] = None
     ) -> float:
-        """Рассчитывает максимальную высоту конфигурации"""
-        # В реальности здесь был бы сложный расчет высоты
-        # с учетом всех факторов
-
-        # Для MVP возвращаем фиксированное значение
-        # TODO: реализовать расчет высоты
-        return 160.0  # Пример: 160 дюймов
+        """
+        Рассчитывает максимальную высоту конфигурации: наивысшая крыша
+        автомобиля (поверхность платформы с учетом цепей и deeping + высота
+        автомобиля) или конструкция пустой платформы.
+        """
+        return HeightProfile.from_placement(truck, placement, cars_by_id).max_height
 
-    def _determine_vehicle_category(self, car_id: str) -> VehicleCategory:
+    def _determine_vehicle_category(self, car: Optional[CarResponseSchema]) -> VehicleCategory:
         """Определяет категорию автомобиля для расчета высоты с цепями"""
-        # В реальности здесь был бы анализ категории автомобиля
-        # на основе его характеристик
-
-        # Для MVP возвращаем фиксированную категорию
-        # TODO: реализовать определение категории
-        return VehicleCategory.STANDARD
\ No newline at end of file
+        if car is None:
+            return VehicleCategory.STANDARD
+        return HeightCalculationService.vehicle_category_for(car)
\ No newline at end of file
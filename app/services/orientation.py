@@ -0,0 +1,273 @@
+# app/services/orientation.py
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.services.height_calculator import HeightCalculationService
+from app.services.truck_geometry import DECKS, CompiledTruckGeometry
+
+FORWARD = "forward"
+BACKWARD = "backward"
+DIRECTIONS = (FORWARD, BACKWARD)
+
+# Высота автомобиля по умолчанию, если height_ft не заполнено (дюймы)
+DEFAULT_CAR_HEIGHT_IN = 60.0
+
+# Положение самой высокой точки крыши: доля длины автомобиля от передка
+ROOF_POSITION = 0.6
+
+NEG_INF = float("-inf")
+
+
+def car_height_in(car: Any) -> float:
+    """Высота автомобиля в дюймах (в схеме хранится в футах)"""
+    height_ft = getattr(car, "height_ft", None)
+    if height_ft is None:
+        return DEFAULT_CAR_HEIGHT_IN
+    return float(height_ft) * 12.0
+
+
+def _lerp(a: float, b: float, t: float) -> float:
+    return a + (b - a) * t
+
+
+def roof_fraction(direction: str) -> float:
+    """
+    Положение крыши вдоль платформы: 0 — край A, 1 — край B.
+    forward — передок автомобиля у края A.
+    """
+    return ROOF_POSITION if direction == FORWARD else 1.0 - ROOF_POSITION
+
+
+def oriented_top(
+    surfaces: Sequence[float],
+    p: int,
+    height: float,
+    hood: Optional[float],
+    direction: str
+) -> Tuple[float, float, float]:
+    """
+    Высоты автомобиля на наклонной платформе p при заданном направлении.
+
+    Крыша стоит на высоте опоры в точке ROOF_POSITION, капот — над
+    краем, у которого передок (hood_height_in от опоры этого края).
+
+    Returns:
+        (верхняя точка, высота крыши, высота опоры под крышей)
+    """
+    surface_a, surface_b = surfaces[2 * p], surfaces[2 * p + 1]
+    roof_surface = _lerp(surface_a, surface_b, roof_fraction(direction))
+    roof_top = roof_surface + height
+    top = roof_top
+    if hood is not None:
+        front_surface = surface_a if direction == FORWARD else surface_b
+        top = max(top, front_surface + hood)
+    return top, roof_top, roof_surface
+
+
+def oriented_headroom(
+    geometry: CompiledTruckGeometry,
+    p: int,
+    direction: str,
+    roof_top: float,
+    roof_surface: float
+) -> Optional[float]:
+    """
+    Запас по зазору между крышей и верхней платформой (в точке крыши).
+    None — над платформой ничего нет.
+    """
+    gap = geometry.clearance_gap[p]
+    if not math.isnan(gap):
+        return gap - (roof_top - roof_surface)
+    upper = geometry.upper_of[p]
+    if upper >= 0:
+        underside = _lerp(
+            geometry.edge_heights[2 * upper],
+            geometry.edge_heights[2 * upper + 1],
+            roof_fraction(direction)
+        )
+        return underside - roof_top
+    return None
+
+
+def facing_front(direction: str, edge: int) -> bool:
+    """Обращен ли к краю edge (0 — A, 1 — B) передок автомобиля"""
+    return (direction == FORWARD) == (edge == 0)
+
+
+def joint_shortfall(
+    geometry: CompiledTruckGeometry,
+    j: int,
+    car_a: Any,
+    direction_a: str,
+    car_b: Any,
+    direction_b: str
+) -> Tuple[float, bool, float]:
+    """
+    Проверка соединения платформ для двух автомобилей.
+
+    Автомобиль стоит по центру платформы: запас до края — половина разницы
+    длин (отрицательный — вынос). Если к соединению обращен хотя бы один
+    передок, капот заходит под свес соседа и допускается перекрытие до
+    max_overlap; если сходятся задние части — нужен minimum_loading_distance.
+
+    Returns:
+        (расстояние между автомобилями, вложены ли концы, нехватка в дюймах)
+    """
+    a, b = geometry.joint_a[j], geometry.joint_b[j]
+    distance = (
+        (geometry.lengths[a] - (getattr(car_a, "length_in", None) or 0.0)) / 2.0
+        + (geometry.lengths[b] - (getattr(car_b, "length_in", None) or 0.0)) / 2.0
+    )
+    nested = (
+        facing_front(direction_a, geometry.joint_edge_a[j])
+        or facing_front(direction_b, geometry.joint_edge_b[j])
+    )
+    if nested:
+        max_overlap = geometry.joint_max_overlap[j]
+        allowed = 0.0 if math.isnan(max_overlap) else max_overlap
+        return distance, nested, max(0.0, -distance - allowed)
+    min_distance = geometry.joint_min_distance[j]
+    required = 0.0 if math.isnan(min_distance) else min_distance
+    return distance, nested, max(0.0, required - distance)
+
+
+class OrientedCar:
+    """Данные автомобиля для расчета по направлениям (без Pydantic в цикле)"""
+
+    __slots__ = ("car", "height", "hood", "surfaces")
+
+    def __init__(self, geometry: CompiledTruckGeometry, car: Any):
+        self.car = car
+        self.height = car_height_in(car)
+        self.hood = getattr(car, "hood_height_in", None)
+        self.surfaces = geometry.edge_surfaces(HeightCalculationService.vehicle_category_for(car))
+
+    def evaluate(self, geometry: CompiledTruckGeometry, p: int, direction: str) -> Tuple[float, Optional[float]]:
+        """(верхняя точка, запас по зазору) на платформе p"""
+        top, roof_top, roof_surface = oriented_top(self.surfaces, p, self.height, self.hood, direction)
+        return top, oriented_headroom(geometry, p, direction, roof_top, roof_surface)
+
+    def clearance_shortfall(
+        self, geometry: CompiledTruckGeometry, p: int, direction: str, min_clearance: Optional[float] = None
+    ) -> Tuple[float, float]:
+        """(верхняя точка, нехватка зазора до min_clearance; min_clearance — пользовательский минимум)"""
+        top, headroom = self.evaluate(geometry, p, direction)
+        if headroom is None:
+            return top, 0.0
+        required = geometry.min_clearance[p]
+        if min_clearance is not None:
+            required = max(required, min_clearance)
+        return top, max(0.0, required - headroom)
+
+
+# Метка ДП: ((нехватка, пик, сумма высот), предыдущее направление, индекс метки)
+_Label = Tuple[Tuple[float, float, float], Optional[str], int]
+
+
+def _pareto(labels: List[_Label]) -> List[_Label]:
+    """Недоминируемые метки: ни одна другая не лучше по всем трем компонентам"""
+    kept: List[_Label] = []
+    for label in sorted(labels, key=lambda item: item[0]):
+        cost = label[0]
+        if not any(
+            other[0][0] <= cost[0] and other[0][1] <= cost[1] and other[0][2] <= cost[2]
+            for other in kept
+        ):
+            kept.append(label)
+    return kept
+
+
+def optimize_orientations(
+    geometry: CompiledTruckGeometry,
+    cars: Sequence[Any],
+    min_clearance: Optional[float] = None
+) -> Tuple[List[Optional[str]], Dict[str, Any]]:
+    """
+    Выбирает направление каждого автомобиля динамическим программированием
+    вдоль цепочки платформ каждой палубы.
+
+    Палубы независимы: зазор под верхней платформой зависит только от
+    направления нижнего автомобиля. Внутри палубы соседние автомобили связаны
+    через соединения платформ (joint_shortfall). Состояние ДП — направление
+    автомобиля на предыдущей платформе. Оценка (лексикографически): суммарная
+    нехватка зазоров и расстояний, пиковая высота, сумма высот.
+
+    Пик — максимум, а не сумма, поэтому одного лучшего префикса на состояние
+    недостаточно: префикс с большей нехваткой, но меньшим пиком может дать
+    лучший итог. Для каждого состояния хранится множество Парето префиксов
+    (по всем трем компонентам); результат оптимален, а множества на практике
+    малы (несколько меток на состояние).
+
+    Args:
+        geometry: Скомпилированная геометрия грузовика
+        cars: Автомобиль (или None) для каждой платформы, длина platform_count
+        min_clearance: Пользовательский минимальный зазор (поверх зазоров грузовика)
+
+    Returns:
+        (направление для каждой платформы или None, итог: shortfall, peak_height)
+    """
+    joints = {}
+    for j in range(len(geometry.joint_a)):
+        joints[(geometry.joint_a[j], geometry.joint_b[j])] = (j, False)
+        joints[(geometry.joint_b[j], geometry.joint_a[j])] = (j, True)
+
+    oriented = [OrientedCar(geometry, car) if car is not None else None for car in cars]
+    directions: List[Optional[str]] = [None] * geometry.platform_count
+    total_shortfall = 0.0
+    peak = NEG_INF
+
+    for deck in DECKS:
+        chain = [p for p in range(geometry.platform_count) if geometry.decks[p] == deck]
+        layers = []
+        # Состояние -> метки (оценка, предыдущее направление, индекс метки в нем)
+        previous: Dict[Optional[str], List[_Label]] = {None: [((0.0, NEG_INF, 0.0), None, -1)]}
+        prev_p = None
+
+        for p in chain:
+            current = {}
+            car = oriented[p]
+            link = joints.get((prev_p, p)) if prev_p is not None else None
+            for direction in (DIRECTIONS if car is not None else (None,)):
+                if car is not None:
+                    top, shortfall = car.clearance_shortfall(geometry, p, direction, min_clearance)
+                else:
+                    top, shortfall = NEG_INF, 0.0
+                labels: List[_Label] = []
+                for prev_direction, prev_labels in previous.items():
+                    pair = 0.0
+                    if link is not None and car is not None and prev_direction is not None:
+                        j, reversed_ = link
+                        if reversed_:
+                            pair = joint_shortfall(geometry, j, car.car, direction, oriented[prev_p].car, prev_direction)[2]
+                        else:
+                            pair = joint_shortfall(geometry, j, oriented[prev_p].car, prev_direction, car.car, direction)[2]
+                    for index, (cost, _, _) in enumerate(prev_labels):
+                        candidate = (
+                            cost[0] + shortfall + pair,
+                            max(cost[1], top),
+                            cost[2] + (top if car is not None else 0.0)
+                        )
+                        labels.append((candidate, prev_direction, index))
+                current[direction] = _pareto(labels)
+            layers.append((p, current))
+            previous = current
+            prev_p = p
+
+        if not layers:
+            continue
+        state, index = min(
+            ((d, i) for d, labels in previous.items() for i in range(len(labels))),
+            key=lambda key: previous[key[0]][key[1]][0]
+        )
+        cost = previous[state][index][0]
+        total_shortfall += cost[0]
+        peak = max(peak, cost[1])
+        for p, layer in reversed(layers):
+            directions[p] = state
+            _, state, index = layer[state][index]
+
+    return directions, {
+        "shortfall": round(total_shortfall, 3),
+        "peak_height": round(peak, 3) if peak > NEG_INF else None,
+    }
@@ -0,0 +1,515 @@
+# app/services/placement.py
+
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Optional, Tuple
+
+from app.models.truck.schemas import TruckResponseSchema
+from app.models.car.schemas import CarResponseSchema
+from app.services.orientation import DIRECTIONS, OrientedCar
+from app.services.truck_geometry import DECKS, CompiledTruckGeometry, compile_truck_geometry
+from app.services.weights import WeightLoad, known_weight_lb, payload_limit_lb
+
+if TYPE_CHECKING:
+    from app.services.constraints import ConstraintOptions
+
+logger = logging.getLogger(__name__)
+
+# Общая критическая высота 14 фут 2 дюйма и целевая 13 фут 6 дюймов (в дюймах)
+CRITICAL_HEIGHT_IN = 170.0
+TARGET_HEIGHT_IN = 162.0
+
+# Вес превышения целевой высоты в итоговой оценке размещения
+OVERSHOOT_WEIGHT = 0.01
+
+# Как часто (в узлах) проверяем дедлайн поиска и отмену
+DEADLINE_CHECK_INTERVAL = 256
+
+DEFAULT_DIRECTIONS = {"upper_deck": "forward", "lower_deck": "backward"}
+
+
+@dataclass
+class PlacementResult:
+    """Результат работы движка размещения."""
+    placement: Dict[str, List[Dict[str, Any]]]
+    feasible: bool
+    engine: str
+    peak_height: Optional[float] = None
+    score: Optional[float] = None
+    nodes_explored: int = 0
+    nodes_pruned: int = 0
+    elapsed_ms: float = 0.0
+    timed_out: bool = False
+    cancelled: bool = False
+    issues: List[str] = field(default_factory=list)
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика поиска для ответа API и логов"""
+        return {
+            "engine": self.engine,
+            "feasible": self.feasible,
+            "peak_height": self.peak_height,
+            "score": self.score,
+            "nodes_explored": self.nodes_explored,
+            "nodes_pruned": self.nodes_pruned,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+        }
+
+
+def build_placement(
+    geometry: CompiledTruckGeometry,
+    cars: List[Any],
+    assignment: Dict[int, int],
+    tops: Optional[List[List[Optional[float]]]] = None,
+    directions: Optional[List[List[Optional[str]]]] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Строит размещение в формате API из отображения car_index -> platform_index"""
+    placement = {deck: [] for deck in DECKS}
+    for car_index, slot_index in sorted(assignment.items(), key=lambda kv: kv[1]):
+        deck = geometry.decks[slot_index]
+        direction = None
+        if directions is not None:
+            direction = directions[car_index][slot_index]
+        item = {
+            "car_id": cars[car_index].id,
+            "platform_id": geometry.platform_ids[slot_index],
+            "direction": direction or DEFAULT_DIRECTIONS[deck]
+        }
+        if tops is not None and tops[car_index][slot_index] is not None:
+            item["top_height"] = round(tops[car_index][slot_index], 3)
+        placement[deck].append(item)
+    return placement
+
+
+def compute_tops(
+    geometry: CompiledTruckGeometry,
+    cars: List[Any],
+    max_height: float = CRITICAL_HEIGHT_IN,
+    options: Optional["ConstraintOptions"] = None
+) -> Tuple[List[List[Optional[float]]], List[str], List[List[Optional[str]]]]:
+    """
+    Для каждой пары (автомобиль, платформа) считает высоту верхней точки
+    при лучшем из двух направлений. None — пара недопустима по высоте,
+    зазору или выносу при любом направлении.
+
+    Пользовательские ограничения (options) сужают допустимые пары:
+    max_height и min_clearance ужесточают пороги, исключенные платформы
+    недоступны, автомобиль из fixed_positions допустим только на своей
+    платформе (другие автомобили туда не встанут: каждый должен получить
+    платформу, и закрепленному другой нет).
+
+    Returns:
+        (высоты, проблемы, выбранные направления)
+    """
+    tops: List[List[Optional[float]]] = []
+    directions: List[List[Optional[str]]] = []
+    issues = []
+    count = geometry.platform_count
+    lengths = geometry.lengths
+    max_overhang = geometry.max_overhang
+    min_clearance = geometry.min_clearance
+
+    blocked = [False] * count
+    fixed: Dict[str, Optional[int]] = {}
+    if options is not None:
+        max_height = min(max_height, options.max_height)
+        if options.min_clearance is not None:
+            min_clearance = [max(c, options.min_clearance) for c in min_clearance]
+        for platform_id in options.excluded_platforms:
+            if platform_id in geometry.index:
+                blocked[geometry.index[platform_id]] = True
+        car_ids = {getattr(car, "id", None) for car in cars}
+        fixed = {
+            car_id: geometry.index.get(platform_id)
+            for car_id, platform_id in options.fixed_positions.items()
+            if car_id in car_ids
+        }
+
+    for car in cars:
+        oriented = OrientedCar(geometry, car)
+        length = getattr(car, "length_in", None) or 0.0
+        row: List[Optional[float]] = []
+        row_directions: List[Optional[str]] = []
+        pinned = car.id in fixed
+        pinned_slot = fixed.get(car.id)
+
+        for p in range(count):
+            best_top, best_direction = None, None
+            if blocked[p] or (pinned and p != pinned_slot):
+                pass
+            elif length - lengths[p] <= max_overhang[p]:
+                for direction in DIRECTIONS:
+                    top, headroom = oriented.evaluate(geometry, p, direction)
+                    if top > max_height:
+                        continue
+                    if headroom is not None and headroom < min_clearance[p]:
+                        continue
+                    if best_top is None or top < best_top:
+                        best_top, best_direction = top, direction
+            row.append(best_top)
+            row_directions.append(best_direction)
+
+        if pinned and pinned_slot is None:
+            issues.append(f"Car {car.id} is fixed to unknown platform {options.fixed_positions[car.id]}")
+        elif pinned and row[pinned_slot] is None:
+            issues.append(f"Car {car.id} does not fit on fixed platform {geometry.platform_ids[pinned_slot]}")
+        elif all(t is None for t in row):
+            issues.append(f"Car {car.id} does not fit on any platform")
+        tops.append(row)
+        directions.append(row_directions)
+
+    return tops, issues, directions
+
+
+class PlacementEngine:
+    """
+    Базовый класс движка размещения.
+    Наследники реализуют search() и регистрируются в PLACEMENT_ENGINES.
+
+    Поиск работает в режиме anytime: по истечении time_budget_ms или
+    установке cancel_event возвращается лучшее найденное размещение,
+    а on_improvement вызывается для каждого улучшения (из потока поиска).
+    """
+
+    name = "base"
+
+    def __init__(
+        self,
+        max_height: float = CRITICAL_HEIGHT_IN,
+        target_height: float = TARGET_HEIGHT_IN
+    ):
+        self.max_height = max_height
+        self.target_height = target_height
+
+    def search(
+        self,
+        truck: TruckResponseSchema,
+        cars: List[CarResponseSchema],
+        time_budget_ms: Optional[float] = None,
+        axle_limits: Optional[Dict[str, float]] = None,
+        on_improvement: Optional[Callable[[PlacementResult], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        options: Optional["ConstraintOptions"] = None
+    ) -> PlacementResult:
+        """
+        options — разобранные пользовательские ограничения (ConstraintOptions);
+        axle_limits по умолчанию берутся из options.max_axle_load_lb.
+        """
+        raise NotImplementedError
+
+
+class SequentialPlacementEngine(PlacementEngine):
+    """
+    Прежний MVP-алгоритм: заполняет платформы верхней палубы по порядку,
+    затем нижней. Ограничения не проверяет.
+    """
+
+    name = "sequential"
+
+    def search(
+        self, truck, cars, time_budget_ms=None, axle_limits=None, on_improvement=None, cancel_event=None,
+        options=None
+    ) -> PlacementResult:
+        started = time.perf_counter()
+        geometry = compile_truck_geometry(truck)
+        slot_count = geometry.platform_count
+        assignment = {i: i for i in range(min(len(cars), slot_count))}
+        issues = []
+        if len(cars) > slot_count:
+            issues.append(f"Not enough platforms: {slot_count} for {len(cars)} cars")
+
+        result = PlacementResult(
+            placement=build_placement(geometry, cars, assignment),
+            feasible=not issues,
+            engine=self.name,
+            nodes_explored=len(assignment),
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            issues=issues
+        )
+        if on_improvement is not None and result.feasible:
+            on_improvement(result)
+        return result
+
+
+class BranchAndBoundPlacementEngine(PlacementEngine):
+    """
+    Поиск размещения методом ветвей и границ.
+
+    Автомобили назначаются на платформы по одному (сначала самые
+    ограниченные). Ветка отсекается, если автомобиль превышает критическую
+    высоту, не проходит по зазору под верхней платформой или по выносу,
+    а также если нижняя граница оценки не лучше уже найденного решения.
+    Оценка: пиковая высота + OVERSHOOT_WEIGHT * сумма превышений целевой высоты.
+    Загрузка тяжелее допустимой массы груза (GVWR минус масса грузовика)
+    отклоняется сразу; при заданных axle_limits ветка отсекается, как только
+    нагрузка на группу осей превышает лимит. Учитываются только известные
+    массы автомобилей (curb_weight_lb), оценки по типу кузова не отклоняют.
+    Пользовательские ограничения (options) учитываются в самом поиске:
+    пороги высоты и зазора, исключенные и закрепленные платформы,
+    max_weight_lb и целевая высота в оценке.
+    """
+
+    name = "branch_and_bound"
+
+    def search(
+        self, truck, cars, time_budget_ms=None, axle_limits=None, on_improvement=None, cancel_event=None,
+        options=None
+    ) -> PlacementResult:
+        started = time.perf_counter()
+        deadline = None
+        if time_budget_ms is not None:
+            deadline = started + time_budget_ms / 1000.0
+
+        geometry = compile_truck_geometry(truck)
+        slot_count = geometry.platform_count
+        if len(cars) > slot_count:
+            return PlacementResult(
+                placement={deck: [] for deck in DECKS},
+                feasible=False,
+                engine=self.name,
+                elapsed_ms=(time.perf_counter() - started) * 1000,
+                issues=[f"Not enough platforms: {slot_count} for {len(cars)} cars"]
+            )
+
+        tops, issues, directions = compute_tops(geometry, cars, self.max_height, options)
+        # Отклоняем только по известным массам: оценка по типу кузова дает
+        # лишь предупреждение при проверке (ConstraintValidator)
+        weights = [known_weight_lb(car) for car in cars]
+        total_weight = sum(weights)
+        payload = payload_limit_lb(truck)
+        if total_weight > payload:
+            issues.append(f"Load weight exceeded: {round(total_weight, 1)} lb (payload: {payload:g} lb)")
+        elif options is not None and options.max_weight_lb is not None and total_weight > options.max_weight_lb:
+            issues.append(
+                f"Load weight exceeded: {round(total_weight, 1)} lb (max: {options.max_weight_lb:g} lb)"
+            )
+        if axle_limits is None and options is not None:
+            axle_limits = options.max_axle_load_lb
+
+        def improved(assignment: Dict[int, int], peak: float, score: float, explored: int) -> None:
+            on_improvement(PlacementResult(
+                placement=build_placement(geometry, cars, assignment, tops, directions),
+                feasible=True,
+                engine=self.name,
+                peak_height=round(peak, 3),
+                score=round(score, 6),
+                nodes_explored=explored,
+                elapsed_ms=(time.perf_counter() - started) * 1000
+            ))
+
+        state = _SearchState(
+            self, cars, tops, deadline, geometry, weights, axle_limits,
+            on_improvement=improved if on_improvement is not None else None,
+            cancel_event=cancel_event,
+            target_height=options.target_height if options is not None else None
+        )
+        if not issues:
+            state.run()
+        else:
+            state.pruned += 1
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if state.best_assignment is None:
+            if not issues:
+                if state.cancelled:
+                    reason = "Search cancelled"
+                elif state.timed_out:
+                    reason = "Search time budget exhausted"
+                else:
+                    reason = "No feasible placement found"
+                issues.append(reason)
+            return PlacementResult(
+                placement={deck: [] for deck in DECKS},
+                feasible=False,
+                engine=self.name,
+                nodes_explored=state.explored,
+                nodes_pruned=state.pruned,
+                elapsed_ms=elapsed_ms,
+                timed_out=state.timed_out,
+                cancelled=state.cancelled,
+                issues=issues
+            )
+
+        return PlacementResult(
+            placement=build_placement(geometry, cars, state.best_assignment, tops, directions),
+            feasible=True,
+            engine=self.name,
+            peak_height=round(state.best_peak, 3),
+            score=round(state.best_score, 6),
+            nodes_explored=state.explored,
+            nodes_pruned=state.pruned,
+            elapsed_ms=elapsed_ms,
+            timed_out=state.timed_out,
+            cancelled=state.cancelled
+        )
+
+
+class _SearchState:
+    """Состояние одного запуска поиска ветвей и границ"""
+
+    def __init__(
+        self, engine, cars, tops, deadline, geometry=None, weights=None, axle_limits=None,
+        on_improvement=None, cancel_event=None, target_height=None
+    ):
+        self.target = engine.target_height if target_height is None else target_height
+        self.cars = cars
+        self.tops = tops
+        self.deadline = deadline
+        self.on_improvement = on_improvement
+        self.cancel_event = cancel_event
+
+        self.explored = 0
+        self.pruned = 0
+        self.timed_out = False
+        self.cancelled = False
+        self.best_score = float("inf")
+        self.best_peak = float("inf")
+        self.best_assignment: Optional[Dict[int, int]] = None
+
+        # Лимиты групп осей: нагрузка накапливается по плечам сил платформ
+        self.axle_load: Optional[WeightLoad] = None
+        self.axle_limits = axle_limits or {}
+        if self.axle_limits and geometry is not None:
+            self.axle_load = WeightLoad(geometry)
+            self.weights = weights
+
+        # Порядок назначения: меньше допустимых платформ -> раньше,
+        # затем выше -> раньше. Одинаковые автомобили идут подряд.
+        # При лимитах осей одинаковыми считаются только автомобили равной массы.
+        def signature(i):
+            row = tuple(-1.0 if t is None else t for t in tops[i])
+            return (row, weights[i]) if self.axle_load is not None else row
+
+        feasible_counts = [sum(t is not None for t in row) for row in tops]
+        self.order = sorted(
+            range(len(cars)),
+            key=lambda i: (feasible_counts[i], -max((t for t in tops[i] if t is not None), default=0.0), signature(i))
+        )
+        self.same_as_prev = [
+            k > 0 and signature(self.order[k]) == signature(self.order[k - 1])
+            for k in range(len(self.order))
+        ]
+        # Кандидаты для каждого автомобиля: сначала самые низкие крыши
+        self.candidates = [
+            sorted(
+                (j for j, t in enumerate(tops[i]) if t is not None),
+                key=lambda j, i=i: tops[i][j]
+            )
+            for i in self.order
+        ]
+
+    def run(self) -> None:
+        self._branch(0, 0, 0.0, 0.0, {}, -1)
+
+    def _overshoot(self, top: float) -> float:
+        return max(0.0, top - self.target)
+
+    def _lower_bound(self, depth: int, used: int, peak: float, overshoot: float) -> float:
+        """Нижняя граница оценки для оставшихся автомобилей. inf — тупик."""
+        bound_peak = peak
+        bound_over = overshoot
+        for k in range(depth, len(self.order)):
+            car_index = self.order[k]
+            best_top = None
+            for j in self.candidates[k]:
+                if not used & (1 << j):
+                    best_top = self.tops[car_index][j]
+                    break  # кандидаты отсортированы по высоте
+            if best_top is None:
+                return float("inf")
+            if best_top > bound_peak:
+                bound_peak = best_top
+            bound_over += self._overshoot(best_top)
+        return bound_peak + OVERSHOOT_WEIGHT * bound_over
+
+    @property
+    def stopped(self) -> bool:
+        return self.timed_out or self.cancelled
+
+    def _stop_requested(self) -> bool:
+        # Первый узел проверяется всегда: отмененный заранее поиск не начинается
+        if (self.explored - 1) % DEADLINE_CHECK_INTERVAL:
+            return False
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            self.cancelled = True
+        elif self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.timed_out = True
+        return self.stopped
+
+    def _branch(
+        self,
+        depth: int,
+        used: int,
+        peak: float,
+        overshoot: float,
+        assignment: Dict[int, int],
+        prev_slot: int
+    ) -> None:
+        self.explored += 1
+        if self.stopped or self._stop_requested():
+            return
+
+        if depth == len(self.order):
+            score = peak + OVERSHOOT_WEIGHT * overshoot
+            if score < self.best_score:
+                self.best_score = score
+                self.best_peak = peak
+                self.best_assignment = dict(assignment)
+                if self.on_improvement is not None:
+                    self.on_improvement(self.best_assignment, peak, score, self.explored)
+            return
+
+        if self._lower_bound(depth, used, peak, overshoot) >= self.best_score:
+            self.pruned += 1
+            return
+
+        car_index = self.order[depth]
+        symmetric = self.same_as_prev[depth]
+        for slot_index in self.candidates[depth]:
+            if used & (1 << slot_index):
+                continue
+            # Одинаковые автомобили занимают платформы в возрастающем порядке
+            if symmetric and slot_index < prev_slot:
+                self.pruned += 1
+                continue
+
+            top = self.tops[car_index][slot_index]
+            new_peak = peak if peak >= top else top
+            new_overshoot = overshoot + self._overshoot(top)
+            if new_peak + OVERSHOOT_WEIGHT * new_overshoot >= self.best_score:
+                # Кандидаты отсортированы по высоте — дальше только хуже
+                self.pruned += 1
+                break
+
+            if self.axle_load is not None:
+                self.axle_load.add(slot_index, self.weights[car_index])
+                if self.axle_load.over_limits(float("inf"), self.axle_limits):
+                    self.axle_load.remove(slot_index, self.weights[car_index])
+                    self.pruned += 1
+                    continue
+
+            assignment[car_index] = slot_index
+            self._branch(depth + 1, used | (1 << slot_index), new_peak, new_overshoot, assignment, slot_index)
+            del assignment[car_index]
+            if self.axle_load is not None:
+                self.axle_load.remove(slot_index, self.weights[car_index])
+            if self.stopped:
+                return
+
+
+PLACEMENT_ENGINES = {
+    SequentialPlacementEngine.name: SequentialPlacementEngine,
+    BranchAndBoundPlacementEngine.name: BranchAndBoundPlacementEngine,
+}
+
+
+def get_placement_engine(name: str, **kwargs) -> PlacementEngine:
+    """Возвращает движок размещения по имени"""
+    engine_cls = PLACEMENT_ENGINES.get(name)
+    if engine_cls is None:
+        raise ValueError(f"Unknown placement engine: {name}")
+    return engine_cls(**kwargs)
@@ -0,0 +1,337 @@
+# app/services/truck_geometry.py
+
+import copy
+import math
+from array import array
+
+import numpy as np
+from typing import Dict, List, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+from app.models.enums import VehicleCategory
+from app.models.truck.cache import truck_cache
+from app.models.truck.schemas import TruckResponseSchema, PlatformEdgeSchema
+from app.services.height_calculator import HeightCalculationService, CATEGORIES
+
+settings = get_settings()
+
+DECKS = ("upper_deck", "lower_deck")
+EDGE_INDEX = {"A": 0, "B": 1}
+
+NAN = float("nan")
+INF = float("inf")
+
+def edge_base_height(edge: PlatformEdgeSchema) -> float:
+    """
+    Базовая высота края. Для mobile края без height берём нижнее
+    положение (min_height), иначе верхнее (max_height).
+    """
+    if edge.height is not None:
+        return edge.height
+    if edge.min_height is not None:
+        return edge.min_height
+    return edge.max_height or 0.0
+
+
+def _opt(value: Optional[float], default: float = NAN) -> float:
+    return default if value is None else float(value)
+
+
+class CompiledTruckGeometry:
+    """
+    Геометрия грузовика, подготовленная для горячего цикла оптимизатора.
+
+    Платформы пронумерованы 0..P-1 (верхняя палуба, затем нижняя, по position).
+    Данные краев хранятся плоскими массивами длины 2P: индекс 2*p — край A,
+    2*p + 1 — край B. Отсутствующие значения — NaN (или inf для лимитов).
+    """
+
+    __slots__ = (
+        "truck_id", "updated_at", "platform_count",
+        "platform_ids", "index", "decks", "positions",
+        "default_lengths", "lengths", "max_overhang", "underside",
+        "edge_heights", "edge_has_height", "edge_min_heights", "edge_max_heights", "edge_mobile",
+        "chain_flags", "deeping", "load_overhang",
+        "slide_min_length", "slide_max_length",
+        "upper_of", "lower_of", "clearance_gap", "min_clearance",
+        "joint_a", "joint_b", "joint_edge_a", "joint_edge_b",
+        "joint_min_distance", "joint_max_overlap", "joint_static_height",
+        "lever_arms", "rear_share", "lift_min", "lift_max", "deck_total_lengths",
+        "adjacent_joints", "_effective", "_surfaces",
+    )
+
+    def __init__(self, truck: TruckResponseSchema):
+        self.truck_id = truck.id
+        self.updated_at = truck.updated_at
+
+        platforms = []
+        for deck in DECKS:
+            deck_data = getattr(truck, deck, None)
+            if deck_data and deck_data.platforms:
+                for platform in sorted(deck_data.platforms, key=lambda p: p.position):
+                    platforms.append((deck, platform))
+
+        count = len(platforms)
+        self.platform_count = count
+        self.platform_ids: List[str] = [platform.id for _, platform in platforms]
+        self.index: Dict[str, int] = {pid: i for i, pid in enumerate(self.platform_ids)}
+        self.decks: List[str] = [deck for deck, _ in platforms]
+        self.positions = array("i", (platform.position for _, platform in platforms))
+        self.default_lengths = array("d", (platform.default_length for _, platform in platforms))
+        self.slide_min_length = array("d", (
+            _opt(platform.slide.min_length if platform.slide else None) for _, platform in platforms
+        ))
+        self.slide_max_length = array("d", (
+            _opt(platform.slide.max_length if platform.slide else None) for _, platform in platforms
+        ))
+        self.lengths = array("d", (
+            platform.slide.max_length if platform.slide else platform.default_length
+            for _, platform in platforms
+        ))
+
+        edges = [edge for _, platform in platforms for edge in (platform.edge_a, platform.edge_b)]
+        self.edge_heights = array("d", (edge_base_height(edge) for edge in edges))
+        self.edge_has_height = array("b", (edge.height is not None for edge in edges))
+        self.edge_min_heights = array("d", (_opt(edge.min_height) for edge in edges))
+        self.edge_max_heights = array("d", (_opt(edge.max_height) for edge in edges))
+        self.edge_mobile = array("b", (edge.type.value == "mobile" for edge in edges))
+        self.chain_flags = array("b", (bool(edge.chains and edge.chains.is_used) for edge in edges))
+        self.deeping = array("d", (edge.deeping or 0.0 for edge in edges))
+        self.load_overhang = array("d", (_opt(edge.load_overhang) for edge in edges))
+
+        # Диапазон сдвига mobile краев от базовой высоты: mobile края платформы
+        # перемещаются вместе, в пределах min_height/max_height каждого
+        self.lift_min = array("d", [0.0] * count)
+        self.lift_max = array("d", [0.0] * count)
+        for p in range(count):
+            mobile = [e for e in (2 * p, 2 * p + 1) if self.edge_mobile[e]]
+            if not mobile:
+                continue
+            self.lift_min[p] = min(0.0, max(
+                self.edge_min_heights[e] - self.edge_heights[e] if not math.isnan(self.edge_min_heights[e]) else 0.0
+                for e in mobile
+            ))
+            self.lift_max[p] = max(0.0, min(
+                self.edge_max_heights[e] - self.edge_heights[e] if not math.isnan(self.edge_max_heights[e]) else 0.0
+                for e in mobile
+            ))
+
+        # Длина палубы (0 — не ограничена) для раздвижения платформ
+        self.deck_total_lengths: Dict[str, float] = {}
+        for deck in DECKS:
+            deck_data = getattr(truck, deck, None)
+            self.deck_total_lengths[deck] = deck_data.total_length if deck_data else 0.0
+
+        self.max_overhang = array("d")
+        self.underside = array("d")
+        for p in range(count):
+            limits = [self.load_overhang[2 * p + k] for k in (0, 1) if not math.isnan(self.load_overhang[2 * p + k])]
+            self.max_overhang.append(sum(limits) if limits else INF)
+            self.underside.append(min(self.edge_heights[2 * p], self.edge_heights[2 * p + 1]))
+
+        # Плечи сил: центр платформы от головы палубы (платформы идут по position)
+        # и доля веса на задней группе осей (палуба как балка на двух опорах)
+        self.lever_arms = array("d", [0.0] * count)
+        self.rear_share = array("d", [0.0] * count)
+        for deck in DECKS:
+            indexes = [p for p in range(count) if self.decks[p] == deck]
+            deck_length = sum(self.default_lengths[p] for p in indexes)
+            offset = 0.0
+            for p in indexes:
+                self.lever_arms[p] = offset + self.default_lengths[p] / 2.0
+                self.rear_share[p] = self.lever_arms[p] / deck_length if deck_length else 0.5
+                offset += self.default_lengths[p]
+
+        # Вертикальные связи: над какой платформой какая (-1 — нет)
+        self.upper_of = array("i", [-1] * count)
+        self.lower_of = array("i", [-1] * count)
+        self.clearance_gap = array("d", [NAN] * count)
+        self.min_clearance = array("d", [0.0] * count)
+        for connection in truck.vertical_connections or []:
+            lower = self.index.get(connection.lower_platform_id)
+            upper = self.index.get(connection.upper_platform_id)
+            if lower is None:
+                continue
+            if upper is not None:
+                self.upper_of[lower] = upper
+                self.lower_of[upper] = lower
+            if connection.clearance_profile:
+                self.clearance_gap[lower] = min(connection.clearance_profile.values())
+            self.min_clearance[lower] = connection.min_clearance
+
+        # Соединения платформ (в пределах палубы)
+        self.joint_a = array("i")
+        self.joint_b = array("i")
+        self.joint_edge_a = array("b")
+        self.joint_edge_b = array("b")
+        self.joint_min_distance = array("d")
+        self.joint_max_overlap = array("d")
+        self.joint_static_height = array("d")
+        self.adjacent_joints: List[List[int]] = [[] for _ in range(count)]
+        for deck in DECKS:
+            deck_data = getattr(truck, deck, None)
+            for joint in (deck_data.joints if deck_data else []):
+                a = self.index.get(joint.platform_a_id)
+                b = self.index.get(joint.platform_b_id)
+                if a is None or b is None:
+                    continue
+                joint_index = len(self.joint_a)
+                self.joint_a.append(a)
+                self.joint_b.append(b)
+                self.joint_edge_a.append(EDGE_INDEX.get(joint.edge_a.upper(), 1))
+                self.joint_edge_b.append(EDGE_INDEX.get(joint.edge_b.upper(), 0))
+                self.joint_min_distance.append(_opt(joint.minimum_loading_distance))
+                self.joint_max_overlap.append(_opt(joint.max_overlap))
+                self.joint_static_height.append(_opt(joint.static_height))
+                self.adjacent_joints[a].append(joint_index)
+                self.adjacent_joints[b].append(joint_index)
+
+        self._effective: Dict[VehicleCategory, array] = {}
+        self._surfaces: Dict[VehicleCategory, array] = {}
+
+    def with_settings(self, lengths: Dict[int, float], lifts: Dict[int, float]) -> "CompiledTruckGeometry":
+        """
+        Копия геометрии с выбранными длинами раздвижных платформ и сдвигом
+        mobile краев (см. adjustments.py). Исходная (кэшированная) геометрия
+        не изменяется; кэши высот копии пустые.
+        """
+        adjusted = copy.copy(self)
+        adjusted.lengths = array("d", self.lengths)
+        for p, length in lengths.items():
+            adjusted.lengths[p] = length
+        adjusted.edge_heights = array("d", self.edge_heights)
+        adjusted.underside = array("d", self.underside)
+        for p, lift in lifts.items():
+            for e in (2 * p, 2 * p + 1):
+                if self.edge_mobile[e]:
+                    adjusted.edge_heights[e] += lift
+            adjusted.underside[p] = min(adjusted.edge_heights[2 * p], adjusted.edge_heights[2 * p + 1])
+        adjusted._effective = {}
+        adjusted._surfaces = {}
+        return adjusted
+
+    # -------------------- Высоты --------------------
+
+    def effective_edge_heights(self, category: VehicleCategory) -> array:
+        """Высоты краев (2P) с учетом цепей для категории ТС. Кэшируется по категории."""
+        effective = self._effective.get(category)
+        if effective is None:
+            effective = HeightCalculationService.effective_edge_heights(
+                self.edge_heights, self.chain_flags, category
+            )
+            self._effective[category] = effective
+        return effective
+
+    def edge_surfaces(self, category: VehicleCategory) -> array:
+        """
+        Высота опоры колес у каждого края (2P): эффективная высота края
+        за вычетом deeping. Кэшируется по категории.
+        """
+        surfaces = self._surfaces.get(category)
+        if surfaces is None:
+            effective = self.effective_edge_heights(category)
+            surfaces = array("d", (height - deeping for height, deeping in zip(effective, self.deeping)))
+            self._surfaces[category] = surfaces
+        return surfaces
+
+
+_geometry_cache = LRUCache("truck_geometry", max_size=settings.TRUCK_CACHE_SIZE)
+_effective_height_cache = LRUCache("effective_heights", max_size=settings.EFFECTIVE_HEIGHT_CACHE_SIZE)
+
+
+def compile_truck_geometry(truck: TruckResponseSchema) -> CompiledTruckGeometry:
+    """
+    Возвращает скомпилированную геометрию грузовика.
+    Кэшируется по (id, updated_at) и сбрасывается при изменении грузовика.
+    """
+    key = (truck.id, truck.updated_at)
+    geometry = _geometry_cache.get(key)
+    if geometry is None:
+        geometry = CompiledTruckGeometry(truck)
+        _geometry_cache.put(key, geometry)
+    return geometry
+
+
+def effective_height_table(
+    truck: TruckResponseSchema,
+    category: VehicleCategory
+) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Таблица эффективных высот краев: platform_id -> {"edge_a": ..., "edge_b": ...}.
+    Для краев без height (mobile) — None.
+    Кэшируется по (id, updated_at, категория) и сбрасывается при изменении грузовика.
+    """
+    category = VehicleCategory(category)
+    key = (truck.id, truck.updated_at, category)
+    table = _effective_height_cache.get(key)
+    if table is None:
+        geometry = compile_truck_geometry(truck)
+        effective = geometry.effective_edge_heights(category)
+        has_height = geometry.edge_has_height
+        table = {
+            platform_id: {
+                "edge_a": effective[2 * p] if has_height[2 * p] else None,
+                "edge_b": effective[2 * p + 1] if has_height[2 * p + 1] else None,
+            }
+            for p, platform_id in enumerate(geometry.platform_ids)
+        }
+        _effective_height_cache.put(key, table)
+    return table
+
+
+def adjusted_platforms(truck: TruckResponseSchema, category: VehicleCategory) -> List[Dict]:
+    """
+    Данные платформ обеих палуб с edge_a['effective_height'] и
+    edge_b['effective_height'] из кэшированной таблицы эффективных высот.
+    """
+    table = effective_height_table(truck, category)
+    result = []
+    for deck in DECKS:
+        deck_data = getattr(truck, deck, None)
+        for platform in (deck_data.platforms if deck_data else []):
+            platform_data = platform.dict()
+            for edge_key, height in table[platform.id].items():
+                if height is not None:
+                    platform_data[edge_key]["effective_height"] = height
+            result.append(platform_data)
+    return result
+
+
+def geometry_cache_stats() -> Dict[str, Dict]:
+    """Статистика кэшей геометрии для эндпоинта метрик оптимизатора"""
+    return {
+        "truck_geometry": _geometry_cache.stats(),
+        "effective_heights": _effective_height_cache.stats(),
+    }
+
+
+def _invalidate_truck(truck_id: str) -> None:
+    _geometry_cache.invalidate_where(lambda key: key[0] == truck_id)
+    _effective_height_cache.invalidate_where(lambda key: key[0] == truck_id)
+
+
+def precompute_effective_heights(geometries: List[CompiledTruckGeometry]) -> None:
+    """
+    Заполняет эффективные высоты краев всех грузовиков для всех категорий ТС
+    одним векторным вызовом (используется при планировании парка).
+    """
+    pending = [g for g in geometries if len(g._effective) < len(CATEGORIES) and g.platform_count]
+    if not pending:
+        return
+
+    heights = np.concatenate([np.frombuffer(g.edge_heights, dtype=np.float64) for g in pending])
+    flags = np.concatenate([np.frombuffer(g.chain_flags, dtype=np.int8) for g in pending])
+    table = HeightCalculationService.batch_effective_heights(
+        heights, flags, HeightCalculationService.category_codes(CATEGORIES)
+    )
+
+    offset = 0
+    for geometry in pending:
+        size = len(geometry.edge_heights)
+        for row, category in enumerate(CATEGORIES):
+            geometry._effective[category] = array("d", table[row, offset:offset + size].tolist())
+        offset += size
+
+
+truck_cache.on_invalidate(_invalidate_truck)
@@ -0,0 +1,109 @@
+# app/services/weights.py
+
+from array import array
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.models.enums import CarBodyType
+from app.services.truck_geometry import DECKS, CompiledTruckGeometry
+
+# Снаряженная масса по типу кузова (фунты), если curb_weight_lb не заполнено
+DEFAULT_CURB_WEIGHTS_LB = {
+    CarBodyType.SEDAN: 3300.0,
+    CarBodyType.HATCHBACK: 2900.0,
+    CarBodyType.SUV: 4200.0,
+    CarBodyType.FULL_SIZE_SUV: 5600.0,
+    CarBodyType.VAN: 4800.0,
+    CarBodyType.PICKUP: 5000.0,
+    CarBodyType.UTILITY_TRUCK: 6500.0,
+}
+DEFAULT_CURB_WEIGHT_LB = 3500.0
+
+AXLE_GROUPS = ("front", "rear")
+
+
+def car_weight_known(car: Any) -> bool:
+    return getattr(car, "curb_weight_lb", None) is not None
+
+
+def known_weight_lb(car: Any) -> float:
+    """Масса для жестких проверок: только заполненная curb_weight_lb, оценка по кузову — 0"""
+    return float(car.curb_weight_lb) if car_weight_known(car) else 0.0
+
+
+def payload_limit_lb(truck: Any) -> float:
+    """
+    Допустимая масса груза. GVWR включает снаряженную массу самого грузовика,
+    поэтому из него вычитается tare_weight_lb; без нее остается GVWR целиком
+    (валидатор предупреждает, что запас по массе завышен).
+    """
+    tare = getattr(truck, "tare_weight_lb", None)
+    return truck.gvwr - tare if tare is not None else truck.gvwr
+
+
+def car_weight_lb(car: Any) -> float:
+    """Снаряженная масса автомобиля (фунты): из данных или оценка по типу кузова"""
+    weight = getattr(car, "curb_weight_lb", None)
+    if weight is not None:
+        return float(weight)
+    body_type = getattr(car, "body_type", None)
+    try:
+        return DEFAULT_CURB_WEIGHTS_LB.get(CarBodyType(body_type), DEFAULT_CURB_WEIGHT_LB)
+    except ValueError:
+        return DEFAULT_CURB_WEIGHT_LB
+
+
+class WeightLoad:
+    """
+    Нагрузка от размещенных автомобилей: общая, по палубам и по группам осей.
+    Обновляется инкрементально (add/remove) по предвычисленным плечам сил
+    CompiledTruckGeometry, без обхода размещения.
+    """
+
+    __slots__ = ("geometry", "total", "decks", "axles")
+
+    def __init__(self, geometry: CompiledTruckGeometry):
+        self.geometry = geometry
+        self.total = 0.0
+        self.decks = array("d", [0.0] * len(DECKS))
+        self.axles = array("d", [0.0] * len(AXLE_GROUPS))
+
+    def add(self, p: int, weight: float, sign: int = 1) -> None:
+        weight *= sign
+        rear = self.geometry.rear_share[p]
+        self.total += weight
+        self.decks[DECKS.index(self.geometry.decks[p])] += weight
+        self.axles[0] += weight * (1.0 - rear)
+        self.axles[1] += weight * rear
+
+    def remove(self, p: int, weight: float) -> None:
+        self.add(p, weight, -1)
+
+    def over_limits(self, gvwr: float, axle_limits: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """Превышения (фунты) по GVWR и группам осей; пустой словарь — в норме"""
+        excess = {}
+        if self.total > gvwr:
+            excess["gvwr"] = self.total - gvwr
+        for group, load in zip(AXLE_GROUPS, self.axles):
+            limit = (axle_limits or {}).get(group)
+            if limit is not None and load > limit:
+                excess[group] = load - limit
+        return excess
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_lb": round(self.total, 1),
+            "decks": {deck: round(load, 1) for deck, load in zip(DECKS, self.decks)},
+            "axle_groups": {group: round(load, 1) for group, load in zip(AXLE_GROUPS, self.axles)},
+        }
+
+
+def compute_load(
+    geometry: CompiledTruckGeometry,
+    placed: Iterable[Tuple[int, Any]]
+) -> WeightLoad:
+    """Нагрузка для пар (индекс платформы, автомобиль)"""
+    load = WeightLoad(geometry)
+    for p, car in placed:
+        if car is not None:
+            load.add(p, car_weight_lb(car))
+    return load
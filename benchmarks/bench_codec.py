@@ -0,0 +1,141 @@
+"""
+Микробенчмарк кодека записей DynamoDB на реалистичных документах грузовиков.
+
+Сравнивает прежние DynamoDB._serialize_item/_deserialize_item (рекурсия,
+проверка каждой строки «на дату», изменение входа — поэтому им отдается
+копия) с кодеками app/db/codec.py, скомпилированными по схеме.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_codec [--docs 200] [--repeat 5]
+"""
+
+import argparse
+import copy
+import timeit
+from datetime import datetime
+from typing import Any, Dict, List
+
+from app.db.codec import vehicle_codec
+from app.models.truck.schemas import TruckResponseSchema
+
+
+# -------------------- Прежняя реализация --------------------
+
+def legacy_serialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    if '_id' in item and 'id' not in item:
+        item['id'] = item.pop('_id')
+    for key, value in item.items():
+        if isinstance(value, datetime):
+            item[key] = value.isoformat()
+        elif isinstance(value, dict):
+            item[key] = legacy_serialize(value)
+        elif isinstance(value, list):
+            item[key] = [legacy_serialize(i) if isinstance(i, dict) else i for i in value]
+    return item
+
+
+def legacy_deserialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    if 'id' in item and '_id' not in item:
+        item['_id'] = item.pop('id')
+    for key, value in item.items():
+        if isinstance(value, str) and 'T' in value and value.endswith('Z'):
+            try:
+                item[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                pass
+        elif isinstance(value, dict):
+            item[key] = legacy_deserialize(value)
+        elif isinstance(value, list):
+            item[key] = [legacy_deserialize(i) if isinstance(i, dict) else i for i in value]
+    return item
+
+
+# -------------------- Документы --------------------
+
+def _edge(position: str, height: float) -> Dict[str, Any]:
+    return {
+        "position": position, "type": "static", "height": height,
+        "load_overhang": 12.0, "deeping": 1.5,
+        "chains": {"is_used": True, "max_reduction": 4.0},
+    }
+
+
+def _deck(deck_type: str, prefix: str, count: int, height: float) -> Dict[str, Any]:
+    platforms = [
+        {
+            "id": f"{prefix}{i}", "deck_type": deck_type, "position": i, "default_length": 200.0,
+            "edge_a": _edge("A", height), "edge_b": _edge("B", height - 2.0),
+            "slide": {
+                "type": "platform_slide", "min_length": 180.0, "max_length": 230.0,
+                "min_distance": 0.0, "max_distance": 50.0,
+            },
+        }
+        for i in range(1, count + 1)
+    ]
+    joints = [
+        {
+            "type": "static_joint", "platform_a_id": f"{prefix}{i}", "platform_b_id": f"{prefix}{i + 1}",
+            "edge_a": "B", "edge_b": "A", "minimum_loading_distance": 6.0, "max_overlap": 20.0,
+        }
+        for i in range(1, count)
+    ]
+    return {"type": deck_type, "platforms": platforms, "joints": joints, "total_length": 200.0 * count}
+
+
+def truck_documents(count: int) -> List[Dict[str, Any]]:
+    docs = []
+    for n in range(count):
+        truck = TruckResponseSchema(
+            _id=f"truck-{n}", nickname=f"Stinger {n}", model="Cottrell", year=2022,
+            truck_type="stinger_head", coupling_type="5th_wheel", gvwr=80000.0,
+            loading_spots=10, deck_count=2,
+            upper_deck=_deck("upper_deck", "U", 5, 100.0),
+            lower_deck=_deck("lower_deck", "L", 5, 30.0),
+            vertical_connections=[
+                {
+                    "upper_platform_id": f"U{i}", "lower_platform_id": f"L{i}",
+                    "clearance_profile": {"front": 64.0, "middle": 62.5, "rear": 63.0}, "min_clearance": 6,
+                }
+                for i in range(1, 6)
+            ],
+            type="truck", created_at=datetime(2024, 1, 1), updated_at=datetime(2024, 6, 1, 12, 30),
+            is_verified=True, ai_loader_ready=True,
+        )
+        docs.append(truck.dict())
+    return docs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = truck_documents(args.docs)
+    items = [vehicle_codec(doc).encode(doc) for doc in docs]
+    # Прежний формат чтения: даты с «Z», как их ожидал _deserialize_item
+    legacy_items = [dict(item, created_at=item["created_at"] + "Z", updated_at=item["updated_at"] + "Z") for item in items]
+
+    cases = {
+        "serialize (legacy)": lambda: [legacy_serialize(copy.deepcopy(doc)) for doc in docs],
+        "serialize (codec)": lambda: [vehicle_codec(doc).encode(doc) for doc in docs],
+        "deserialize (legacy)": lambda: [legacy_deserialize(copy.deepcopy(item)) for item in legacy_items],
+        "deserialize (codec)": lambda: [vehicle_codec(item).decode(item) for item in items],
+    }
+    timings = {}
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        timings[name] = best
+        print(f"{name:<22} {best * 1e6 / len(docs):9.1f} us/doc")
+
+    for operation in ("serialize", "deserialize"):
+        legacy, codec = timings[f"{operation} (legacy)"], timings[f"{operation} (codec)"]
+        print(f"{operation}: x{legacy / codec:.2f}")
+    print(
+        "Примечание: прежней реализации нужен deepcopy, так как она изменяет вход; "
+        "кодек дополнительно переводит float <-> Decimal, чего прежняя реализация не делала."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -13,12 +13,15 @@ from json import JSONEncoder
 
 # Подключение к БД (синглтон)
 from app.db.dynamodb import db
+from app.core.cache import cache_stats
 
 # Импорт ваших роутеров
 # Обратите внимание: в files:
 #   cars.py -> APIRouter(prefix="/cars")
 #   trucks.py -> APIRouter(prefix="/trucks")
 #   trailers.py -> APIRouter(prefix="/trailers")
+#   optimizer.py -> APIRouter(prefix="/optimizer")
+#   export.py -> APIRouter(prefix="/export")
 #
 # Здесь мы подключим их все через prefix="/api" —
 # таким образом итоговые адреса будут:
@@ -28,6 +31,11 @@ from app.db.dynamodb import db
 from app.api.endpoints.cars import router as cars_router
 from app.api.endpoints.trucks import router as trucks_router
 from app.api.endpoints.trailers import router as trailers_router
+from app.api.endpoints.optimizer import router as optimizer_router
+from app.api.endpoints.export import router as export_router
+from app.services.executor import shutdown_optimization_executor
+from app.services.jobs import job_queue
+from app.services.history_buffer import history_buffer
 
 logger = logging.getLogger(__name__)
 
@@ -51,12 +59,18 @@ async def lifespan(app: FastAPI):
         if not connected:
             raise Exception("Failed to connect to DynamoDB")
         logger.info("DynamoDB connected.")
+        await history_buffer.start()
+        await job_queue.start()
         yield
     except Exception as e:
         logger.error(f"Critical error: {str(e)}")
         raise
     finally:
         try:
+            await job_queue.stop()
+            # Досылаем буфер истории загрузок до закрытия соединения
+            await history_buffer.stop()
+            shutdown_optimization_executor()
             await db.close_database_connection()
             logger.info("DynamoDB disconnected.")
         except Exception as e:
@@ -101,15 +115,35 @@ async def root():
     return HTMLResponse(content=content)
 
 
+@app.get("/api/db/pool-stats")
+async def db_pool_stats():
+    """
+    Статистика пула соединений DynamoDB (занято, ожидания, пересозданные).
+    """
+    return db.pool_stats()
+
+
+@app.get("/api/cache/stats")
+async def caches_stats():
+    """
+    Статистика in-process кэшей (hit/miss/eviction) этого воркера.
+    """
+    return cache_stats()
+
+
 # Подключаем роутеры:
 # В самих routers у вас prefix="/cars" / "/trucks" / "/trailers"
 # Здесь задаём общий prefix="/api", итого в итоге получим:
 #   /api/cars
 #   /api/trucks
 #   /api/trailers
-app.include_router(cars_router,     prefix="/api", tags=["cars"])
-app.include_router(trucks_router,   prefix="/api", tags=["trucks"])
-app.include_router(trailers_router, prefix="/api", tags=["trailers"])
+#   /api/optimizer
+#   /api/export
+app.include_router(cars_router,      prefix="/api", tags=["cars"])
+app.include_router(trucks_router,    prefix="/api", tags=["trucks"])
+app.include_router(trailers_router,  prefix="/api", tags=["trailers"])
+app.include_router(optimizer_router, prefix="/api", tags=["optimizer"])
+app.include_router(export_router,    prefix="/api", tags=["export"])
 
 
 if __name__ == "__main__":
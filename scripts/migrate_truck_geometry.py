@@ -0,0 +1,65 @@
+"""
+Перезапись геометрии существующих грузовиков в заданный формат хранения.
+
+"blob" — палубы и вертикальные связи упаковываются в один бинарный атрибут
+geometry_blob (app/db/geometry_blob.py), "map" — обратно во вложенные атрибуты.
+Чтение поддерживает оба формата, поэтому миграцию можно выполнять на работающем
+сервисе; грузовики, изменённые во время миграции, пропускаются (условная запись).
+
+Запуск из корня репозитория:
+    python -m scripts.migrate_truck_geometry --to blob [--dry-run]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import Dict
+
+from app.core.config import get_settings
+from app.db.dynamodb import db
+from app.db.geometry_blob import GEOMETRY_FIELDS, STORAGE_BLOB, STORAGE_MAP, pack_geometry_blob
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+async def migrate(storage: str, dry_run: bool = False) -> Dict[str, int]:
+    """Переписывает все грузовики; возвращает счетчики и оценку размера геометрии"""
+    stats = {"trucks": 0, "rewritten": 0, "skipped": 0, "map_bytes": 0, "blob_bytes": 0}
+    async for truck in db.iter_vehicles("truck"):
+        stats["trucks"] += 1
+        geometry = {key: truck[key] for key in GEOMETRY_FIELDS if truck.get(key) is not None}
+        stats["map_bytes"] += len(json.dumps(geometry, separators=(",", ":"), default=str))
+        stats["blob_bytes"] += len(pack_geometry_blob(geometry, settings.TRUCK_GEOMETRY_COMPRESSION))
+        if dry_run:
+            continue
+        if await db.rewrite_truck_geometry(truck, storage):
+            stats["rewritten"] += 1
+        else:
+            stats["skipped"] += 1
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--to", dest="storage", choices=(STORAGE_BLOB, STORAGE_MAP), required=True)
+    parser.add_argument("--dry-run", action="store_true", help="только оценить размер, ничего не записывать")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not await db.connect_to_database():
+        raise SystemExit("Не удалось подключиться к DynamoDB")
+    try:
+        stats = await migrate(args.storage, args.dry_run)
+    finally:
+        await db.close_database_connection()
+
+    print(
+        f"Грузовиков: {stats['trucks']}, переписано: {stats['rewritten']}, пропущено: {stats['skipped']}"
+    )
+    print(f"Геометрия: ~{stats['map_bytes']} байт как map, {stats['blob_bytes']} байт как blob")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+import pytest
+from datetime import datetime
+
+from app.models.truck.schemas import TruckResponseSchema
+from app.models.car.schemas import CarResponseSchema
+
+
+def _edge(position, height, **extra):
+    edge = {"position": position, "type": "static", "height": height}
+    edge.update(extra)
+    return edge
+
+
+def _platform(platform_id, deck_type, position, height_a, height_b, **extra):
+    platform = {
+        "id": platform_id,
+        "deck_type": deck_type,
+        "position": position,
+        "default_length": 200.0,
+        "edge_a": _edge("A", height_a),
+        "edge_b": _edge("B", height_b),
+    }
+    platform.update(extra)
+    return platform
+
+
+@pytest.fixture
+def stinger_truck():
+    """
+    Стингер на 9 мест: 4 платформы сверху, 5 снизу.
+    Над L1 (голова) верхней платформы нет — туда встают высокие ТС.
+    """
+    upper = [_platform(f"U{i}", "upper_deck", i, 100.0, 98.0) for i in range(1, 5)]
+    lower = [_platform(f"L{i}", "lower_deck", i, 30.0, 32.0) for i in range(1, 6)]
+    connections = [
+        {"upper_platform_id": f"U{i}", "lower_platform_id": f"L{i + 1}", "min_clearance": 6}
+        for i in range(1, 5)
+    ]
+    return TruckResponseSchema(
+        _id="truck-1",
+        nickname="Test Stinger",
+        model="Cottrell",
+        year=2022,
+        truck_type="stinger_head",
+        coupling_type="5th_wheel",
+        gvwr=80000.0,
+        loading_spots=9,
+        deck_count=2,
+        upper_deck={"type": "upper_deck", "platforms": upper, "total_length": 800.0},
+        lower_deck={"type": "lower_deck", "platforms": lower, "total_length": 1000.0},
+        vertical_connections=connections,
+        type="truck",
+        created_at=datetime(2024, 1, 1),
+        updated_at=datetime(2024, 1, 1),
+        is_verified=True,
+        ai_loader_ready=True,
+    )
+
+
+@pytest.fixture
+def make_car():
+    def factory(car_id, height_ft, body_type="sedan", length_in=190.0, **extra):
+        data = {
+            "id": car_id,
+            "make": "Test",
+            "model": "Car",
+            "height_ft": height_ft,
+            "length_in": length_in,
+            "width_in": 72.0,
+            "wheelbase_in": 110.0,
+            "body_type": body_type,
+        }
+        data.update(extra)
+        return CarResponseSchema(**data)
+    return factory
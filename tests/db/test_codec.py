@@ -0,0 +1,43 @@
+import copy
+from decimal import Decimal
+
+from app.db.codec import CONFIGURATION_CODEC, TRUCK_CODEC, vehicle_codec
+from app.models.truck.schemas import TruckResponseSchema
+
+
+def test_truck_round_trip_does_not_mutate_input(stinger_truck):
+    doc = stinger_truck.dict()
+    doc["type"] = "truck"
+    original = copy.deepcopy(doc)
+
+    item = vehicle_codec(doc).encode(doc)
+
+    assert doc == original
+    assert isinstance(item["gvwr"], Decimal)
+    assert item["created_at"] == "2024-01-01T00:00:00"
+    platform = item["upper_deck"]["platforms"][0]
+    # id вложенных платформ не переименовывается, высоты краев — Decimal
+    assert platform["id"] == "U1"
+    assert platform["edge_a"]["height"] == Decimal("100.0")
+
+    decoded = TRUCK_CODEC.decode(item)
+    assert decoded["_id"] == "truck-1"
+    assert decoded["created_at"] == stinger_truck.created_at
+    assert decoded["loading_spots"] == 9 and isinstance(decoded["loading_spots"], int)
+    assert TruckResponseSchema(**decoded) == stinger_truck
+
+
+def test_schemaless_fields_are_converted():
+    item = {
+        "id": "cfg-1",
+        "created_at": "2024-01-01T10:00:00Z",
+        "placement": {"upper_deck": [{"platform_id": "U1", "top_height": Decimal("151.2"), "slot": Decimal("2")}]},
+    }
+
+    decoded = CONFIGURATION_CODEC.decode(item)
+
+    assert decoded["_id"] == "cfg-1"
+    assert decoded["created_at"].year == 2024
+    placed = decoded["placement"]["upper_deck"][0]
+    assert placed == {"platform_id": "U1", "top_height": 151.2, "slot": 2}
+    assert isinstance(item["placement"]["upper_deck"][0]["top_height"], Decimal)
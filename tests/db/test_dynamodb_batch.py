@@ -0,0 +1,51 @@
+import pytest
+
+from app.db import dynamodb as dynamodb_module
+from app.db.dynamodb import DynamoDB, VehiclesUnavailableError
+
+
+class FakeResource:
+    """Имитация ресурса DynamoDB: первый ответ возвращает часть ключей как необработанные"""
+
+    def __init__(self, unprocessed_rounds=1):
+        self.calls = []
+        self.unprocessed_rounds = unprocessed_rounds
+
+    async def batch_get_item(self, RequestItems):
+        keys = RequestItems["vehicles"]["Keys"]
+        self.calls.append(len(keys))
+        if self.unprocessed_rounds and len(keys) > 1:
+            self.unprocessed_rounds -= 1
+            done, rest = keys[:1], keys[1:]
+            return {
+                "Responses": {"vehicles": [{"id": k["id"], "type": "car"} for k in done]},
+                "UnprocessedKeys": {"vehicles": {"Keys": rest}},
+            }
+        return {"Responses": {"vehicles": [{"id": k["id"], "type": "car"} for k in keys]}}
+
+
+@pytest.mark.asyncio
+async def test_batch_get_retries_unprocessed_keys(monkeypatch):
+    """Необработанные ключи дочитываются повторным запросом"""
+    monkeypatch.setattr(dynamodb_module, "BATCH_RETRY_BASE_DELAY", 0)
+    resource = FakeResource(unprocessed_rounds=1)
+
+    items = await DynamoDB()._batch_get_chunk(resource, "vehicles", ["c1", "c2", "c3"])
+
+    assert sorted(item["id"] for item in items) == ["c1", "c2", "c3"]
+    assert resource.calls == [3, 2]
+
+
+@pytest.mark.asyncio
+async def test_batch_get_raises_when_keys_stay_unprocessed(monkeypatch):
+    """Ключи, не прочитанные после всех повторов, не выдаются за отсутствующие"""
+    monkeypatch.setattr(dynamodb_module, "BATCH_RETRY_BASE_DELAY", 0)
+    attempts = dynamodb_module.BATCH_MAX_RETRIES + 1
+    resource = FakeResource(unprocessed_rounds=attempts)
+    ids = [f"c{i}" for i in range(attempts + 2)]
+
+    with pytest.raises(VehiclesUnavailableError) as error:
+        await DynamoDB()._batch_get_chunk(resource, "vehicles", ids)
+
+    # Каждая попытка дочитывает один ключ; оставшиеся перечислены в ошибке
+    assert error.value.vehicle_ids == ids[attempts:]
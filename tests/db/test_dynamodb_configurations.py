@@ -0,0 +1,48 @@
+import pytest
+from contextlib import asynccontextmanager
+
+from botocore.exceptions import ClientError
+
+from app.db.dynamodb import DynamoDB
+
+
+class FakeTable:
+    """Условная запись: put_item с attribute_not_exists(id) не перезаписывает элемент"""
+
+    def __init__(self):
+        self.items = {}
+        self.puts = []
+
+    async def put_item(self, Item, **kwargs):
+        self.puts.append(kwargs)
+        if kwargs.get("ConditionExpression") == "attribute_not_exists(id)" and Item["id"] in self.items:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem")
+        self.items[Item["id"]] = Item
+
+
+class FakePool:
+    def __init__(self, table):
+        self._table = table
+
+    @asynccontextmanager
+    async def table(self, name):
+        yield self._table
+
+
+@pytest.mark.asyncio
+async def test_configuration_with_hash_is_saved_once():
+    table = FakeTable()
+    db = DynamoDB()
+    db.pool = FakePool(table)
+    configuration = {"truck_id": "truck-1", "placement": {}, "configuration_hash": "abc123"}
+
+    first = await db.save_configuration(dict(configuration, id="random-id"))
+    second = await db.save_configuration(configuration)
+
+    assert first == second == "abc123"
+    assert list(table.items) == ["abc123"]
+    assert len(table.puts) == 2
+
+    # Без хэша — прежнее поведение: безусловная запись со своим id
+    legacy_id = await db.save_configuration({"truck_id": "truck-1", "placement": {}})
+    assert legacy_id in table.items and "ConditionExpression" not in table.puts[-1]
@@ -0,0 +1,98 @@
+import pytest
+from contextlib import asynccontextmanager
+
+from botocore.exceptions import ClientError
+
+from app.db.dynamodb import DynamoDB
+
+
+class FakeTable:
+    def __init__(self):
+        self.query_kwargs = None
+
+    async def query(self, **kwargs):
+        self.query_kwargs = kwargs
+        return {
+            "Items": [{"id": "car1", "type": "car"}],
+            "LastEvaluatedKey": {"id": "car1", "type": "car"},
+        }
+
+
+class FakePool:
+    def __init__(self, table):
+        self._table = table
+
+    @asynccontextmanager
+    async def table(self, name):
+        yield self._table
+
+
+@pytest.mark.asyncio
+async def test_page_queries_type_index_and_returns_cursor():
+    """Страница читается через type-index, курсор продолжает с LastEvaluatedKey"""
+    table = FakeTable()
+    db = DynamoDB()
+    db.pool = FakePool(table)
+
+    items, cursor = await db.list_vehicles_page("car", limit=1)
+    assert [item["_id"] for item in items] == ["car1"]
+    assert table.query_kwargs["IndexName"] == "type-index"
+    assert table.query_kwargs["Limit"] == 1
+
+    await db.list_vehicles_page("car", limit=1, cursor=cursor)
+    assert table.query_kwargs["ExclusiveStartKey"] == {"id": "car1", "type": "car"}
+
+
+class FailingTable:
+    def __init__(self, code):
+        self.code = code
+
+    async def query(self, **kwargs):
+        raise ClientError({"Error": {"Code": self.code, "Message": "boom"}}, "Query")
+
+
+@pytest.mark.asyncio
+async def test_page_errors_are_not_reported_as_end_of_list():
+    """Ошибка DynamoDB не превращается в пустую последнюю страницу"""
+    db = DynamoDB()
+    db.pool = FakePool(FailingTable("ProvisionedThroughputExceededException"))
+    with pytest.raises(ClientError):
+        await db.list_vehicles_page("car")
+
+    # Курсор другого списка и курсор, отвергнутый DynamoDB, — ошибка клиента
+    truck_cursor = DynamoDB._encode_cursor({"id": "truck1", "type": "truck"})
+    with pytest.raises(ValueError):
+        await db.list_vehicles_page("car", cursor=truck_cursor)
+    db.pool = FakePool(FailingTable("ValidationException"))
+    with pytest.raises(ValueError):
+        await db.list_vehicles_page("car", cursor=DynamoDB._encode_cursor({"id": "c", "type": "car"}))
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        DynamoDB._decode_cursor("not-a-cursor")
+
+
+class FakeScanTable:
+    """Scan отдает две страницы"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def scan(self, **kwargs):
+        self.calls.append(kwargs)
+        if "ExclusiveStartKey" not in kwargs:
+            return {"Items": [{"id": "car1"}, {"id": "truck1"}], "LastEvaluatedKey": {"id": "truck1"}}
+        return {"Items": [{"id": "car2"}]}
+
+
+@pytest.mark.asyncio
+async def test_iter_vehicles_follows_pages():
+    table = FakeScanTable()
+    db = DynamoDB()
+    db.pool = FakePool(table)
+
+    ids = [doc["_id"] async for doc in db.iter_vehicles(page_size=2)]
+
+    assert ids == ["car1", "truck1", "car2"]
+    assert [call["Limit"] for call in table.calls] == [2, 2]
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+
+from app.db.pool import DynamoResourcePool
+
+
+class FakeResourceContext:
+    opened = 0
+    closed = 0
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    async def __aenter__(self):
+        FakeResourceContext.opened += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        FakeResourceContext.closed += 1
+
+    async def Table(self, name):
+        return f"table:{name}"
+
+
+class FakeSession:
+    def resource(self, service, **kwargs):
+        return FakeResourceContext(**kwargs)
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    FakeResourceContext.opened = 0
+    FakeResourceContext.closed = 0
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_resource_and_tables():
+    """Последовательные запросы используют один и тот же resource"""
+    pool = DynamoResourcePool(FakeSession(), ["vehicles"], size=2)
+    await pool.open()
+
+    for _ in range(5):
+        async with pool.table("vehicles") as table:
+            assert table == "table:vehicles"
+
+    assert FakeResourceContext.opened == 1
+    assert pool.stats()["in_use"] == 0
+
+    await pool.close()
+    assert FakeResourceContext.closed == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_counts_waits_when_saturated():
+    pool = DynamoResourcePool(FakeSession(), ["vehicles"], size=1)
+    await pool.open()
+    release = asyncio.Event()
+
+    async def holder():
+        async with pool.table("vehicles"):
+            await release.wait()
+
+    task = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(pool.table("vehicles").__aenter__())
+    await asyncio.sleep(0)
+    assert pool.stats()["waits"] == 1
+
+    release.set()
+    await task
+    await waiter
+    assert pool.stats()["in_use"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_resource_is_recycled(monkeypatch):
+    pool = DynamoResourcePool(FakeSession(), ["vehicles"], size=1, keepalive=10)
+    await pool.open()
+
+    now = {"value": 1000.0}
+    monkeypatch.setattr("app.db.pool.time.monotonic", lambda: now["value"])
+    pool._idle[0].created_at = 0.0
+
+    async with pool.table("vehicles"):
+        pass
+
+    assert pool.stats()["recycled"] == 1
+    assert FakeResourceContext.opened == 2
@@ -0,0 +1,79 @@
+import pytest
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
+from app.db.dynamodb import DynamoDB
+from app.models.car import crud as car_crud_module
+from app.models.car.records import CAR_RECORD_FIELDS, CarRecord
+from app.models.enums import CarBodyType
+
+
+class FakeTable:
+    def __init__(self):
+        self.get_kwargs = None
+
+    async def get_item(self, **kwargs):
+        self.get_kwargs = kwargs
+        return {"Item": {"id": "car1", "type": "car", "height_ft": Decimal("5.5"), "body_type": "suv"}}
+
+
+class FakePool:
+    def __init__(self, table):
+        self._table = table
+
+    @asynccontextmanager
+    async def table(self, name):
+        yield self._table
+
+
+@pytest.mark.asyncio
+async def test_get_vehicle_reads_only_projected_attributes():
+    """ProjectionExpression через плейсхолдеры; id и type читаются всегда"""
+    table = FakeTable()
+    db = DynamoDB()
+    db.pool = FakePool(table)
+
+    await db.get_vehicle("car1", attributes=["height_ft", "type"])
+
+    names = table.get_kwargs["ExpressionAttributeNames"]
+    assert sorted(names.values()) == ["height_ft", "id", "type"]
+    assert table.get_kwargs["ProjectionExpression"] == ", ".join(names)
+
+    await db.get_vehicle("car1")
+    assert "ProjectionExpression" not in table.get_kwargs
+
+
+@pytest.mark.asyncio
+async def test_get_car_records_builds_slotted_records(monkeypatch):
+    requested = {}
+
+    async def fake_get_vehicles(ids, attributes=None):
+        requested["attributes"] = attributes
+        return {
+            "car1": {"_id": "car1", "type": "car", "height_ft": 5.5, "body_type": "suv"},
+            "truck1": {"_id": "truck1", "type": "truck"},
+        }
+
+    monkeypatch.setattr(car_crud_module.db, "get_vehicles", fake_get_vehicles)
+
+    records = await car_crud_module.car_crud.get_car_records(["car1", "truck1"])
+
+    assert requested["attributes"] == CAR_RECORD_FIELDS
+    assert list(records) == ["car1"]
+    record = records["car1"]
+    assert isinstance(record, CarRecord) and not hasattr(record, "__dict__")
+    assert record.id == "car1" and record.height_ft == 5.5
+    assert record.body_type is CarBodyType.SUV
+
+
+@pytest.mark.asyncio
+async def test_get_car_keeps_id_from_decoded_document(monkeypatch):
+    """Кодек отдает _id; CarResponseSchema получает его в поле id"""
+    async def fake_get_vehicle(car_id, attributes=None):
+        return {"_id": car_id, "type": "car", "make": "Test", "height_ft": 4.8}
+
+    monkeypatch.setattr(car_crud_module.db, "get_vehicle", fake_get_vehicle)
+
+    car = await car_crud_module.car_crud.get_car("car1")
+
+    assert car.id == "car1"
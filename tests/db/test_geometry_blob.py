@@ -0,0 +1,43 @@
+import copy
+
+from app.core.config import get_settings
+from app.db.dynamodb import DynamoDB
+from app.db.geometry_blob import (
+    GEOMETRY_BLOB_FIELD,
+    GEOMETRY_FIELDS,
+    HEADER,
+    pack_geometry,
+    unpack_geometry_blob
+)
+from app.models.truck.schemas import TruckResponseSchema
+
+
+def test_geometry_blob_round_trip_is_compact(stinger_truck):
+    doc = stinger_truck.dict()
+    original = copy.deepcopy(doc)
+
+    packed = pack_geometry(doc, "zlib")
+
+    assert doc == original
+    assert not any(key in packed for key in GEOMETRY_FIELDS)
+    blob = packed[GEOMETRY_BLOB_FIELD]
+    # Сжатый блок меньше несжатого
+    assert len(blob) < len(pack_geometry(doc, "none")[GEOMETRY_BLOB_FIELD])
+    assert HEADER.unpack_from(blob)[0] == b"TG"
+    assert unpack_geometry_blob(blob) == {key: original[key] for key in GEOMETRY_FIELDS}
+
+
+def test_dynamodb_reads_both_storage_formats(stinger_truck, monkeypatch):
+    doc = stinger_truck.dict()
+    doc["type"] = "truck"
+    db = DynamoDB()
+
+    monkeypatch.setattr(get_settings(), "TRUCK_GEOMETRY_STORAGE", "map")
+    as_map = db._serialize_item(doc)
+    monkeypatch.setattr(get_settings(), "TRUCK_GEOMETRY_STORAGE", "blob")
+    as_blob = db._serialize_item(doc)
+
+    assert "upper_deck" in as_map and GEOMETRY_BLOB_FIELD not in as_map
+    assert GEOMETRY_BLOB_FIELD in as_blob and "upper_deck" not in as_blob
+    for item in (as_map, as_blob):
+        assert TruckResponseSchema(**db._deserialize_item(item)) == stinger_truck
@@ -0,0 +1,58 @@
+import pytest
+
+from app.models.enums import EdgeType
+from app.models.truck.schemas import PlatformSlideSchema
+from app.services.adjustments import solve_adjustments
+from app.services.height_profile import HeightProfile
+from app.services.truck_geometry import compile_truck_geometry
+
+
+def test_mobile_platform_is_raised_for_clearance(stinger_truck, make_car):
+    truck = stinger_truck.copy(deep=True, update={"id": "truck-mobile"})
+    u2 = truck.upper_deck.platforms[1]
+    for edge in (u2.edge_a, u2.edge_b):
+        edge.type, edge.height, edge.min_height, edge.max_height = EdgeType.MOBILE, None, 90.0, 110.0
+    geometry = compile_truck_geometry(truck)
+    cars = [None] * geometry.platform_count
+    directions = [None] * geometry.platform_count
+    l3 = geometry.index["L3"]
+    cars[l3], directions[l3] = make_car("a", 4.8), "forward"
+
+    result = solve_adjustments(geometry, cars, directions)
+
+    # Крыша на 31.2 + 57.6 = 88.8", нужно 6" зазора — низ U2 на 94.8"
+    settings = result.settings(geometry)["U2"]
+    assert settings["edge_a_height"] == pytest.approx(94.8)
+    assert settings["edge_b_height"] == pytest.approx(94.8)
+    assert not result.issues
+
+    placement = {
+        "lower_deck": [{"platform_id": "L3", "car_id": "a", "direction": "forward"}],
+        "adjustments": result.settings(geometry),
+    }
+    profile = HeightProfile.from_placement(truck, placement, {"a": cars[l3]})
+    assert profile.headroom(l3) == pytest.approx(6.0)
+
+    # Пользовательский min_clearance больше зазора грузовика — подъем выше
+    result = solve_adjustments(geometry, cars, directions, min_clearance=10.0)
+    assert result.settings(geometry)["U2"]["edge_a_height"] == pytest.approx(98.8)
+
+
+def test_slides_shrink_where_spare_is_largest(stinger_truck, make_car):
+    truck = stinger_truck.copy(deep=True, update={"id": "truck-slides"})
+    for platform in truck.upper_deck.platforms[:2]:
+        platform.slide = PlatformSlideSchema(
+            type="platform_slide", min_length=180.0, max_length=240.0, min_distance=0.0, max_distance=60.0
+        )
+    geometry = compile_truck_geometry(truck)
+    cars = [None] * geometry.platform_count
+    cars[geometry.index["U1"]] = make_car("a", 4.8, length_in=150.0)
+    cars[geometry.index["U2"]] = make_car("b", 4.8, length_in=200.0)
+
+    result = solve_adjustments(geometry, cars, [None] * geometry.platform_count)
+
+    # 800" палубы - 400" у U3, U4: короткий автомобиль отдает длину до min_length
+    settings = result.settings(geometry)
+    assert settings["U1"]["length"] == pytest.approx(180.0)
+    assert settings["U2"]["length"] == pytest.approx(220.0)
+    assert not result.issues
@@ -0,0 +1,98 @@
+import io
+import json
+import asyncio
+import pytest
+
+from app.services import car_import
+from app.services.car_import import CarImportService
+
+
+class FakeDB:
+    def __init__(self, fail_ids=()):
+        self.batches = []
+        self.fail_ids = set(fail_ids)
+        self.error = None
+
+    async def batch_write_items(self, table_name, items):
+        self.batches.append(len(items))
+        if self.error is not None:
+            raise self.error
+        return [item for item in items if item["vin"] in self.fail_ids]
+
+
+def _reader(text):
+    stream = io.BytesIO(text.encode("utf-8"))
+
+    async def read(size):
+        return stream.read(size)
+    return read
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(car_import, "db", db)
+    return db
+
+
+@pytest.mark.asyncio
+async def test_csv_import_writes_in_batches_and_reports_bad_rows(fake_db):
+    header = "vin,year,make,model,length_in,width_in,height_ft,wheelbase_in,lot_number\n"
+    rows = [f"VIN{i},2020,Toyota,Camry,192,72,4.8,111,L{i}\n" for i in range(30)]
+    rows.insert(5, "BAD,not-a-year,Toyota,Camry,192,72,4.8,111,\n")
+
+    report = await CarImportService(writers=1).import_upload(_reader(header + "".join(rows)), "csv")
+
+    assert report["total_rows"] == 31
+    assert report["imported"] == 30
+    assert report["failed"] == 1
+    assert report["errors"][0]["row"] == 7
+    assert "year" in report["errors"][0]["errors"][0]
+    assert max(fake_db.batches) <= 25
+    assert sum(fake_db.batches) == 30
+
+
+@pytest.mark.asyncio
+async def test_ndjson_import_reports_failed_writes(fake_db):
+    fake_db.fail_ids = {"VIN1"}
+    lines = [
+        json.dumps({"vin": f"VIN{i}", "year": 2021, "make": "Ford", "model": "F-150",
+                    "length_in": 231, "width_in": 80, "height_ft": 6.4, "wheelbase_in": 145})
+        for i in range(3)
+    ]
+    lines.append("{broken")
+
+    report = await CarImportService().import_upload(_reader("\n".join(lines)), "ndjson")
+
+    assert report["imported"] == 2
+    assert report["failed"] == 2
+    assert {error["row"] for error in report["errors"]} == {2, 4}
+
+
+@pytest.mark.asyncio
+async def test_invalid_utf8_midway_returns_partial_summary(fake_db):
+    header = b"vin,year,make,model,length_in,width_in,height_ft,wheelbase_in\n"
+    rows = b"".join(f"VIN{i},2020,Toyota,Camry,192,72,4.8,111\n".encode() for i in range(3))
+    stream = io.BytesIO(header + rows + b"VIN\xff,2020,Toyota,Camry,192,72,4.8,111\n")
+
+    async def read(size):
+        return stream.read(size)
+
+    report = await CarImportService(writers=1).import_upload(read, "csv")
+
+    assert report["imported"] == 3
+    assert "UTF-8" in report["error"]
+
+
+@pytest.mark.asyncio
+async def test_write_exception_marks_batch_failed_instead_of_hanging(fake_db):
+    fake_db.error = RuntimeError("ProvisionedThroughputExceeded")
+    header = "vin,year,make,model,length_in,width_in,height_ft,wheelbase_in\n"
+    rows = "".join(f"VIN{i},2020,Toyota,Camry,192,72,4.8,111\n" for i in range(60))
+    service = CarImportService(batch_size=5, queue_size=2, writers=1)
+
+    report = await asyncio.wait_for(service.import_upload(_reader(header + rows), "csv"), timeout=5)
+
+    assert report["imported"] == 0
+    assert report["failed"] == 60
+    assert report["errors"][0] == {"row": 2, "errors": ["Write to DynamoDB failed"]}
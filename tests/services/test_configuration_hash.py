@@ -0,0 +1,69 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models.car.records import CarRecord
+from app.services import optimizer as optimizer_module
+from app.services.configuration_hash import configuration_hash
+from app.services.optimizer import LoadingOptimizer
+
+PLACEMENT = {
+    "upper_deck": [{"platform_id": "U1", "car_id": "c1", "direction": "forward", "top_height": 151.2}],
+    "lower_deck": [{"platform_id": "L2", "car_id": "c2", "direction": "backward", "top_height": 88.0}],
+}
+
+
+def test_hash_is_canonical_and_tracks_inputs(stinger_truck, make_car):
+    cars = [make_car("c1", 5.5, "suv"), make_car("c2", 4.8)]
+    constraints = {"max_height": 162}
+    base = configuration_hash(stinger_truck, cars, constraints, PLACEMENT)
+
+    # Порядок автомобилей, модель записи и Decimal из DynamoDB не влияют на хэш
+    records = [CarRecord.of(car) for car in reversed(cars)]
+    stored = {
+        "upper_deck": [dict(PLACEMENT["upper_deck"][0], top_height=Decimal("151.2"))],
+        "lower_deck": [dict(PLACEMENT["lower_deck"][0], top_height=Decimal("88"))],
+    }
+    assert configuration_hash(stinger_truck, records, constraints, stored) == base
+
+    # Другая версия геометрии, габариты, ограничения или раскладка — другой хэш
+    updated_truck = stinger_truck.copy(update={"updated_at": datetime(2024, 2, 1)})
+    taller = [make_car("c1", 5.9, "suv"), make_car("c2", 4.8)]
+    swapped = {"upper_deck": PLACEMENT["lower_deck"], "lower_deck": PLACEMENT["upper_deck"]}
+    variants = {
+        configuration_hash(updated_truck, cars, constraints, PLACEMENT),
+        configuration_hash(stinger_truck, taller, constraints, PLACEMENT),
+        configuration_hash(stinger_truck, cars, {"max_height": 160}, PLACEMENT),
+        configuration_hash(stinger_truck, cars, constraints, swapped),
+    }
+    assert base not in variants and len(variants) == 4
+
+
+async def test_save_configuration_recomputes_submitted_hash(monkeypatch, stinger_truck, make_car):
+    cars = {car.id: CarRecord.of(car) for car in (make_car("c1", 5.5, "suv"), make_car("c2", 4.8))}
+    saved = []
+
+    async def get_truck(truck_id):
+        return stinger_truck
+
+    async def get_car_records(ids):
+        return {car_id: cars[car_id] for car_id in ids if car_id in cars}
+
+    async def save(configuration):
+        saved.append(dict(configuration))
+        return configuration["id"]
+
+    monkeypatch.setattr(optimizer_module.truck_crud, "get_truck", get_truck)
+    monkeypatch.setattr(optimizer_module.car_crud, "get_car_records", get_car_records)
+    monkeypatch.setattr(optimizer_module.db, "save_configuration", save)
+    expected = configuration_hash(stinger_truck, list(cars.values()), None, PLACEMENT)
+    optimizer = LoadingOptimizer()
+
+    configuration = {"truck_id": "truck-1", "cars": ["c1", "c2"], "placement": PLACEMENT}
+    assert await optimizer.save_configuration(dict(configuration, configuration_hash=expected)) == expected
+
+    # Чужой хэш не становится id сохраненной конфигурации
+    with pytest.raises(ValueError):
+        await optimizer.save_configuration(dict(configuration, configuration_hash="0" * 64))
+    assert [item["id"] for item in saved] == [expected]
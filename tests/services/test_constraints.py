@@ -0,0 +1,132 @@
+from app.services.constraints import ConstraintValidator, constraint_metrics
+from app.services.optimizer import LoadingOptimizer
+from app.services.placement import PlacementResult
+
+
+def _placement(upper, lower, upper_direction="forward", lower_direction="backward"):
+    return {
+        "upper_deck": [{"car_id": c, "platform_id": p, "direction": upper_direction} for p, c in upper],
+        "lower_deck": [{"car_id": c, "platform_id": p, "direction": lower_direction} for p, c in lower],
+    }
+
+
+def test_tall_car_on_upper_deck_is_rejected(stinger_truck, make_car):
+    cars = {"van": make_car("van", 6.7, body_type="van"), "s1": make_car("s1", 4.8)}
+    validator = ConstraintValidator(stinger_truck, _placement([("U1", "van")], [("L1", "s1")]), cars)
+
+    result = validator.result()
+    assert not result["valid"]
+    assert any(issue.startswith("Critical height exceeded") for issue in result["issues"])
+    assert result["timings"]["height"]["calls"] == 1
+
+
+def test_delta_swap_matches_full_validation(stinger_truck, make_car):
+    cars = {"van": make_car("van", 6.7, body_type="van"), "s1": make_car("s1", 4.8)}
+    validator = ConstraintValidator(stinger_truck, _placement([("U1", "van")], [("L1", "s1")]), cars)
+    index = validator.geometry.index
+    clearance_calls = validator.timings["clearance"]["calls"]
+
+    assert validator.swap(index["U1"], index["L1"])
+    assert validator.timings["clearance"]["calls"] == clearance_calls + 2
+
+    # Направления переезжают вместе с автомобилями
+    fresh = ConstraintValidator(
+        stinger_truck, _placement([("U1", "s1")], [("L1", "van")], "backward", "forward"), cars
+    )
+    assert validator.result()["issues"] == fresh.result()["issues"] == []
+    assert validator.profile.max_height == fresh.profile.max_height
+
+
+def test_repair_fixes_violations_with_delta_moves(stinger_truck, make_car):
+    cars = {"van": make_car("van", 6.7, body_type="van"), "s1": make_car("s1", 4.8)}
+    validator = ConstraintValidator(stinger_truck, _placement([("U1", "van")], [("L1", "s1")]), cars)
+    full_calls = validator.timings["height"]["calls"]
+
+    assert validator.repair() >= 1
+    assert validator.valid
+    placed = {item["car_id"]: item["platform_id"] for items in validator.placement().values() for item in items}
+    assert placed["van"].startswith("L")
+    # Ходы проверялись дельтами: высота — одна проверка на ход, а не полный проход
+    assert validator.timings["height"]["calls"] > full_calls
+
+
+async def test_complete_optimization_repairs_invalid_search_result(stinger_truck, make_car):
+    cars = [make_car("van", 6.7, body_type="van"), make_car("s1", 4.8)]
+    search_result = PlacementResult(
+        placement=_placement([("U1", "van")], [("L1", "s1")]), feasible=True, engine="test"
+    )
+
+    result = await LoadingOptimizer().complete_optimization(stinger_truck, cars, search_result)
+
+    assert result["success"], result
+    placement = result["configuration"]["placement"]
+    assert [item["car_id"] for item in placement["upper_deck"]] != ["van"]
+    assert all("effective_heights" in item for items in placement.values() if isinstance(items, list) for item in items)
+
+
+def test_clearance_and_user_constraints(stinger_truck, make_car):
+    cars = {"tall": make_car("tall", 5.5), "s1": make_car("s1", 4.8)}
+    constraints = {"excluded_platforms": ["L3"], "fixed_positions": {"s1": "L4"}, "max_weight_lb": 1000}
+    validator = ConstraintValidator(
+        stinger_truck, _placement([], [("L2", "tall"), ("L3", "s1")]), cars, constraints
+    )
+
+    issues = validator.result()["issues"]
+    assert any(issue.startswith("Insufficient clearance on platform L2") for issue in issues)
+    assert "Platform L3 must stay empty" in issues
+    assert "Car s1 must be placed on platform L4, found on L3" in issues
+    assert "gvwr" in constraint_metrics.stats()
+
+
+def _items(result):
+    placement = result["configuration"]["placement"]
+    return [item for deck in ("upper_deck", "lower_deck") for item in placement.get(deck, [])]
+
+
+def _placed(result):
+    return {item["car_id"]: item["platform_id"] for item in _items(result)}
+
+
+async def test_optimize_keeps_excluded_platforms_empty(stinger_truck, make_car):
+    cars = [make_car(f"s{i}", 4.8) for i in range(7)]
+    result = await LoadingOptimizer().optimize_loading(stinger_truck, cars, {"excluded_platforms": ["L1", "U1"]})
+
+    assert result["success"], result
+    assert not {"L1", "U1"} & set(_placed(result).values())
+
+
+async def test_optimize_pins_fixed_positions(stinger_truck, make_car):
+    cars = [make_car("van", 6.7, body_type="van"), make_car("s1", 4.8), make_car("s2", 4.5)]
+    result = await LoadingOptimizer().optimize_loading(stinger_truck, cars, {"fixed_positions": {"s2": "U4"}})
+
+    assert result["success"], result
+    assert _placed(result)["s2"] == "U4"
+
+
+async def test_optimize_respects_min_clearance(stinger_truck, make_car):
+    cars = [make_car(f"s{i}", 4.8) for i in range(5)]
+    result = await LoadingOptimizer().optimize_loading(stinger_truck, cars, {"min_clearance": 12})
+
+    assert result["success"], result
+
+
+async def test_optimize_respects_max_height(stinger_truck, make_car):
+    cars = [make_car(f"s{i}", 4.8) for i in range(5)]
+    result = await LoadingOptimizer().optimize_loading(stinger_truck, cars, {"max_height": 160})
+
+    assert result["success"], result
+    assert max(item["top_height"] for item in _items(result)) <= 160
+
+    # Порог применяется в самом поиске, а не только при итоговой проверке
+    result = await LoadingOptimizer().optimize_loading(stinger_truck, cars[:1], {"max_height": 80})
+    assert result["message"] == "No feasible placement found"
+    assert result["issues"] == ["Car s0 does not fit on any platform"]
+
+
+async def test_optimize_rejects_load_over_max_weight_in_search(stinger_truck, make_car):
+    cars = [make_car(f"s{i}", 4.8, curb_weight_lb=3000) for i in range(3)]
+    result = await LoadingOptimizer().optimize_loading(stinger_truck, cars, {"max_weight_lb": 5000})
+
+    assert not result["success"]
+    assert result["message"] == "No feasible placement found"
+    assert any(issue.startswith("Load weight exceeded") for issue in result["issues"])
@@ -0,0 +1,73 @@
+import asyncio
+import multiprocessing
+
+import pytest
+
+from app.services import executor as executor_module
+from app.services.executor import ExecutorSaturatedError, OptimizationExecutor, solve_truck_layout
+from app.services.optimizer import LoadingOptimizer
+
+
+@pytest.mark.asyncio
+async def test_search_runs_in_pool_and_rejects_when_saturated(stinger_truck, make_car):
+    executor = OptimizationExecutor(workers=1, max_queue=0)
+    cars = [make_car("van", 6.7, body_type="van"), make_car("s1", 4.8)]
+    try:
+        first = asyncio.create_task(executor.search(stinger_truck, cars, "branch_and_bound", 1000))
+        await asyncio.sleep(0)
+        assert executor.depth == 1
+
+        with pytest.raises(ExecutorSaturatedError):
+            await executor.search(stinger_truck, cars, "branch_and_bound", 1000)
+
+        result = await first
+        assert result.feasible
+        await asyncio.sleep(0)
+        assert executor.depth == 0
+        assert executor.stats()["rejected"] == 1
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_stream_runs_in_pool_and_cancels_on_close(stinger_truck, make_car):
+    executor = OptimizationExecutor(workers=1, max_queue=0)
+    optimizer = LoadingOptimizer(executor=executor)
+    cars = [make_car("van", 6.7, body_type="van"), make_car("s1", 4.8), make_car("s2", 4.9)]
+    try:
+        events = [event async for event in optimizer.stream_optimization(stinger_truck, cars, time_budget_ms=1000)]
+        assert [name for name, _ in events].count("improvement") >= 1
+        assert events[-1][0] == "result" and events[-1][1]["success"]
+        assert executor.depth == 0
+
+        # Отмена потока (отключение клиента) отменяет задачу пула
+        stream = optimizer.stream_optimization(stinger_truck, cars, time_budget_ms=1000)
+        waiter = asyncio.ensure_future(stream.__anext__())
+        while executor.depth == 0:
+            await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert executor.stats()["cancelled"] == 1
+        assert not executor._listeners
+    finally:
+        executor.shutdown()
+
+
+def test_cancel_flag_stops_search_in_worker(stinger_truck, make_car):
+    flags = multiprocessing.Array("b", 1, lock=False)
+    flags[0] = 1
+    executor_module._init_worker(flags)
+    try:
+        result = solve_truck_layout(
+            stinger_truck.dict(by_alias=True),
+            [make_car("s1", 4.8).dict()],
+            "branch_and_bound",
+            1000,
+            cancel_slot=0
+        )
+    finally:
+        executor_module._init_worker(None)
+
+    assert result.cancelled
+    assert not result.feasible
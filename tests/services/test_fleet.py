@@ -0,0 +1,111 @@
+import time
+import asyncio
+
+import pytest
+
+from app.services.executor import JobTimeoutError, OptimizationExecutor, solve_truck_layout
+from app.services import fleet as fleet_module
+from app.services.fleet import FleetOptimizer, assign_cars_to_trucks
+from app.services.optimizer import LoadingOptimizer
+
+
+def test_tall_vans_are_spread_across_trucks(stinger_truck, make_car):
+    """На каждом стингере одна открытая платформа — по одному van на грузовик"""
+    second = stinger_truck.copy(update={"id": "truck-2"})
+    cars = [make_car(f"van{i}", 6.7, body_type="van") for i in range(2)]
+    cars += [make_car(f"s{i}", 4.8) for i in range(10)]
+
+    assignment, unassigned = assign_cars_to_trucks([stinger_truck, second], cars)
+
+    assert unassigned == []
+    for truck_id in ("truck-1", "truck-2"):
+        truck_cars = [car.id for car in assignment[truck_id]]
+        assert sum(car_id.startswith("van") for car_id in truck_cars) == 1
+        assert len(truck_cars) <= 9
+
+
+def test_overflow_cars_are_reported(stinger_truck, make_car):
+    cars = [make_car(f"s{i}", 4.8) for i in range(11)]
+    assignment, unassigned = assign_cars_to_trucks([stinger_truck], cars)
+
+    assert len(assignment["truck-1"]) == 9
+    assert len(unassigned) == 2
+
+
+def test_solve_truck_layout_accepts_plain_dicts(stinger_truck, make_car):
+    cars = [make_car("van", 6.7, body_type="van"), make_car("s1", 4.8)]
+    result = solve_truck_layout(
+        stinger_truck.dict(by_alias=True),
+        [car.dict() for car in cars],
+        "branch_and_bound",
+        1000
+    )
+    assert result.feasible
+    assert result.placement["lower_deck"][0]["car_id"] == "van"
+
+
+@pytest.mark.asyncio
+async def test_fleet_larger_than_executor_capacity_runs_in_waves(stinger_truck, make_car):
+    """Парк больше workers + max_queue не отклоняется: грузовики ждут свободного слота"""
+    executor = OptimizationExecutor(workers=1, max_queue=1)
+    fleet = FleetOptimizer(LoadingOptimizer(executor=executor), executor)
+    trucks = [stinger_truck.copy(update={"id": f"truck-{i}"}) for i in range(5)]
+    cars = [make_car(f"s{i}", 4.8) for i in range(5 * 9)]
+    try:
+        result = await fleet.optimize_fleet(trucks, cars, time_budget_ms=200)
+    finally:
+        executor.shutdown()
+
+    assert result["success"], result
+    assert len(result["results"]) == 5
+    assert executor.stats()["rejected"] == 0
+
+
+@pytest.mark.asyncio
+async def test_fleet_raises_timeout_only_when_every_truck_timed_out(stinger_truck, make_car):
+    executor = OptimizationExecutor(workers=1, max_queue=1, job_timeout_ms=1)
+    fleet = FleetOptimizer(LoadingOptimizer(executor=executor), executor)
+    trucks = [stinger_truck.copy(update={"id": f"truck-{i}"}) for i in range(2)]
+    cars = [make_car(f"s{i}", 4.8) for i in range(18)]
+    try:
+        with pytest.raises(JobTimeoutError):
+            await fleet.optimize_fleet(trucks, cars, time_budget_ms=200)
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_fleet_assignment_and_post_processing_do_not_block_the_loop(monkeypatch, stinger_truck, make_car):
+    """Распределение и доводка размещений идут в потоках: event loop продолжает отвечать"""
+    def slow(call):
+        def wrapper(*args, **kwargs):
+            time.sleep(0.3)  # Имитация тяжелого расчета
+            return call(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(fleet_module, "assign_cars_to_trucks", slow(assign_cars_to_trucks))
+    optimizer = LoadingOptimizer()
+    monkeypatch.setattr(optimizer, "finish_optimization", slow(optimizer.finish_optimization))
+    executor = OptimizationExecutor(workers=1, max_queue=1)
+    fleet = FleetOptimizer(optimizer, executor)
+    cars = [make_car(f"s{i}", 4.8) for i in range(4)]
+
+    gaps = []
+
+    async def ticker():
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    try:
+        result = await fleet.optimize_fleet([stinger_truck], cars, time_budget_ms=200)
+    finally:
+        tick.cancel()
+        executor.shutdown()
+
+    assert result["success"], result
+    assert max(gaps) < 0.2
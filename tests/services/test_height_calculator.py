@@ -0,0 +1,51 @@
+import asyncio
+
+import numpy as np
+
+from app.models.enums import VehicleCategory
+from app.services.height_calculator import HeightCalculationService
+from app.services.truck_geometry import compile_truck_geometry, precompute_effective_heights
+
+
+def test_batch_matches_per_edge_rule():
+    heights = np.array([[100.0, 98.0], [30.0, np.nan]])
+    flags = np.array([[True, False], [True, True]])
+    categories = list(VehicleCategory)
+    codes = HeightCalculationService.category_codes(categories)
+
+    result = HeightCalculationService.batch_effective_heights(heights, flags, codes)
+
+    assert result.shape == (len(categories), 2, 2)
+    by_category = dict(zip(categories, result))
+    assert by_category[VehicleCategory.STANDARD][0].tolist() == [98.0, 98.0]
+    assert by_category[VehicleCategory.PICKUP][0].tolist() == [96.0, 98.0]
+    assert by_category[VehicleCategory.ELECTRIC][0].tolist() == [100.0, 98.0]
+    assert np.isnan(by_category[VehicleCategory.FULL_SIZE_SUV][1][1])
+
+
+def test_per_platform_wrapper_keeps_response_shape():
+    platform = {
+        "id": "U1",
+        "edge_a": {"height": 100.0, "chains": {"is_used": True}},
+        "edge_b": {"height": None, "min_height": 90.0, "chains": {"is_used": True}},
+    }
+    adjusted = asyncio.run(HeightCalculationService.calculate_adjusted_heights(
+        platform_data=platform,
+        vehicle_category=VehicleCategory.FULL_SIZE_SUV
+    ))
+
+    assert adjusted["edge_a"]["effective_height"] == 96.0
+    assert "effective_height" not in adjusted["edge_b"]
+    assert "effective_height" not in platform["edge_a"]
+
+
+def test_fleet_precompute_fills_all_categories(stinger_truck):
+    truck = stinger_truck.copy(deep=True, update={"id": "truck-precompute"})
+    truck.lower_deck.platforms[0].edge_b.chains.is_used = True
+    geometry = compile_truck_geometry(truck)
+
+    precompute_effective_heights([geometry])
+
+    l1 = geometry.index["L1"]
+    assert geometry.effective_edge_heights(VehicleCategory.STANDARD)[2 * l1 + 1] == 30.0
+    assert geometry.effective_edge_heights(VehicleCategory.PICKUP)[2 * l1 + 1] == 28.0
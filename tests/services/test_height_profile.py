@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from app.services.height_profile import HeightProfile, MaxSegmentTree
+from app.services.placement import BranchAndBoundPlacementEngine
+from app.services.truck_geometry import compile_truck_geometry
+
+
+def test_segment_tree_tracks_max():
+    tree = MaxSegmentTree([1.0, 5.0, 3.0])
+    assert tree.max() == 5.0
+    tree.update(1, 2.0)
+    assert tree.max() == 3.0
+    tree.update(2, 9.0)
+    assert tree.max() == 9.0
+
+
+def test_profile_matches_engine_peak(stinger_truck, make_car):
+    cars = [make_car("van", 6.7, body_type="van")] + [make_car(f"s{i}", 4.8) for i in range(8)]
+    result = BranchAndBoundPlacementEngine().search(stinger_truck, cars)
+
+    profile = HeightProfile.from_placement(stinger_truck, result.placement, {c.id: c for c in cars})
+
+    assert profile.max_height == pytest.approx(result.peak_height)
+    l2 = compile_truck_geometry(stinger_truck).index["L2"]
+    assert profile.headroom(l2) is not None
+
+
+def test_incremental_updates_match_full_rebuild(stinger_truck, make_car):
+    geometry = compile_truck_geometry(stinger_truck)
+    rng = random.Random(7)
+    cars = [make_car(f"c{i}", rng.choice([4.5, 5.2, 5.8, 6.4])) for i in range(geometry.platform_count)]
+    profile = HeightProfile(geometry, dict(enumerate(cars)))
+
+    for _ in range(200):
+        p, q = rng.randrange(geometry.platform_count), rng.randrange(geometry.platform_count)
+        if rng.random() < 0.2:
+            profile.remove(p)
+        else:
+            profile.swap(p, q)
+        rebuilt = HeightProfile(
+            geometry,
+            {i: car for i, car in enumerate(profile.cars) if car is not None},
+            {i: d for i, d in enumerate(profile.directions) if d is not None}
+        )
+        assert profile.max_height == rebuilt.max_height
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from app.services.history_buffer import LoadingHistoryBuffer
+
+
+class FakeWriter:
+    """Запись пачек; пока down=True, все элементы возвращаются как незаписанные"""
+
+    def __init__(self, fail_after=None):
+        self.down = False
+        self.batches = []
+        self.fail_after = fail_after
+
+    async def __call__(self, items):
+        if self.down or (self.fail_after is not None and len(self.batches) >= self.fail_after):
+            return list(items)
+        self.batches.append([item["id"] for item in items])
+        return []
+
+
+def _spilled_ids(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["id"] for line in f]
+
+
+@pytest.mark.asyncio
+async def test_records_are_flushed_in_batches_and_memory_is_bounded(tmp_path):
+    writer = FakeWriter()
+    spill = str(tmp_path / "history.jsonl")
+    buffer = LoadingHistoryBuffer(writer, flush_size=2, flush_interval=60, max_items=4, spill_path=spill)
+
+    ids = [buffer.record({"truck_id": "truck-1", "car_count": n}) for n in range(5)]
+
+    # Пятая запись превысила лимит: две старейшие ушли на диск (в фоне)
+    assert buffer.stats()["buffered"] == 3
+    await buffer._settle()
+    assert _spilled_ids(spill) == ids[:2]
+
+    assert await buffer.flush() == 3
+    # Сначала буфер, затем дослан файл
+    assert writer.batches == [ids[2:4], ids[4:], ids[:2]]
+    assert buffer.stats() == {"buffered": 0, "written": 5, "spilled": 2, "replayed": 2, "spill_pending": False}
+
+
+@pytest.mark.asyncio
+async def test_unavailable_dynamodb_spills_and_replays_after_recovery(tmp_path):
+    writer = FakeWriter()
+    spill = str(tmp_path / "history.jsonl")
+    buffer = LoadingHistoryBuffer(writer, flush_size=2, flush_interval=60, max_items=10, spill_path=spill)
+    writer.down = True
+
+    ids = [buffer.record({"truck_id": "truck-1"}) for _ in range(3)]
+    await buffer.flush()
+    await buffer.stop()
+
+    # Неудачная пачка и остаток буфера при остановке сохранены на диск
+    assert _spilled_ids(spill) == ids
+    assert buffer.stats()["buffered"] == 0
+
+    writer.down = False
+    new_id = buffer.record({"truck_id": "truck-1"})
+    await buffer.flush()
+
+    assert writer.batches == [[new_id], ids[:2], ids[2:]]
+    assert not buffer.stats()["spill_pending"]
+
+
+@pytest.mark.asyncio
+async def test_replay_streams_file_and_keeps_unsent_tail(tmp_path):
+    writer = FakeWriter()
+    spill = str(tmp_path / "history.jsonl")
+    buffer = LoadingHistoryBuffer(writer, flush_size=2, flush_interval=60, max_items=10, spill_path=spill)
+    writer.down = True
+    ids = [buffer.record({"truck_id": "truck-1"}) for _ in range(7)]
+    await buffer.stop()
+    assert _spilled_ids(spill) == ids
+
+    # Вторая пачка файла не проходит: она и непрочитанный остаток возвращаются в файл по порядку
+    writer.down, writer.fail_after = False, 2
+    new_id = buffer.record({"truck_id": "truck-1"})
+    await buffer.flush()
+
+    assert writer.batches == [[new_id], ids[:2]]
+    assert _spilled_ids(spill) == ids[2:]
+    assert buffer.stats()["replayed"] == 2
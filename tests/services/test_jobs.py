@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.models.enums import JobPriority, JobStatus
+from app.services.jobs import JobQueue, JobQueueFullError
+
+
+async def _wait_finished(queue, jobs):
+    for _ in range(100):
+        if all(queue.get(job.id).finished for job in jobs):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("jobs did not finish")
+
+
+@pytest.mark.asyncio
+async def test_urgent_jobs_run_first():
+    queue = JobQueue(concurrency=1, max_pending=10, history_size=10)
+    order = []
+
+    async def handler(job):
+        order.append(job.payload["name"])
+        return {"name": job.payload["name"]}
+
+    queue.register("optimize", handler)
+    await queue.start()
+    try:
+        jobs = [
+            queue.submit("optimize", {"name": "batch"}, JobPriority.BATCH),
+            queue.submit("optimize", {"name": "normal"}),
+            queue.submit("optimize", {"name": "urgent"}, JobPriority.URGENT),
+        ]
+        await _wait_finished(queue, jobs)
+    finally:
+        await queue.stop()
+
+    assert order == ["urgent", "normal", "batch"]
+    status = queue.get(jobs[0].id).to_dict()
+    assert status["status"] == "succeeded"
+    assert status["progress"] == 1.0
+    assert status["result"] == {"name": "batch"}
+
+
+@pytest.mark.asyncio
+async def test_failed_job_and_full_queue():
+    queue = JobQueue(concurrency=1, max_pending=1, history_size=10)
+
+    async def handler(job):
+        raise ValueError("no trucks")
+
+    queue.register("optimize", handler)
+    await queue.start()
+    try:
+        job = queue.submit("optimize", {})
+        with pytest.raises(JobQueueFullError):
+            queue.submit("optimize", {})
+        await _wait_finished(queue, [job])
+    finally:
+        await queue.stop()
+
+    assert job.status == JobStatus.FAILED
+    assert job.error == "no trucks"
+
+
+@pytest.mark.asyncio
+async def test_job_stops_waiting_for_saturated_executor(monkeypatch):
+    """Ожидание пула ограничено: задача падает, а не висит в running"""
+    from app.api.endpoints import optimizer as endpoints
+    from app.services.executor import ExecutorSaturatedError
+
+    monkeypatch.setattr(endpoints, "JOB_EXECUTOR_RETRY_DELAY", 0.01)
+    calls = []
+
+    async def saturated():
+        calls.append(1)
+        raise ExecutorSaturatedError(4)
+
+    with pytest.raises(ExecutorSaturatedError):
+        await endpoints._search_when_free(saturated, wait_ms=50)
+    assert 1 < len(calls) < 50
@@ -0,0 +1,88 @@
+import itertools
+import random
+
+from app.models.truck.schemas import JointSchema
+from app.services.orientation import DIRECTIONS, OrientedCar, joint_shortfall, optimize_orientations
+from app.services.truck_geometry import compile_truck_geometry
+
+
+def test_roof_goes_to_lower_edge(stinger_truck, make_car):
+    geometry = compile_truck_geometry(stinger_truck)
+    cars = [None] * geometry.platform_count
+    cars[geometry.index["U1"]] = make_car("a", 4.8)
+
+    directions, summary = optimize_orientations(geometry, cars)
+
+    # U1: край A 100", край B 98" — крыша должна быть ближе к B
+    assert directions[geometry.index["U1"]] == "forward"
+    assert summary["shortfall"] == 0
+
+
+def test_joint_forbids_tail_to_tail(stinger_truck, make_car):
+    truck = stinger_truck.copy(deep=True, update={"id": "truck-joint"})
+    l1, l2 = truck.lower_deck.platforms[0], truck.lower_deck.platforms[1]
+    l1.edge_a.height, l1.edge_b.height = 32.0, 30.0
+    l2.edge_a.height, l2.edge_b.height = 30.0, 32.0
+    truck.lower_deck.joints = [JointSchema(
+        type="static_joint", platform_a_id="L1", platform_b_id="L2",
+        edge_a="B", edge_b="A", minimum_loading_distance=0, max_overlap=20
+    )]
+    geometry = compile_truck_geometry(truck)
+    cars = [None] * geometry.platform_count
+    cars[geometry.index["L1"]] = make_car("a", 4.8, length_in=220.0)
+    cars[geometry.index["L2"]] = make_car("b", 4.8, length_in=220.0)
+
+    directions, summary = optimize_orientations(geometry, cars)
+
+    # По высоте каждому выгоднее развернуться задом к соединению,
+    # но тогда не хватает 20" — ДП должно развернуть одного из них
+    assert (directions[geometry.index["L1"]], directions[geometry.index["L2"]]) != ("forward", "backward")
+    assert summary["shortfall"] == 0
+
+
+def _deck_cost(geometry, cars, chosen):
+    """Оценка ДП (нехватка, пик, сумма высот) для заданных направлений"""
+    shortfall, peak, total = 0.0, float("-inf"), 0.0
+    for p, direction in chosen.items():
+        top, lack = OrientedCar(geometry, cars[p]).clearance_shortfall(geometry, p, direction)
+        shortfall, peak, total = shortfall + lack, max(peak, top), total + top
+    for j in range(len(geometry.joint_a)):
+        a, b = geometry.joint_a[j], geometry.joint_b[j]
+        if a in chosen and b in chosen:
+            shortfall += joint_shortfall(geometry, j, cars[a], chosen[a], cars[b], chosen[b])[2]
+    return round(shortfall, 6), round(peak, 6), round(total, 6)
+
+
+def test_pareto_dp_matches_brute_force(stinger_truck, make_car):
+    """
+    Пик не аддитивен: ДП с множествами Парето совпадает с полным перебором
+    (с одной меткой на состояние seed 22 давал большую сумму высот)
+    """
+    for seed in range(40):
+        random.seed(seed)
+        truck = stinger_truck.copy(deep=True, update={"id": f"truck-pareto-{seed}"})
+        for platform in truck.lower_deck.platforms:
+            platform.edge_a.height, platform.edge_b.height = random.uniform(26, 38), random.uniform(26, 38)
+        truck.lower_deck.joints = [
+            JointSchema(
+                type="static_joint", platform_a_id=f"L{i}", platform_b_id=f"L{i + 1}",
+                edge_a="B", edge_b="A", minimum_loading_distance=random.uniform(0, 12), max_overlap=20
+            )
+            for i in range(1, 5)
+        ]
+        geometry = compile_truck_geometry(truck)
+        cars = [None] * geometry.platform_count
+        for i in range(1, 6):
+            cars[geometry.index[f"L{i}"]] = make_car(
+                f"c{i}", random.uniform(4.5, 6.5), length_in=random.uniform(170.0, 230.0),
+                hood_height_in=random.uniform(25.0, 55.0)
+            )
+        chain = [p for p in range(geometry.platform_count) if cars[p] is not None]
+        best = min(
+            _deck_cost(geometry, cars, dict(zip(chain, combo)))
+            for combo in itertools.product(DIRECTIONS, repeat=len(chain))
+        )
+
+        directions, _ = optimize_orientations(geometry, cars)
+
+        assert _deck_cost(geometry, cars, {p: directions[p] for p in chain}) == best, seed
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from app.services.placement import (
+    BranchAndBoundPlacementEngine,
+    SequentialPlacementEngine,
+    get_placement_engine,
+)
+
+
+def _platform_of(result, car_id):
+    for deck in ("upper_deck", "lower_deck"):
+        for item in result.placement[deck]:
+            if item["car_id"] == car_id:
+                return item["platform_id"]
+    return None
+
+
+def test_branch_and_bound_moves_tall_van_to_open_platform(stinger_truck, make_car):
+    """Высокий van должен встать на L1, где над ним нет верхней платформы"""
+    cars = [make_car("van", 6.7, body_type="van")] + [make_car(f"s{i}", 4.8) for i in range(8)]
+
+    sequential = SequentialPlacementEngine().search(stinger_truck, cars)
+    assert _platform_of(sequential, "van") == "U1"
+
+    result = BranchAndBoundPlacementEngine().search(stinger_truck, cars, time_budget_ms=2000)
+    assert result.feasible
+    assert _platform_of(result, "van") == "L1"
+    assert result.peak_height <= 170
+    assert result.nodes_explored > 0
+    assert sum(len(items) for items in result.placement.values()) == len(cars)
+
+
+def test_identical_cars_do_not_blow_up_search(stinger_truck, make_car):
+    """Одинаковые автомобили не перебираются перестановками"""
+    cars = [make_car(f"s{i}", 4.8) for i in range(9)]
+    result = BranchAndBoundPlacementEngine().search(stinger_truck, cars)
+
+    assert result.feasible
+    assert not result.timed_out
+    assert result.nodes_explored < 200
+
+
+def test_infeasible_load_reports_issues(stinger_truck, make_car):
+    """Два высоких van не помещаются — одна открытая платформа"""
+    cars = [make_car("van1", 6.7, body_type="van"), make_car("van2", 6.7, body_type="van")]
+    result = BranchAndBoundPlacementEngine().search(stinger_truck, cars)
+
+    assert not result.feasible
+    assert result.issues
+    assert result.stats()["nodes_pruned"] > 0
+
+
+def test_improvements_are_reported_in_order(stinger_truck, make_car):
+    cars = [make_car("van", 6.7, body_type="van")] + [make_car(f"s{i}", 4.8 + i * 0.05) for i in range(8)]
+    improvements = []
+
+    result = BranchAndBoundPlacementEngine().search(stinger_truck, cars, on_improvement=improvements.append)
+
+    assert improvements
+    scores = [improvement.score for improvement in improvements]
+    assert scores == sorted(scores, reverse=True)
+    assert improvements[-1].score == result.score
+
+
+def test_cancelled_search_stops(stinger_truck, make_car):
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    result = BranchAndBoundPlacementEngine().search(
+        stinger_truck, [make_car("a", 4.8)], cancel_event=cancel_event
+    )
+
+    assert result.cancelled
+    assert not result.feasible
+    assert result.issues == ["Search cancelled"]
+
+
+def test_unknown_engine_name():
+    with pytest.raises(ValueError):
+        get_placement_engine("simulated_annealing")
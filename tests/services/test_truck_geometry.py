@@ -0,0 +1,54 @@
+from app.models.enums import VehicleCategory
+from app.models.truck.cache import truck_cache
+from app.services.truck_geometry import (
+    compile_truck_geometry,
+    effective_height_table,
+    geometry_cache_stats,
+)
+
+
+def test_geometry_indexes_platforms_and_connections(stinger_truck):
+    geometry = compile_truck_geometry(stinger_truck)
+
+    assert geometry.platform_count == 9
+    assert geometry.platform_ids[:4] == ["U1", "U2", "U3", "U4"]
+    l2 = geometry.index["L2"]
+    assert geometry.platform_ids[geometry.upper_of[l2]] == "U1"
+    assert geometry.upper_of[geometry.index["L1"]] == -1
+    assert geometry.min_clearance[l2] == 6
+    assert geometry.underside[geometry.index["U1"]] == 98.0
+
+
+def test_chain_flags_lower_effective_heights(stinger_truck):
+    truck = stinger_truck.copy(deep=True, update={"id": "truck-chains"})
+    truck.upper_deck.platforms[0].edge_a.chains.is_used = True
+    geometry = compile_truck_geometry(truck)
+    u1 = geometry.index["U1"]
+
+    assert geometry.effective_edge_heights(VehicleCategory.STANDARD)[2 * u1] == 98.0
+    assert geometry.effective_edge_heights(VehicleCategory.PICKUP)[2 * u1] == 96.0
+    assert geometry.effective_edge_heights(VehicleCategory.ELECTRIC)[2 * u1] == 100.0
+    assert geometry.effective_edge_heights(VehicleCategory.PICKUP)[2 * u1 + 1] == 98.0
+
+
+def test_geometry_is_cached_and_invalidated_with_truck(stinger_truck):
+    first = compile_truck_geometry(stinger_truck)
+    assert compile_truck_geometry(stinger_truck) is first
+
+    truck_cache.invalidate(stinger_truck.id)
+    assert compile_truck_geometry(stinger_truck) is not first
+
+
+def test_effective_height_table_is_memoized_per_category(stinger_truck):
+    truck = stinger_truck.copy(deep=True, update={"id": "truck-table"})
+    truck.upper_deck.platforms[0].edge_a.chains.is_used = True
+
+    table = effective_height_table(truck, VehicleCategory.PICKUP)
+    assert table["U1"] == {"edge_a": 96.0, "edge_b": 98.0}
+    assert effective_height_table(truck, VehicleCategory.PICKUP) is table
+    assert effective_height_table(truck, VehicleCategory.ELECTRIC)["U1"]["edge_a"] == 100.0
+
+    before = geometry_cache_stats()["effective_heights"]["invalidations"]
+    truck_cache.invalidate(truck.id)
+    assert geometry_cache_stats()["effective_heights"]["invalidations"] == before + 2
+    assert effective_height_table(truck, VehicleCategory.PICKUP) is not table
@@ -0,0 +1,85 @@
+import pytest
+
+from app.services.constraints import ConstraintValidator
+from app.services.fleet import assign_cars_to_trucks
+from app.services.placement import BranchAndBoundPlacementEngine
+from app.services.truck_geometry import compile_truck_geometry
+from app.services.weights import car_weight_lb, compute_load
+
+
+def test_curb_weight_falls_back_to_body_type(make_car):
+    assert car_weight_lb(make_car("a", 4.8, curb_weight_lb=3100)) == 3100
+    assert car_weight_lb(make_car("b", 6.0, body_type="pickup")) == 5000.0
+
+
+def test_axle_split_follows_lever_arms(stinger_truck, make_car):
+    geometry = compile_truck_geometry(stinger_truck)
+    car = make_car("a", 4.8, curb_weight_lb=4000)
+
+    head = compute_load(geometry, [(geometry.index["L1"], car)])
+    tail = compute_load(geometry, [(geometry.index["L5"], car)])
+
+    assert head.to_dict()["decks"]["lower_deck"] == 4000
+    assert head.axles[0] > head.axles[1]
+    assert tail.axles[1] > tail.axles[0]
+    assert sum(tail.axles) == pytest.approx(4000)
+
+
+def test_search_rejects_load_over_gvwr(stinger_truck, make_car):
+    light = stinger_truck.copy(update={"id": "truck-light", "gvwr": 5000.0})
+    cars = [make_car(f"s{i}", 4.8, curb_weight_lb=3000) for i in range(2)]
+
+    result = BranchAndBoundPlacementEngine().search(light, cars)
+
+    assert not result.feasible
+    assert result.issues[0].startswith("Load weight exceeded")
+
+
+def test_axle_limits_push_heavy_car_forward(stinger_truck, make_car):
+    cars = [make_car("heavy", 4.8, curb_weight_lb=9000)] + [make_car(f"s{i}", 4.8, curb_weight_lb=3000) for i in range(3)]
+    result = BranchAndBoundPlacementEngine().search(stinger_truck, cars, axle_limits={"rear": 6000})
+
+    assert result.feasible
+    geometry = compile_truck_geometry(stinger_truck)
+    placed = {
+        item["car_id"]: geometry.index[item["platform_id"]]
+        for items in result.placement.values() for item in items
+    }
+    cars_by_id = {car.id: car for car in cars}
+    load = compute_load(geometry, [(p, cars_by_id[car_id]) for car_id, p in placed.items()])
+    assert load.axles[1] <= 6000
+
+
+def test_fleet_respects_gvwr(stinger_truck, make_car):
+    light = stinger_truck.copy(update={"id": "truck-light", "gvwr": 10000.0})
+    cars = [make_car(f"s{i}", 4.8, curb_weight_lb=4000) for i in range(4)]
+
+    assignment, unassigned = assign_cars_to_trucks([light], cars)
+
+    assert len(assignment["truck-light"]) == 2
+    assert len(unassigned) == 2
+
+
+def test_payload_limit_subtracts_truck_tare(stinger_truck, make_car):
+    truck = stinger_truck.copy(update={"id": "truck-tare", "gvwr": 10000.0, "tare_weight_lb": 6000.0})
+    cars = [make_car(f"s{i}", 4.8, curb_weight_lb=3000) for i in range(2)]
+
+    result = BranchAndBoundPlacementEngine().search(truck, cars)
+
+    # 6000 lb груза меньше GVWR, но больше 4000 lb, оставшихся после массы грузовика
+    assert not result.feasible
+    assert result.issues == ["Load weight exceeded: 6000.0 lb (payload: 4000 lb)"]
+    assert assign_cars_to_trucks([truck], cars)[1] == ["s1"]
+
+
+def test_estimated_weights_warn_instead_of_rejecting(stinger_truck, make_car):
+    light = stinger_truck.copy(update={"id": "truck-light", "gvwr": 5000.0, "tare_weight_lb": 0.0})
+    cars = [make_car(f"s{i}", 4.8) for i in range(2)]
+
+    result = BranchAndBoundPlacementEngine().search(light, cars)
+    assert result.feasible
+
+    cars_by_id = {car.id: car for car in cars}
+    validation = ConstraintValidator(light, result.placement, cars_by_id).result()
+    assert validation["valid"]
+    assert any(warning.startswith("Load weight may exceed limit") for warning in validation["warnings"])
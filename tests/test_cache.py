@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+from app.core.cache import LRUCache
+from app.models.truck.cache import TruckCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache("test-lru", max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_truck_cache_checks_updated_at_and_notifies(stinger_truck):
+    cache = TruckCache(max_size=8, ttl=60)
+    invalidated = []
+    cache.on_invalidate(invalidated.append)
+
+    cache.put(stinger_truck)
+    assert cache.get("truck-1") is stinger_truck
+    assert cache.get("truck-1", updated_at=stinger_truck.updated_at) is stinger_truck
+
+    # Старая версия не вытесняет новую
+    older = stinger_truck.copy(update={"updated_at": stinger_truck.updated_at - timedelta(days=1)})
+    cache.put(older)
+    assert cache.get("truck-1") is stinger_truck
+
+    # Другой updated_at — промах
+    assert cache.get("truck-1", updated_at=datetime(2030, 1, 1)) is None
+
+    cache.put(stinger_truck)
+    cache.invalidate("truck-1")
+    assert cache.get("truck-1") is None
+    assert invalidated == ["truck-1"]
@@ -0,0 +1,21 @@
+from app.core import ids
+from app.core.ids import IdGenerator
+
+
+def test_ids_are_unique_and_time_ordered():
+    generator = IdGenerator(prefix="car")
+    generated = [generator.new_id() for _ in range(10000)]
+
+    assert len(set(generated)) == len(generated)
+    assert generated == sorted(generated)
+    assert all(value.startswith("car") and len(value) == 29 for value in generated)
+
+
+def test_same_millisecond_is_monotonic(monkeypatch):
+    """Часы стоят на месте — id все равно растут"""
+    monkeypatch.setattr(ids.time, "time_ns", lambda: 1_700_000_000_000_000_000)
+    generator = IdGenerator()
+    first, second = generator.new_id(), generator.new_id()
+
+    assert first[:10] == second[:10]
+    assert second > first